@@ -1,5 +1,17 @@
+import argparse
 import csv
+import math
+import os
 import random
+from array import array
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
+from itertools import islice
+
+try:
+    from werkzeug.security import generate_password_hash
+except ImportError:  # 未安裝 Flask / Werkzeug 時仍可產生資料（密碼欄位改用占位字串）
+    generate_password_hash = None
 
 # ==========================================
 # 1. 資料設定 (跟之前一樣)
@@ -39,7 +51,9 @@ ADDRESSES = ["逢甲路", "文華路", "福星路", "西安街", "河南路二
 # ==========================================
 # 2. 生成邏輯
 # ==========================================
-def generate_mock_data(total_restaurants=30):
+def generate_mock_data(total_restaurants=30, seed=None):
+    # seed 為 None 時與原本行為相同（每次結果不同）
+    rng = random.Random(seed)
     restaurants = []
     menu_items = []
     
@@ -47,19 +61,19 @@ def generate_mock_data(total_restaurants=30):
     
     for i in range(total_restaurants):
         f_type = types_list[i % len(types_list)]
-        base_name = random.choice(STORE_NAMES[f_type])
+        base_name = rng.choice(STORE_NAMES[f_type])
         r_name = f"{base_name}" if i < 15 else f"{base_name} ({i+1}號店)"
         
         if f_type in ["健康餐", "義式", "飲品"]:
-            veg_opt = random.choice(["蛋奶素", "全素"])
+            veg_opt = rng.choice(["蛋奶素", "全素"])
         else:
             veg_opt = "葷食"
             
         # 餐廳物件（不包含 restaurantID，由資料庫自動產生）
         restaurants.append({
             "name": r_name,
-            "address": f"台中市西屯區{random.choice(ADDRESSES)}{random.randint(1, 300)}號",
-            "averageRating": round(random.uniform(3.5, 4.9), 1),
+            "address": f"台中市西屯區{rng.choice(ADDRESSES)}{rng.randint(1, 300)}號",
+            "averageRating": round(rng.uniform(3.5, 4.9), 1),
             "priceRange": 3 if f_type in ["日式", "義式"] else (2 if f_type in ["韓式", "健康餐"] else 1),
             "foodType": f_type,
             "vegetarianOption": veg_opt
@@ -67,11 +81,11 @@ def generate_mock_data(total_restaurants=30):
         
         # 菜單物件
         templates = MENU_TEMPLATES[f_type]
-        selected_dishes = random.sample(templates, k=random.randint(2, len(templates)))
+        selected_dishes = rng.sample(templates, k=rng.randint(2, len(templates)))
         
         for dish in selected_dishes:
-            price_var = dish[1] + random.choice([-5, 0, 5, 10])
-            cal_var = int(dish[2] * random.uniform(0.9, 1.1))
+            price_var = dish[1] + rng.choice([-5, 0, 5, 10])
+            cal_var = int(dish[2] * rng.uniform(0.9, 1.1))
             
             # restaurantID 使用餐廳在列表中的索引+1（假設按順序插入，資料庫會自動分配 ID）
             menu_items.append({
@@ -80,9 +94,9 @@ def generate_mock_data(total_restaurants=30):
                 "description": f"{r_name} 特製的{dish[0]}",
                 "price": float(price_var),
                 "calories": cal_var,
-                "protein": round(dish[3] * random.uniform(0.9, 1.1), 1),
-                "carbs": round(dish[4] * random.uniform(0.9, 1.1), 1),
-                "fat": round(dish[5] * random.uniform(0.9, 1.1), 1)
+                "protein": round(dish[3] * rng.uniform(0.9, 1.1), 1),
+                "carbs": round(dish[4] * rng.uniform(0.9, 1.1), 1),
+                "fat": round(dish[5] * rng.uniform(0.9, 1.1), 1)
             })
 
     return restaurants, menu_items
@@ -98,12 +112,301 @@ def save_to_csv(filename, data, fieldnames):
         writer.writerows(data)
     print(f"成功產生: {filename} ({len(data)} 筆)")
 
-if __name__ == "__main__":
+# ==========================================
+# 4. 大量資料（壓測用，串流寫入）
+# ==========================================
+# 用法：
+#   python3 app.py --restaurants 100000 --users 20000 --days 30 --seed 42 --out large
+#   python3 ../src/scripts/ingest_catalog.py --restaurants large/restaurants.csv \
+#       --menu-items large/menu_items.csv --users large/users.csv \
+#       --diet-logs large/diet_logs.csv --reviews large/reviews.csv
+#
+# - 同一個 seed 產生的資料完全相同（密碼雜湊含隨機 salt 除外）；每個資料表使用獨立的亂數產生器，
+#   調整使用者數量不會改變餐廳與菜單
+# - 資料邊產生邊寫入（每次 CHUNK_SIZE 筆），記憶體只保留每間餐廳的少量數值
+# - 各表都輸出主鍵欄位，外鍵直接對應，匯入時不依賴 AUTO_INCREMENT 的順序
+
+CHUNK_SIZE = 10000
+
+# 人氣分布（Zipf 指數）：越大越集中在少數熱門餐廳，影響飲食紀錄與評論的分布
+POPULARITY_SKEW = 0.9
+
+# 每間餐廳的菜色數量範圍
+MIN_ITEMS_PER_RESTAURANT = 3
+MAX_ITEMS_PER_RESTAURANT = 12
+
+# 菜色超過模板數量時加上的變化（名稱後綴, 價格倍數, 熱量倍數）
+DISH_VARIANTS = [("大份", 1.3, 1.4), ("小份", 0.8, 0.7), ("加蛋", 1.15, 1.2), ("套餐", 1.5, 1.6), ("辣味", 1.0, 1.0)]
+
+# 用餐時段：(權重, 平均時間（小時）, 標準差（小時）)，依序為早餐、午餐、晚餐、宵夜
+MEAL_TIMES = [(0.25, 8.0, 0.6), (0.40, 12.5, 0.5), (0.30, 18.75, 0.7), (0.05, 22.0, 1.0)]
+
+# 使用者有記錄的那天，紀錄筆數（1 ~ 4 筆）的權重
+LOGS_PER_DAY_WEIGHTS = [0.2, 0.4, 0.3, 0.1]
+
+PORTION_SIZES = [0.5, 1.0, 1.0, 1.0, 1.0, 1.5, 2.0]
+
+# 每位使用者平均的評論數
+REVIEWS_PER_USER = 3
+
+REVIEW_COMMENTS = {
+    5: ["非常好吃，會再來！", "CP 值超高", "份量足，服務也很好"],
+    4: ["整體不錯", "味道很好，但要等比較久", "價格合理"],
+    3: ["普通", "還可以，沒有特別驚艷", "份量稍少"],
+    2: ["有點失望", "太鹹了", "等太久"],
+    1: ["不推薦", "衛生有待加強"],
+}
+
+# 產生的使用者共用同一組密碼，方便壓測登入
+DEFAULT_PASSWORD = "loadtest"
+
+RESTAURANT_COLUMNS = ["restaurantID", "name", "address", "averageRating", "priceRange", "foodType", "vegetarianOption"]
+MENU_ITEM_COLUMNS = ["itemID", "restaurantID", "name", "description", "price", "calories", "protein", "carbs", "fat"]
+USER_COLUMNS = ["userID", "username", "hashedPassword", "mode", "budget", "targetCalories", "targetProtein", "targetFat"]
+DIET_LOG_COLUMNS = ["logID", "userID", "itemID", "timestamp", "portionSize"]
+REVIEW_COLUMNS = ["reviewID", "restaurantID", "userID", "rating", "comment", "timestamp"]
+
+
+class Popularity:
+    """
+    Zipf 分布的餐廳抽樣
+
+    名次以乘法雜湊對應到餐廳 ID（與總數互質的步長），熱門餐廳不會集中在前段 ID
+    """
+
+    def __init__(self, total, skew=POPULARITY_SKEW):
+        self.total = total
+        self._cumulative = array("d")
+        weight_sum = 0.0
+        for rank in range(1, total + 1):
+            weight_sum += 1.0 / rank ** skew
+            self._cumulative.append(weight_sum)
+        self._weight_sum = weight_sum
+        stride = max(1, int(total * 0.618)) | 1
+        while math.gcd(stride, total) != 1:
+            stride += 2
+        self._stride = stride
+
+    def sample(self, rng):
+        """抽一間餐廳，返回 restaurantID（從 1 起算）"""
+        rank = bisect_right(self._cumulative, rng.random() * self._weight_sum)
+        return min(rank, self.total - 1) * self._stride % self.total + 1
+
+
+def _table_rng(seed, table):
+    # 字串 seed 在不同 Python 版本與程序之間結果一致（不受 PYTHONHASHSEED 影響）
+    return random.Random(f"{seed}:{table}")
+
+
+def _price_range(f_type):
+    return 3 if f_type in ["日式", "義式"] else (2 if f_type in ["韓式", "健康餐"] else 1)
+
+
+def iter_restaurants(total, seed, ratings, type_index):
+    """
+    逐筆產生餐廳
+
+    Args:
+        ratings: array('f')，寫入每間餐廳的評分（供評論使用）
+        type_index: array('b')，寫入每間餐廳的類型索引（供菜單使用）
+    """
+    rng = _table_rng(seed, "restaurants")
+    types_list = list(STORE_NAMES.keys())
+    for i in range(total):
+        t = rng.randrange(len(types_list))
+        f_type = types_list[t]
+        base_name = rng.choice(STORE_NAMES[f_type])
+        if f_type in ["健康餐", "義式", "飲品"]:
+            veg_opt = rng.choice(["蛋奶素", "全素"])
+        else:
+            veg_opt = "葷食"
+        rating = round(min(4.9, max(2.5, rng.gauss(4.1, 0.4))), 1)
+        ratings.append(rating)
+        type_index.append(t)
+        yield (
+            i + 1,
+            f"{base_name} ({i + 1}號店)",
+            f"台中市西屯區{rng.choice(ADDRESSES)}{rng.randint(1, 300)}號",
+            rating,
+            _price_range(f_type),
+            f_type,
+            veg_opt,
+        )
+
+
+def iter_menu_items(type_index, seed, item_start):
+    """
+    逐筆產生菜單
+
+    Args:
+        type_index: iter_restaurants 記錄的餐廳類型索引
+        item_start: array('l')，寫入每間餐廳第一道菜的 itemID（最後多一筆結尾），供飲食紀錄抽樣
+    """
+    rng = _table_rng(seed, "menu_items")
+    types_list = list(STORE_NAMES.keys())
+    item_id = 1
+    for i, t in enumerate(type_index):
+        restaurant_id = i + 1
+        templates = MENU_TEMPLATES[types_list[t]]
+        count = rng.randint(MIN_ITEMS_PER_RESTAURANT, MAX_ITEMS_PER_RESTAURANT)
+        item_start.append(item_id)
+        for n in range(count):
+            name, price, calories, protein, carbs, fat = templates[n % len(templates)]
+            if n >= len(templates):
+                suffix, price_mul, cal_mul = DISH_VARIANTS[(n // len(templates) - 1) % len(DISH_VARIANTS)]
+                name = f"{name}（{suffix}）"
+                price, calories = price * price_mul, calories * cal_mul
+                protein, carbs, fat = protein * cal_mul, carbs * cal_mul, fat * cal_mul
+            yield (
+                item_id,
+                restaurant_id,
+                name,
+                f"{restaurant_id}號店 特製的{name}",
+                float(round(price) + rng.choice([-5, 0, 5, 10])),
+                int(calories * rng.uniform(0.9, 1.1)),
+                round(protein * rng.uniform(0.9, 1.1), 1),
+                round(carbs * rng.uniform(0.9, 1.1), 1),
+                round(fat * rng.uniform(0.9, 1.1), 1),
+            )
+            item_id += 1
+    item_start.append(item_id)
+
+
+def iter_users(total, seed, password=DEFAULT_PASSWORD):
+    """逐筆產生使用者（username 為 user0000001 格式）"""
+    rng = _table_rng(seed, "users")
+    # 雜湊很慢，所有使用者共用同一個雜湊值
+    hashed = generate_password_hash(password) if generate_password_hash else f"plain:{password}"
+    for i in range(total):
+        fitness = rng.random() < 0.3
+        yield (
+            i + 1,
+            f"user{i + 1:07d}",
+            hashed,
+            "FITNESS" if fitness else "NORMAL",
+            rng.choice([100, 150, 200, 250, 300, 400]),
+            rng.randrange(1500, 2800, 50),
+            rng.randrange(100, 180, 5) if fitness else rng.randrange(50, 100, 5),
+            rng.randrange(40, 90, 5),
+        )
+
+
+def _meal_time(rng, day):
+    weights = [w for w, _, _ in MEAL_TIMES]
+    _, mean, std = rng.choices(MEAL_TIMES, weights)[0]
+    hours = min(23.99, max(5.0, rng.gauss(mean, std)))
+    return datetime.combine(day, datetime.min.time()) + timedelta(seconds=int(hours * 3600))
+
+
+def iter_diet_logs(total_users, days, seed, popularity, item_start, end_date=None):
+    """
+    逐筆產生飲食紀錄
+
+    每位使用者有固定的活躍程度（少數人天天記錄、多數人偶爾記錄），
+    每筆紀錄依人氣抽餐廳、再從該餐廳菜單抽一道菜，時間集中在三餐時段
+    """
+    rng = _table_rng(seed, "diet_logs")
+    end_date = end_date or date.today()
+    first_day = end_date - timedelta(days=days - 1)
+    counts = range(1, len(LOGS_PER_DAY_WEIGHTS) + 1)
+    log_id = 1
+    for user_id in range(1, total_users + 1):
+        activity = rng.betavariate(1.2, 2.5)
+        for offset in range(days):
+            if rng.random() >= activity:
+                continue
+            day = first_day + timedelta(days=offset)
+            n = rng.choices(counts, LOGS_PER_DAY_WEIGHTS)[0]
+            for timestamp in sorted(_meal_time(rng, day) for _ in range(n)):
+                restaurant = popularity.sample(rng)
+                item_id = rng.randrange(item_start[restaurant - 1], item_start[restaurant])
+                yield (log_id, user_id, item_id, timestamp.strftime("%Y-%m-%d %H:%M:%S"), rng.choice(PORTION_SIZES))
+                log_id += 1
+
+
+def iter_reviews(total, total_users, days, seed, popularity, ratings, end_date=None):
+    """逐筆產生評論：熱門餐廳評論較多，分數圍繞餐廳平均評分"""
+    rng = _table_rng(seed, "reviews")
+    end = datetime.combine(end_date or date.today(), datetime.min.time()) + timedelta(days=1)
+    span = days * 24 * 3600
+    for review_id in range(1, total + 1):
+        restaurant = popularity.sample(rng)
+        rating = min(5, max(1, round(rng.gauss(ratings[restaurant - 1], 0.8))))
+        timestamp = end - timedelta(seconds=rng.randrange(span))
+        yield (
+            review_id,
+            restaurant,
+            rng.randint(1, total_users),
+            rating,
+            rng.choice(REVIEW_COMMENTS[rating]),
+            timestamp.strftime("%Y-%m-%d %H:%M:%S"),
+        )
+
+
+def write_csv_stream(filename, fieldnames, rows, chunk_size=CHUNK_SIZE):
+    """分批寫入 CSV（rows 為 tuple 的迭代器），返回寫入筆數"""
+    written = 0
+    with open(filename, mode='w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(fieldnames)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            writer.writerows(chunk)
+            written += len(chunk)
+    print(f"成功產生: {filename} ({written} 筆)")
+    return written
+
+
+def generate_dataset(out_dir, total_restaurants, total_users, days=30, seed=42,
+                     reviews_per_user=REVIEWS_PER_USER, chunk_size=CHUNK_SIZE, end_date=None):
+    """產生壓測用的完整資料集（餐廳、菜單、使用者、飲食紀錄、評論）"""
+    os.makedirs(out_dir, exist_ok=True)
+    path = lambda name: os.path.join(out_dir, name)
+
+    ratings, type_index, item_start = array("f"), array("b"), array("l")
+    write_csv_stream(path("restaurants.csv"), RESTAURANT_COLUMNS,
+                     iter_restaurants(total_restaurants, seed, ratings, type_index), chunk_size)
+    write_csv_stream(path("menu_items.csv"), MENU_ITEM_COLUMNS,
+                     iter_menu_items(type_index, seed, item_start), chunk_size)
+    if total_users <= 0:
+        return
+
+    write_csv_stream(path("users.csv"), USER_COLUMNS, iter_users(total_users, seed), chunk_size)
+    popularity = Popularity(total_restaurants)
+    write_csv_stream(path("diet_logs.csv"), DIET_LOG_COLUMNS,
+                     iter_diet_logs(total_users, days, seed, popularity, item_start, end_date), chunk_size)
+    write_csv_stream(path("reviews.csv"), REVIEW_COLUMNS,
+                     iter_reviews(total_users * reviews_per_user, total_users, days, seed,
+                                  popularity, ratings, end_date), chunk_size)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="產生模擬資料；不加參數時產生 30 間餐廳的範例資料")
+    parser.add_argument("--restaurants", type=int, help="餐廳數量（指定時改為產生壓測用的完整資料集）")
+    parser.add_argument("--users", type=int, default=0, help="使用者數量（0 表示只產生餐廳與菜單）")
+    parser.add_argument("--days", type=int, default=30, help="飲食紀錄與評論涵蓋的天數（到今天為止）")
+    parser.add_argument("--reviews-per-user", type=int, default=REVIEWS_PER_USER)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--out", default=".", help="輸出資料夾")
+    args = parser.parse_args()
+
+    if args.restaurants:
+        generate_dataset(args.out, args.restaurants, args.users, args.days, args.seed,
+                         args.reviews_per_user, max(1, args.chunk_size))
+        return
+
     r_data, m_data = generate_mock_data(30)
-    
+
     # 定義欄位順序（不包含自動產生的 ID 欄位）
     r_cols = ["name", "address", "averageRating", "priceRange", "foodType", "vegetarianOption"]
     m_cols = ["restaurantID", "name", "description", "price", "calories", "protein", "carbs", "fat"]
-    
-    save_to_csv("restaurants.csv", r_data, r_cols)
-    save_to_csv("menu_items.csv", m_data, m_cols)
\ No newline at end of file
+
+    save_to_csv(os.path.join(args.out, "restaurants.csv"), r_data, r_cols)
+    save_to_csv(os.path.join(args.out, "menu_items.csv"), m_data, m_cols)
+
+
+if __name__ == "__main__":
+    main()
@@ -34,6 +34,30 @@ echo "================================================"
 
 clear
 
+echo "Building image variants..."
+python3 src/scripts/build_images.py || echo "Skipped (Pillow not installed)"
+echo "================================================"
+echo "Done"
+echo "================================================"
+
+clear
+
+echo "Precompressing static files..."
+python3 src/scripts/precompress_static.py
+echo "================================================"
+echo "Done"
+echo "================================================"
+
+clear
+
+echo "Building module manifest..."
+python3 src/scripts/build_module_manifest.py
+echo "================================================"
+echo "Done"
+echo "================================================"
+
+clear
+
 echo "================================================"
 echo "All done!"
 echo "================================================"
\ No newline at end of file
@@ -0,0 +1,18 @@
+USE data;
+
+-- 建立全文檢索資料表
+-- MariaDB 的 FULLTEXT 沒有 ngram parser，中文斷詞（bigram）由應用程式完成，
+-- 此表存放編碼後的 token，內容由 src/scripts/rebuild_search_index.py 產生
+-- （斷詞無法在 SQL 中完成；索引為空時應用程式改用 LIKE 搜尋）
+CREATE TABLE IF NOT EXISTS restaurant_search (
+    restaurantID  INT PRIMARY KEY,
+    nameTokens    TEXT NOT NULL,            -- 餐廳名稱 token
+    menuTokens    MEDIUMTEXT NOT NULL,      -- 所有菜名 token
+    FULLTEXT KEY ft_search_name (nameTokens),
+    FULLTEXT KEY ft_search_menu (menuTokens),
+    FULLTEXT KEY ft_search_all  (nameTokens, menuTokens),
+    CONSTRAINT fk_search_restaurant
+        FOREIGN KEY (restaurantID)
+        REFERENCES restaurants(restaurantID)
+        ON DELETE CASCADE
+) ENGINE=InnoDB;
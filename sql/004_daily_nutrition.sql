@@ -0,0 +1,31 @@
+USE data;
+
+-- 建立每日營養攝取彙總資料表
+-- 由 DietService 在新增 / 刪除 / 修改飲食紀錄的同一個交易中維護，
+-- 讀取今日總計只需一次主鍵查詢
+CREATE TABLE IF NOT EXISTS daily_nutrition (
+    userID         INT NOT NULL,
+    logDate        DATE NOT NULL,
+    totalCalories  DOUBLE NOT NULL DEFAULT 0,
+    totalProtein   DOUBLE NOT NULL DEFAULT 0,
+    totalCarbs     DOUBLE NOT NULL DEFAULT 0,
+    totalFat       DOUBLE NOT NULL DEFAULT 0,
+    logCount       INT NOT NULL DEFAULT 0,    -- 當日紀錄筆數
+    PRIMARY KEY (userID, logDate),
+    CONSTRAINT fk_daily_user
+        FOREIGN KEY (userID)
+        REFERENCES users(userID)
+        ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+-- 由既有飲食紀錄回填（亦可執行 src/scripts/rebuild_daily_nutrition.py）
+REPLACE INTO daily_nutrition (userID, logDate, totalCalories, totalProtein, totalCarbs, totalFat, logCount)
+SELECT d.userID, DATE(d.timestamp),
+       COALESCE(SUM(m.calories * d.portionSize), 0),
+       COALESCE(SUM(m.protein * d.portionSize), 0),
+       COALESCE(SUM(m.carbs * d.portionSize), 0),
+       COALESCE(SUM(m.fat * d.portionSize), 0),
+       COUNT(*)
+FROM diet_logs d
+JOIN menu_items m ON d.itemID = m.itemID
+GROUP BY d.userID, DATE(d.timestamp);
@@ -0,0 +1,8 @@
+USE data;
+
+-- keyset 分頁索引
+-- /api/stores 分頁依 (averageRating, restaurantID) 由高到低排序
+CREATE INDEX idx_restaurant_rating ON restaurants(averageRating, restaurantID);
+
+-- 飲食記錄分頁依 (timestamp, logID) 排序，由 idx_diet_user_time (userID, timestamp)
+-- 加上 InnoDB 隱含附加的主鍵 logID 涵蓋，不需額外索引
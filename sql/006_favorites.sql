@@ -0,0 +1,20 @@
+USE data;
+
+-- 建立收藏資料表
+-- 主鍵 (userID, restaurantID) 同時提供唯一性與「某使用者的收藏」查詢；
+-- idx_favorite_restaurant 供刪除餐廳時的外鍵檢查與「被收藏次數」統計使用
+CREATE TABLE IF NOT EXISTS favorites (
+    userID        INT NOT NULL,
+    restaurantID  INT NOT NULL,
+    created_at    DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (userID, restaurantID),
+    INDEX idx_favorite_restaurant (restaurantID),
+    CONSTRAINT fk_favorite_user
+        FOREIGN KEY (userID)
+        REFERENCES users(userID)
+        ON DELETE CASCADE,
+    CONSTRAINT fk_favorite_restaurant
+        FOREIGN KEY (restaurantID)
+        REFERENCES restaurants(restaurantID)
+        ON DELETE CASCADE
+) ENGINE=InnoDB;
@@ -0,0 +1,9 @@
+USE data;
+
+-- averageRating 改為 DECIMAL
+-- FLOAT 以單精度儲存，3.8 與應用程式帶入的倍精度 3.8 不相等，
+-- /api/stores 的 keyset 分頁條件 (averageRating = ? AND restaurantID < ?) 永遠不成立，
+-- 換頁時會跳過或重複同評分的餐廳。DECIMAL 可精確比較，idx_restaurant_rating 仍可使用
+-- 同時改為 NOT NULL：NULL 不參與上述比較，游標停在 NULL 評分時會跳過其餘 NULL 評分的餐廳
+UPDATE restaurants SET averageRating = 0 WHERE averageRating IS NULL;
+ALTER TABLE restaurants MODIFY averageRating DECIMAL(3,1) NOT NULL DEFAULT 0;
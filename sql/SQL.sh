@@ -3,5 +3,25 @@
 # 連到 MySQL，對 data 這個資料庫執行建表
 mysql -P 3306 -u user -p data < 001_create_tables.sql
 
+# 建立全文檢索資料表
+mysql -P 3306 -u user -p data < 003_fulltext_search.sql
+
+# 建立每日營養彙總資料表（含既有紀錄回填）
+mysql -P 3306 -u user -p data < 004_daily_nutrition.sql
+
+# 建立分頁用索引
+mysql -P 3306 -u user -p data < 005_pagination_indexes.sql
+
+# 建立收藏資料表
+mysql -P 3306 -u user -p data < 006_favorites.sql
+
+# 評分欄位改為 DECIMAL（分頁游標需精確比較）
+mysql -P 3306 -u user -p data < 007_rating_decimal.sql
+
 # # 再執行插入假資料
 # mysql -P 3306 -u user -p data < src/002_insert_sample_data.sql
+
+# 填入全文檢索索引（003 只建立空表；索引為空時搜尋會改用 LIKE）
+# 索引不會自動更新：之後以 SQL 新增或修改餐廳 / 菜單資料時需再執行一次
+# （src/scripts/ingest_catalog.py 會自行重建）
+python3 ../src/scripts/rebuild_search_index.py
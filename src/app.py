@@ -3,20 +3,44 @@ Flask 主應用程式
 自動載入所有模組的 Blueprint
 """
 
+import time
+
+# 啟動耗時的起點（包含以下 import 的時間）
+_IMPORT_STARTED = time.perf_counter()
+
 from flask import Flask
 import os
+import json
 import importlib
 from dotenv import load_dotenv
-from utils.debug import DEBUG_PRINT, WARN_PRINT, ERROR_PRINT, INFO_PRINT
+from utils.debug import DEBUG_PRINT, WARN_PRINT, ERROR_PRINT, INFO_PRINT, configure_logging, init_request_logging
+from utils.json_provider import configure_json
+from utils.compression import init_compression
+from utils.images import init_images
+from utils.assets import init_assets
+from utils.query_stats import init_query_stats
+from utils.metrics import init_metrics
+from utils.profiler import init_profiler
+from utils.startup import init_startup
+from services.cache import configure_backend
+from services.restaurant_service import RestaurantService
+from services.diet_service import DietService
 
 # 載入 ENV/.env 檔案
 env_path = os.path.join(os.path.dirname(__file__), "..", "ENV", ".env")
 load_dotenv(env_path)
+# 本模組載入時 utils.debug 已依當時的環境變數完成設定，載入 .env 後重新讀取一次
+configure_logging()
+
+MODULES_PATH = os.path.join(os.path.dirname(__file__), "modules")
+# 模組清單（由 scripts/build_module_manifest.py 產生）
+DEFAULT_MODULE_MANIFEST = os.path.join(MODULES_PATH, "manifest.json")
 
 
 def create_app():
     """創建並配置 Flask 應用程式"""
     app = Flask(__name__)
+    imports_done = time.perf_counter()
 
     app.config.from_mapping(
         SECRET_KEY=os.getenv("SECRET_KEY", "dev-secret-key"),
@@ -27,50 +51,174 @@ def create_app():
             "password": os.getenv("DB_PASSWORD", ""),
             # SQL 腳本使用的資料庫名稱為 data，預設值與之對齊
             "database": os.getenv("DB_NAME", "data"),
+            # 連線池設定（由 services.db 取出，不會傳給 mariadb.connect）
+            "pool_size": int(os.getenv("DB_POOL_SIZE", 5)),
+            "pool_max_overflow": int(os.getenv("DB_POOL_MAX_OVERFLOW", 10)),
+            "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 10)),
+            "pool_idle_timeout": float(os.getenv("DB_POOL_IDLE_TIMEOUT", 300)),
+            "pool_pre_ping": float(os.getenv("DB_POOL_PRE_PING", 30)),
         },
+        # 快取後端：memory（每個 worker 各自一份）或 sqlite（同機器 worker 共用）
+        # 腳本或其他 worker 的 invalidate_cache() 只有 sqlite 能讓執行中的伺服器立即失效
+        CACHE_BACKEND=os.getenv("CACHE_BACKEND", "memory"),
+        CACHE_PATH=os.getenv("CACHE_PATH", ""),
+        CACHE_MAX_ENTRIES=int(os.getenv("CACHE_MAX_ENTRIES", 4096)),
+        # 餐廳目錄快取（TTL 秒數，0 表示停用）
+        CATALOG_CACHE_TTL=float(os.getenv("CATALOG_CACHE_TTL", 300)),
+        # 時區：使用者預設時區與 diet_logs.timestamp 的儲存時區
+        # 皆留空時不做轉換（以伺服器本地時間的日期界線查詢）
+        APP_TIMEZONE=os.getenv("APP_TIMEZONE", ""),
+        DB_TIMEZONE=os.getenv("DB_TIMEZONE", ""),
+        # 目錄 API 的 Cache-Control max-age（秒）；過期後以 ETag 重新驗證
+        HTTP_CACHE_MAX_AGE=int(os.getenv("HTTP_CACHE_MAX_AGE", 30)),
+        # JSON 編碼：auto（有安裝 orjson 就使用）、orjson 或 stdlib
+        JSON_PROVIDER=os.getenv("JSON_PROVIDER", "auto"),
+        # 回應壓縮（gzip / brotli）：最小壓縮大小與是否於啟動時產生靜態檔案的壓縮版本
+        COMPRESS_ENABLED=os.getenv("COMPRESS_ENABLED", "1").lower() in ("1", "true", "yes", "on"),
+        COMPRESS_MIN_SIZE=int(os.getenv("COMPRESS_MIN_SIZE", 1024)),
+        COMPRESS_STATIC_ON_STARTUP=os.getenv("COMPRESS_STATIC_ON_STARTUP", "0").lower() in ("1", "true", "yes", "on"),
+        # 靜態檔案網址加上內容雜湊，並以一年的 immutable Cache-Control 提供
+        ASSET_FINGERPRINT=os.getenv("ASSET_FINGERPRINT", "1").lower() in ("1", "true", "yes", "on"),
+        # SQL 統計：慢查詢門檻（毫秒，0 表示停用）、紀錄檔（留空輸出到 stderr）、
+        # 除錯模式下單一請求查詢次數的警告門檻
+        SLOW_QUERY_MS=float(os.getenv("SLOW_QUERY_MS", 200)),
+        SLOW_QUERY_LOG=os.getenv("SLOW_QUERY_LOG", ""),
+        QUERY_COUNT_WARN=int(os.getenv("QUERY_COUNT_WARN", 20)),
+        # /metrics（Prometheus 格式）；多個 worker 時以 METRICS_DIR 彙整
+        METRICS_ENABLED=os.getenv("METRICS_ENABLED", "0").lower() in ("1", "true", "yes", "on"),
+        METRICS_TOKEN=os.getenv("METRICS_TOKEN", ""),
+        METRICS_DIR=os.getenv("METRICS_DIR", ""),
+        METRICS_FLUSH_INTERVAL=float(os.getenv("METRICS_FLUSH_INTERVAL", 5)),
+        # 取樣式效能分析（預設關閉）：隨機分析比例、擷取間隔（秒）、X-Profile 標頭的 token、輸出資料夾
+        PROFILER_ENABLED=os.getenv("PROFILER_ENABLED", "0").lower() in ("1", "true", "yes", "on"),
+        PROFILER_SAMPLE_RATE=float(os.getenv("PROFILER_SAMPLE_RATE", 0.01)),
+        PROFILER_INTERVAL=float(os.getenv("PROFILER_INTERVAL", 0.005)),
+        PROFILER_TOKEN=os.getenv("PROFILER_TOKEN", ""),
+        PROFILER_OUTPUT_DIR=os.getenv("PROFILER_OUTPUT_DIR", ""),
+        # 啟動模式：eager（啟動時完成所有初始化）或 lazy（只延後資料載入：靜態檔案雜湊、
+        # 圖片 manifest、預先壓縮檔掃描延後到第一個請求，並依模組清單取代掃描 modules 資料夾）。
+        # 兩種模式的模組都在啟動時 import 並註冊 Blueprint：Flask 在第一個請求後不允許再註冊
+        # Blueprint，路由模組本身的成本可由啟動計時的 module:{模組名} 得知
+        STARTUP_MODE=os.getenv("STARTUP_MODE", "eager").lower(),
+        MODULE_MANIFEST=os.getenv("MODULE_MANIFEST", "") or DEFAULT_MODULE_MANIFEST,
     )
 
+    # 必須最先建立：其他 init_* 透過它延後工作，且它的 before_request 要在其他 hook 之前執行
+    timer = init_startup(app)
+    timer.timings.append(("imports", imports_done - _IMPORT_STARTED))
+
+    with timer.measure("json"):
+        configure_json(app, app.config["JSON_PROVIDER"])
+    # 最先註冊，其他 before_request 輸出的訊息也帶有 request ID
+    init_request_logging(app)
+    # 最先註冊，壓縮會在其他 after_request 之後執行
+    init_compression(app)
+    init_images(app)
+    # 在壓縮之後註冊，帶指紋的檔名先轉回原檔名再交給預先壓縮的 static 路由
+    init_assets(app)
+    with timer.measure("query_stats"):
+        init_query_stats(app)
+    with timer.measure("metrics"):
+        init_metrics(app)
+    with timer.measure("profiler"):
+        init_profiler(app)
+
+    with timer.measure("services"):
+        backend_options = {"max_entries": app.config["CACHE_MAX_ENTRIES"]}
+        if app.config["CACHE_BACKEND"] == "sqlite":
+            # 預設放在 Flask instance 資料夾（不使用可被其他使用者寫入的系統暫存資料夾）
+            backend_options["path"] = app.config["CACHE_PATH"] or os.path.join(app.instance_path, "cache.sqlite3")
+        configure_backend(app.config["CACHE_BACKEND"], **backend_options)
+        RestaurantService.configure_cache(ttl=app.config["CATALOG_CACHE_TTL"])
+        DietService.configure_timezones(app.config["APP_TIMEZONE"] or None, app.config["DB_TIMEZONE"] or None)
+
     # 載入所有模組
     register_blueprints(app)
 
+    INFO_PRINT(timer.report(f"[OK] 應用程式啟動完成（{timer.mode}）"))
+    if timer.deferred:
+        INFO_PRINT(f"[INFO] 延後到第一個請求: {', '.join(name for name, _func in timer.deferred)}")
     return app
 
 
-def register_blueprints(app):
+def discover_modules():
     """
-    自動註冊所有模組的 Blueprint
+    掃描 modules 資料夾，返回 [(模組名, Blueprint 名稱), ...]
 
-    此函數會掃描 modules 資料夾，自動載入所有模組的 Blueprint
     每個模組應該在 __init__.py 中導出一個 Blueprint 物件
     命名規則：{模組名}_bp
     """
-    modules_path = os.path.join(os.path.dirname(__file__), "modules")
-
+    modules = []
     # 遍歷 modules 資料夾中的所有子資料夾
-    for module_name in os.listdir(modules_path):
-        module_path = os.path.join(modules_path, module_name)
+    for module_name in os.listdir(MODULES_PATH):
+        module_path = os.path.join(MODULES_PATH, module_name)
 
         # 只處理資料夾且不是 __pycache__
         if os.path.isdir(module_path) and not module_name.startswith("__"):
-            try:
+            modules.append((module_name, f"{module_name}_bp"))
+    return modules
+
+
+def load_module_manifest(path):
+    """讀取模組清單（不存在或格式錯誤時返回 None）"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return [(entry["name"], entry["blueprint"]) for entry in data["modules"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def register_blueprints(app):
+    """
+    自動註冊所有模組的 Blueprint
+
+    eager 模式掃描 modules 資料夾；lazy 模式優先使用 MODULE_MANIFEST 的模組清單
+    （部署時預先產生，清單不存在時同樣改為掃描），只省去掃描資料夾的步驟。
+    兩種模式都在此 import 並註冊所有模組（第一個請求之後 Flask 不允許註冊 Blueprint）。
+    每個模組的 import 與註冊耗時記錄在啟動計時中（module:{模組名}）
+    """
+    timer = app.extensions["startup"]
+    modules = None
+    if timer.lazy:
+        modules = load_module_manifest(app.config["MODULE_MANIFEST"])
+        if modules is None:
+            WARN_PRINT(f"[WARN] 找不到模組清單 {app.config['MODULE_MANIFEST']}，改為掃描 modules 資料夾")
+    if modules is None:
+        modules = discover_modules()
+
+    for module_name, blueprint_name in modules:
+        try:
+            with timer.measure(f"module:{module_name}"):
                 # 動態導入模組
                 module = importlib.import_module(f"modules.{module_name}")
 
-                # 查找 Blueprint（命名規則：{模組名}_bp）
-                blueprint_name = f"{module_name}_bp"
+                # 查找 Blueprint
                 if hasattr(module, blueprint_name):
                     blueprint = getattr(module, blueprint_name)
                     app.register_blueprint(blueprint)
                     INFO_PRINT(f"[OK] 已載入模組: {module_name}")
                 else:
                     WARN_PRINT(f"[WARN] 模組 {module_name} 未找到 Blueprint ({blueprint_name})")
-            except Exception as e:
-                ERROR_PRINT(f"[ERROR] 載入模組 {module_name} 時發生錯誤: {str(e)}")
+        except Exception as e:
+            ERROR_PRINT(f"[ERROR] 載入模組 {module_name} 時發生錯誤: {str(e)}")
+
+
+_app = None
 
 
-# 創建應用程式實例
-app = create_app()
+def __getattr__(name):
+    """
+    第一次取用 app 時才創建應用程式實例（gunicorn app:app 與 from app import app 皆適用）
+    scripts 只 import create_app，不會多建立一個實例
+    """
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=5000)
+    __getattr__("app").run(debug=True, host="0.0.0.0", port=5000)
@@ -5,90 +5,102 @@ Frontend 模組的路由定義
 from flask import render_template, jsonify, request
 from . import frontend_bp
 from services.restaurant_service import RestaurantService
-from services.diet_service import DietService
+from services.diet_service import DietService, RANGE_PAGE_SIZE, meal_type_for, to_user_time
+from services.favorites_service import FavoritesService
+from .serializers import restaurant_to_store, store_list_response
 from services.db import driver_available
 from utils.debug import INFO_PRINT, ERROR_PRINT
+from utils.http_cache import conditional_response
 
 # 初始化服務
 restaurant_service = RestaurantService()
 diet_service = DietService()
-
-# 模擬收藏數據（實際應用中應該從資料庫讀取）
-_user_favorites = {}  # {user_id: [restaurant_id, ...]}
+favorites_service = FavoritesService()
 
 # 臨時使用者 ID（實際應用中應該從登入狀態取得）
 TEMP_USER_ID = 1
 
 
+def _parse_restaurant_id(restaurant_id):
+    """將數字、數字字串或 rest_XXX 格式的 ID 轉為整數；無法解析時返回 None"""
+    if isinstance(restaurant_id, int):
+        return restaurant_id
+    if isinstance(restaurant_id, str) and restaurant_id.isdigit():
+        return int(restaurant_id)
+    if isinstance(restaurant_id, str) and restaurant_id.startswith('rest_'):
+        suffix = restaurant_id.split('_', 1)[1]
+        return int(suffix) if suffix.isdigit() else None
+    return None
+
+
+def _parse_user_id(user_id):
+    """將使用者 ID 轉為整數；無法解析時返回 None"""
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+
 def _find_restaurant_by_id(restaurant_id):
     """根據 ID 尋找餐廳"""
     # 支援數字或字串 ID
-    if isinstance(restaurant_id, str) and restaurant_id.isdigit():
-        restaurant_id = int(restaurant_id)
-    elif isinstance(restaurant_id, str) and restaurant_id.startswith('rest_'):
-        restaurant_id = int(restaurant_id.split('_')[1])
+    parsed = _parse_restaurant_id(restaurant_id)
+    if parsed is None:
+        return None
     
-    return restaurant_service.get_restaurant_by_id(restaurant_id)
+    return restaurant_service.get_restaurant_by_id(parsed)
 
 
-def _convert_restaurant_to_frontend_format(restaurant, user_id: str = None):
-    """將餐廳資料轉換為前端格式"""
-    # 使用餐廳的 price_range 欄位來決定價格等級
-    price_range_map = {
-        1: ('$', '$ 1 ~ 200'),
-        2: ('$$', '$ 200 ~ 400'),
-        3: ('$$$', '$ 400 ~ 600'),
-    }
-    price_meta, price_range_text = price_range_map.get(
-        getattr(restaurant, 'price_range', 1), 
-        ('$', '$ 1 ~ 200')
-    )
-    
-    # 計算評分顯示
-    rating_value = restaurant.average_rating
-    full_stars = int(rating_value)
-    has_half = (rating_value - full_stars) >= 0.5
-    stars_display = '★' * full_stars + ('☆' if has_half else '') + '☆' * (5 - full_stars - (1 if has_half else 0))
-    rating_display = f"{stars_display} {rating_value:.1f}"
-    
-    # 檢查是否收藏
-    is_favorited = False
-    if user_id and user_id in _user_favorites:
-        is_favorited = str(restaurant.restaurant_id) in _user_favorites[user_id]
-    
-    # 取得餐廳 ID
-    rest_num = restaurant.restaurant_id
+def _favorite_ids_for(user_id):
+    """取得使用者收藏的餐廳 ID 集合（未提供或無效的使用者 ID 視為沒有收藏）"""
+    parsed = _parse_user_id(user_id)
+    if parsed is None:
+        return frozenset()
+    return favorites_service.get_favorite_ids(parsed)
+
+
+def _catalog_version(restaurant_id=None):
+    """
+    目錄回應的資料版本（供 ETag 使用）
     
-    # 使用本地圖片（基於餐廳 ID 循環使用 30 張圖片）
-    img_id = (rest_num - 1) % 30 + 1
-    placeholder_img = f"/static/images/stores/store_{img_id}.jpg"
+    帶有 user_id 時回應含 is_favorited，版本一併包含該使用者的收藏版本
+    """
+    version = restaurant_service.catalog_version(restaurant_id)
+    if version is None:
+        return None
+    user_id = _parse_user_id(request.args.get('user_id'))
+    if user_id is not None:
+        version += ':' + favorites_service.favorites_version(user_id)
+    return version
+
+
+def _convert_restaurant_to_frontend_format(restaurant, favorite_ids=frozenset(), include_menu: bool = True):
+    """
+    將餐廳資料轉換為前端格式
     
+    favorite_ids 為使用者收藏的餐廳 ID 集合（由呼叫端每個請求取得一次）；
+    列表請改用 store_list_response，直接串接快取的 JSON 片段
+    """
+    store = restaurant_to_store(restaurant, include_menu)
+    store["is_favorited"] = restaurant.restaurant_id in favorite_ids
+    return store
+
+
+def _convert_diet_log_to_frontend_format(log, tz: str = None):
+    """將飲食記錄轉換為前端格式"""
     return {
-        "id": rest_num,
-        "restaurant_id": restaurant.restaurant_id,
-        "name": restaurant.name,
-        "rating": rating_display,
-        "priceRange": price_range_text,
-        "priceMeta": price_meta,
-        "distance": f"{0.3 + (rest_num % 10) * 0.2:.1f} km",  # 模擬距離
-        "heroImg": placeholder_img,
-        "description": restaurant.name,
-        "address": restaurant.address,
-        "foodType": getattr(restaurant, 'food_type', ''),
-        "vegetarianOption": getattr(restaurant, 'vegetarian_option', '葷食'),
-        "menu": [
-            {
-                "item_id": item.item_id,
-                "name": item.name,
-                "price": f"${int(item.price)}",
-                "calories": getattr(item, 'calories', 0),
-                "protein": getattr(item, 'protein', 0),
-                "carbs": getattr(item, 'carbs', 0),
-                "fat": getattr(item, 'fat', 0)
-            }
-            for item in restaurant.menu_items  # 取所有菜單項目
-        ],
-        "is_favorited": is_favorited
+        "id": log.log_id,
+        "item_id": log.item_id,
+        "name": log.item_name,
+        "restaurant": log.restaurant_name,
+        "cals": int(log.calories * log.portion_size),
+        "protein": round(log.protein * log.portion_size, 1),
+        "carbs": round(log.carbs * log.portion_size, 1),
+        "fat": round(log.fat * log.portion_size, 1),
+        "portion_size": log.portion_size,
+        "timestamp": log.timestamp.isoformat() if log.timestamp else None,
+        # 根據使用者時區的時間判斷餐別
+        "meal": meal_type_for(to_user_time(log.timestamp, tz))
     }
 
 
@@ -99,6 +111,7 @@ def index():
 
 
 @frontend_bp.route('/api/stores', methods=['GET'])
+@conditional_response(lambda: _catalog_version(), private_args=('user_id',))
 def get_stores():
     """
     取得餐廳列表（前端格式）
@@ -109,6 +122,10 @@ def get_stores():
         price: 價格等級 ($, $$, $$$)
         vegetarian: 是否素食 (true/false)
         user_id: 使用者 ID（可選）
+        limit: 每頁筆數（可選，未提供時返回全部）
+        cursor: 分頁游標（上一頁回傳的 next_cursor）
+        view: 'summary' 時不查詢也不輸出菜單（改以 menu_url 指向
+              /api/restaurants/<id>/menu 按需載入）；預設 'full'
     """
     try:
         keyword = request.args.get('keyword', '').strip()
@@ -117,6 +134,7 @@ def get_stores():
         price = request.args.get('price', '').strip()
         vegetarian = request.args.get('vegetarian', 'false').lower() == 'true'
         user_id = request.args.get('user_id')
+        include_menus = request.args.get('view', 'full').lower() != 'summary'
         
         # 價格等級轉換為數字
         price_range = None
@@ -124,24 +142,27 @@ def get_stores():
             price_map = {'$': 1, '$$': 2, '$$$': 3}
             price_range = price_map.get(price, None)
         
-        # 使用資料庫服務搜尋
-        results = restaurant_service.search_restaurants(
-            keyword=keyword if keyword else None,
-            categories=categories if categories else None,
-            price_range=price_range,
-            vegetarian=vegetarian
-        )
-        
-        # 轉換為前端格式
-        stores_data = []
-        for restaurant in results:
-            store_data = _convert_restaurant_to_frontend_format(restaurant, user_id)
-            stores_data.append(store_data)
+        # 使用資料庫服務搜尋（提供 limit 時以 keyset 分頁）
+        try:
+            results, next_cursor = restaurant_service.search_restaurants_page(
+                keyword=keyword if keyword else None,
+                categories=categories if categories else None,
+                price_range=price_range,
+                vegetarian=vegetarian,
+                limit=request.args.get('limit', type=int),
+                cursor=request.args.get('cursor'),
+                include_menus=include_menus
+            )
+        except ValueError as e:
+            return jsonify({
+                "success": False,
+                "error": str(e)
+            }), 400
         
-        return jsonify({
-            "success": True,
-            "data": stores_data
-        }), 200
+        # 轉換為前端格式（串接快取的 JSON 片段，只在請求時合併收藏狀態）
+        return store_list_response(
+            results, _favorite_ids_for(user_id), include_menus, next_cursor=next_cursor
+        ), 200
         
     except Exception as e:
         ERROR_PRINT(f"[ERROR] 取得餐廳列表時發生錯誤: {str(e)}")
@@ -152,6 +173,9 @@ def get_stores():
 
 
 @frontend_bp.route('/api/stores/<store_id>', methods=['GET'])
+@conditional_response(
+    lambda store_id: _catalog_version(_parse_restaurant_id(store_id)), private_args=('user_id',)
+)
 def get_store_detail(store_id: str):
     """
     取得餐廳詳情（前端格式）
@@ -177,7 +201,7 @@ def get_store_detail(store_id: str):
                 "error": "餐廳不存在"
             }), 404
         
-        store_data = _convert_restaurant_to_frontend_format(restaurant, user_id)
+        store_data = _convert_restaurant_to_frontend_format(restaurant, _favorite_ids_for(user_id))
         
         return jsonify({
             "success": True,
@@ -207,43 +231,35 @@ def manage_favorites():
     """
     try:
         if request.method == 'GET':
-            user_id = request.args.get('user_id')
-            if not user_id:
+            user_id = _parse_user_id(request.args.get('user_id'))
+            if user_id is None:
                 return jsonify({
                     "success": False,
                     "error": "請提供使用者 ID"
                 }), 400
             
-            favorites = _user_favorites.get(user_id, [])
-            
-            # 取得收藏的餐廳資料
-            favorite_stores = []
-            for restaurant_id in favorites:
-                restaurant = _find_restaurant_by_id(restaurant_id)
-                if restaurant:
-                    favorite_stores.append(_convert_restaurant_to_frontend_format(restaurant, user_id))
-            
+            # 收藏的餐廳以批次查詢載入
+            return store_list_response(
+                favorites_service.get_favorite_restaurants(user_id),
+                favorites_service.get_favorite_ids(user_id)
+            ), 200
+        
+        data = request.get_json() or {}
+        user_id = _parse_user_id(data.get('user_id'))
+        restaurant_id = _parse_restaurant_id(data.get('restaurant_id'))
+        
+        if user_id is None or restaurant_id is None:
             return jsonify({
-                "success": True,
-                "data": favorite_stores
-            }), 200
+                "success": False,
+                "error": "請提供使用者 ID 和餐廳 ID"
+            }), 400
         
-        elif request.method == 'POST':
-            data = request.get_json() or {}
-            user_id = data.get('user_id')
-            restaurant_id = data.get('restaurant_id')
-            
-            if not user_id or not restaurant_id:
+        if request.method == 'POST':
+            if not favorites_service.add_favorite(user_id, restaurant_id):
                 return jsonify({
                     "success": False,
-                    "error": "請提供使用者 ID 和餐廳 ID"
-                }), 400
-            
-            if user_id not in _user_favorites:
-                _user_favorites[user_id] = []
-            
-            if restaurant_id not in _user_favorites[user_id]:
-                _user_favorites[user_id].append(restaurant_id)
+                    "error": "操作失敗"
+                }), 500
             
             return jsonify({
                 "success": True,
@@ -251,18 +267,11 @@ def manage_favorites():
             }), 200
         
         else:  # DELETE
-            data = request.get_json() or {}
-            user_id = data.get('user_id')
-            restaurant_id = data.get('restaurant_id')
-            
-            if not user_id or not restaurant_id:
+            if not favorites_service.remove_favorite(user_id, restaurant_id):
                 return jsonify({
                     "success": False,
-                    "error": "請提供使用者 ID 和餐廳 ID"
-                }), 400
-            
-            if user_id in _user_favorites:
-                _user_favorites[user_id] = [r for r in _user_favorites[user_id] if r != restaurant_id]
+                    "error": "操作失敗"
+                }), 500
             
             return jsonify({
                 "success": True,
@@ -278,6 +287,7 @@ def manage_favorites():
 
 
 @frontend_bp.route('/api/restaurants/list', methods=['GET'])
+@conditional_response(lambda: restaurant_service.catalog_version())
 def get_restaurant_list():
     """取得餐廳列表（下拉選單用）"""
     try:
@@ -295,6 +305,7 @@ def get_restaurant_list():
 
 
 @frontend_bp.route('/api/restaurants/<int:restaurant_id>/menu', methods=['GET'])
+@conditional_response(lambda restaurant_id: restaurant_service.catalog_version(restaurant_id))
 def get_restaurant_menu(restaurant_id):
     """取得特定餐廳的菜單"""
     try:
@@ -342,7 +353,12 @@ def manage_diet():
     
     GET 參數:
         user_id: 使用者 ID（可選，預設使用臨時 ID）
+        date: 指定日期 YYYY-MM-DD（可選）
         today: 是否只取今日記錄 (true/false)
+        tz: 使用者時區，IANA 名稱（可選，例如 Asia/Taipei）
+        start, end: 日期範圍 YYYY-MM-DD（含兩端），提供時返回範圍內記錄與每日 / 每餐總計
+        limit: 範圍模式或歷史記錄（today=false）每頁筆數（可選）
+        cursor: 分頁游標（上一頁回傳的 next_cursor）
     
     POST 資料:
         user_id: 使用者 ID（可選）
@@ -357,51 +373,69 @@ def manage_diet():
         if request.method == 'GET':
             user_id = request.args.get('user_id', type=int) or TEMP_USER_ID
             date_str = request.args.get('date')
+            tz = request.args.get('tz')
+            next_cursor = None
+            start_str = request.args.get('start')
+            end_str = request.args.get('end')
+            
+            if start_str and end_str:
+                # 日期範圍：一次取得記錄與每日 / 每餐總計
+                try:
+                    result = diet_service.get_diet_range(
+                        user_id,
+                        start_str,
+                        end_str,
+                        tz=tz,
+                        limit=request.args.get('limit', type=int) or RANGE_PAGE_SIZE,
+                        cursor=request.args.get('cursor')
+                    )
+                except ValueError as e:
+                    # 日期或游標格式錯誤
+                    return jsonify({
+                        "success": False,
+                        "error": str(e)
+                    }), 400
+                
+                response = {
+                    "success": True,
+                    "data": [_convert_diet_log_to_frontend_format(log, tz) for log in result['logs']],
+                    "next_cursor": result['next_cursor']
+                }
+                if result['days'] is not None:
+                    response["days"] = result['days']
+                return jsonify(response), 200
             
             if date_str:
-                logs = diet_service.get_date_diet_logs(user_id, date_str)
+                logs = diet_service.get_date_diet_logs(user_id, date_str, tz)
             else:
                 today_only = request.args.get('today', 'true').lower() == 'true'
                 if today_only:
-                    logs = diet_service.get_today_diet_logs(user_id)
+                    logs = diet_service.get_today_diet_logs(user_id, tz)
                 else:
-                    logs = diet_service.get_user_diet_logs(user_id)
+                    # 歷史記錄：keyset 分頁
+                    try:
+                        logs, next_cursor = diet_service.get_user_diet_logs_page(
+                            user_id,
+                            limit=request.args.get('limit', type=int) or 50,
+                            cursor=request.args.get('cursor')
+                        )
+                    except ValueError as e:
+                        return jsonify({
+                            "success": False,
+                            "error": str(e)
+                        }), 400
             
             # 轉換為前端格式
-            logs_data = []
-            for log in logs:
-                # 根據時間判斷餐別
-                meal_type = 'other'
-                if log.timestamp:
-                    hour = log.timestamp.hour
-                    if 5 <= hour < 11:
-                        meal_type = 'breakfast'
-                    elif 11 <= hour < 17:
-                        meal_type = 'lunch'
-                    elif 17 <= hour < 22:
-                        meal_type = 'dinner'
-                
-                logs_data.append({
-                    "id": log.log_id,
-                    "item_id": log.item_id,
-                    "name": log.item_name,
-                    "restaurant": log.restaurant_name,
-                    "cals": int(log.calories * log.portion_size),
-                    "protein": round(log.protein * log.portion_size, 1),
-                    "carbs": round(log.carbs * log.portion_size, 1),
-                    "fat": round(log.fat * log.portion_size, 1),
-                    "portion_size": log.portion_size,
-                    "timestamp": log.timestamp.isoformat() if log.timestamp else None,
-                    "meal": meal_type
-                })
+            logs_data = [_convert_diet_log_to_frontend_format(log, tz) for log in logs]
             
             # 同時返回今日營養攝取總計
-            summary = diet_service.get_today_nutrition_summary(user_id)
+            summary = diet_service.get_today_nutrition_summary(user_id, tz)
             
             return jsonify({
                 "success": True,
                 "data": logs_data,
-                "summary": summary
+                "summary": summary,
+                "next_cursor": next_cursor
             }), 200
         
         elif request.method == 'POST':
@@ -0,0 +1,157 @@
+"""
+Frontend 模組的餐廳序列化
+將餐廳轉為前端格式，並在程序內快取預先編碼好的 JSON 片段
+
+每間餐廳的前端格式（價格、星等、圖片、菜單價格字串等）只在資料異動後重建一次；
+快取鍵包含 RestaurantService.restaurant_versions() 的版本，invalidate_cache()
+遞增版本後所有 worker 都會重建；另外包含 catalog_epoch()，未經 invalidate_cache 的
+資料變更與目錄快取一樣最晚在 CATALOG_CACHE_TTL 後反映（TTL 為 0 時不快取片段）。
+is_favorited 等個人化欄位在請求時才合併。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple
+
+from flask import Response, current_app
+
+from services.restaurant_service import Restaurant, RestaurantService
+from utils.json_provider import dumps_bytes
+from utils.images import image_set
+from utils.assets import asset_url
+
+# 程序內最多保留的 JSON 片段數（完整與摘要各算一筆）
+FRAGMENT_CACHE_SIZE = 4096
+
+_PRICE_RANGE_MAP = {
+    1: ('$', '$ 1 ~ 200'),
+    2: ('$$', '$ 200 ~ 400'),
+    3: ('$$$', '$ 400 ~ 600'),
+}
+
+_fragments: "OrderedDict[Tuple[int, bool, Tuple[int, int], int], bytes]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _rating_display(rating_value: float) -> str:
+    """評分轉為星等字串，例如 ★★★★☆ 4.0"""
+    full_stars = int(rating_value)
+    has_half = (rating_value - full_stars) >= 0.5
+    stars_display = '★' * full_stars + ('☆' if has_half else '') + '☆' * (5 - full_stars - (1 if has_half else 0))
+    return f"{stars_display} {rating_value:.1f}"
+
+
+def restaurant_to_store(restaurant: Restaurant, include_menu: bool = True) -> Dict[str, Any]:
+    """
+    將餐廳資料轉換為前端格式（不含 is_favorited 等個人化欄位）
+
+    include_menu 為 False 時（摘要模式）不輸出 menu，改提供 menu_url 供前端按需載入
+    """
+    # 使用餐廳的 price_range 欄位來決定價格等級
+    price_meta, price_range_text = _PRICE_RANGE_MAP.get(
+        getattr(restaurant, 'price_range', 1),
+        ('$', '$ 1 ~ 200')
+    )
+
+    # 取得餐廳 ID
+    rest_num = restaurant.restaurant_id
+
+    # 使用本地圖片（基於餐廳 ID 循環使用 30 張圖片）
+    img_id = (rest_num - 1) % 30 + 1
+    placeholder_img = f"images/stores/store_{img_id}.jpg"
+
+    store = {
+        "id": rest_num,
+        "restaurant_id": restaurant.restaurant_id,
+        "name": restaurant.name,
+        "rating": _rating_display(restaurant.average_rating),
+        "priceRange": price_range_text,
+        "priceMeta": price_meta,
+        "distance": f"{0.3 + (rest_num % 10) * 0.2:.1f} km",  # 模擬距離
+        "heroImg": asset_url(placeholder_img),
+        # 列表卡片用的縮圖與 WebP（src / srcset / webpSrcset）
+        "heroImgSet": image_set(placeholder_img),
+        "description": restaurant.name,
+        "address": restaurant.address,
+        "foodType": getattr(restaurant, 'food_type', ''),
+        "vegetarianOption": getattr(restaurant, 'vegetarian_option', '葷食'),
+    }
+
+    if not include_menu:
+        store["menu_url"] = f"/api/restaurants/{rest_num}/menu"
+        return store
+
+    store["menu"] = [
+        {
+            "item_id": item.item_id,
+            "name": item.name,
+            "price": f"${int(item.price)}",
+            "calories": getattr(item, 'calories', 0),
+            "protein": getattr(item, 'protein', 0),
+            "carbs": getattr(item, 'carbs', 0),
+            "fat": getattr(item, 'fat', 0)
+        }
+        for item in restaurant.menu_items  # 取所有菜單項目
+    ]
+    return store
+
+
+def _dumps(value: Any) -> bytes:
+    """以應用程式的 JSON provider 編碼（與 jsonify 輸出一致）"""
+    return dumps_bytes(current_app.json, value)
+
+
+def store_fragments(restaurants: List[Restaurant], include_menu: bool = True) -> List[bytes]:
+    """
+    取得多間餐廳預先編碼的 JSON 物件片段（已快取）
+
+    版本以一次批次讀取取得；未命中、版本已變或 TTL 週期已過的餐廳才重新序列化
+    """
+    epoch = RestaurantService.catalog_epoch()
+    if epoch is None:
+        return [_dumps(restaurant_to_store(r, include_menu)) for r in restaurants]
+
+    versions = RestaurantService.restaurant_versions([r.restaurant_id for r in restaurants])
+    fragments = []
+    for restaurant in restaurants:
+        key = (restaurant.restaurant_id, include_menu, versions[restaurant.restaurant_id], epoch)
+        with _lock:
+            fragment = _fragments.get(key)
+            if fragment is not None:
+                _fragments.move_to_end(key)
+        if fragment is None:
+            fragment = _dumps(restaurant_to_store(restaurant, include_menu))
+            with _lock:
+                _fragments[key] = fragment
+                while len(_fragments) > FRAGMENT_CACHE_SIZE:
+                    _fragments.popitem(last=False)
+        fragments.append(fragment)
+    return fragments
+
+
+def with_favorite(fragment: bytes, is_favorited: bool) -> bytes:
+    """在片段（JSON 物件）結尾合併 is_favorited 欄位"""
+    return fragment[:-1] + (b',"is_favorited":true}' if is_favorited else b',"is_favorited":false}')
+
+
+def store_list_response(
+    restaurants: List[Restaurant],
+    favorite_ids: Iterable[int] = frozenset(),
+    include_menu: bool = True,
+    **extra: Any
+) -> Response:
+    """
+    組合餐廳列表回應：{"success": true, "data": [...], **extra}
+
+    data 由快取的片段直接串接，不重新編碼整個巢狀結構
+    """
+    favorite_ids = frozenset(favorite_ids)
+    data = b','.join(
+        with_favorite(fragment, restaurant.restaurant_id in favorite_ids)
+        for restaurant, fragment in zip(restaurants, store_fragments(restaurants, include_menu))
+    )
+    head = _dumps(dict(extra, success=True))
+    # head 為非空的 JSON 物件，去掉結尾的 } 後接上 data
+    body = head[:-1] + b',"data":[' + data + b']}'
+    return Response(body, mimetype=current_app.json.mimetype)
+
@@ -1,6 +1,7 @@
 from flask import request, jsonify, session
 from . import user_bp
 from services.user_service import UserService
+from utils.debug import DEBUG_PRINT, ERROR_PRINT
 
 user_service = UserService()
 
@@ -40,10 +41,8 @@ def register():
 
 @user_bp.route('/login', methods=['POST'])
 def login():
-    print("DEBUG: Login request received")
     try:
         data = request.get_json()
-        print(f"DEBUG: Login data: {data}")
         if not data:
             return jsonify({'error': 'No input data provided'}), 400
             
@@ -55,17 +54,15 @@ def login():
             
         user = user_service.verify_user(username, password)
         if user:
-            print(f"DEBUG: Login successful for {username}")
+            DEBUG_PRINT(f"[DEBUG] 登入成功: user_id={user['userID']}")
             session['user_id'] = user['userID']
             session['username'] = user['username']
             return jsonify({'message': 'Login successful', 'user': user}), 200
         else:
-            print(f"DEBUG: Login failed for {username}")
+            DEBUG_PRINT("[DEBUG] 登入失敗：帳號或密碼錯誤")
             return jsonify({'error': 'Invalid username or password'}), 401
     except Exception as e:
-        print(f"DEBUG: Login exception: {e}")
-        import traceback
-        traceback.print_exc()
+        ERROR_PRINT(f"[ERROR] 登入時發生錯誤: {e}", exc_info=True)
         return jsonify({'error': 'Internal server error'}), 500
 
 @user_bp.route('/logout', methods=['POST', 'GET'])
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+HTTP 端對端效能測試腳本
+以 create_app() 建立應用程式（或連線到已啟動的伺服器），依情境對 API 發送請求，
+統計每個情境的 p50 / p95 / p99 延遲、吞吐量與每個請求的查詢數，結果寫入 JSON 供不同版本比較
+
+建議先以 dataset/app.py 產生壓測資料並用 ingest_catalog.py 匯入，
+壓測使用者的密碼為 dataset/app.py 的 DEFAULT_PASSWORD
+
+使用方法：
+    python3 src/scripts/benchmark_http.py [--requests N] [--concurrency N] [--scenarios a,b]
+                                          [--base-url http://127.0.0.1:5000] [--output FILE]
+                                          [--baseline 上次的結果.json]
+
+查詢數優先使用回應的 X-DB-Query-Count 標頭（應用程式以 DEBUG_MODE=1 啟動時提供）；
+沒有標頭時以 MariaDB 的 GLOBAL STATUS 'Questions' 前後差值計算，
+測試期間請避免其他連線使用同一個資料庫；兩者都無法取得時不統計
+"""
+
+import argparse
+import json
+import math
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# 將專案根目錄加入 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from app import create_app
+from services.db import DatabaseError, driver_available, fetch_one
+
+DEFAULT_OUTPUT = "benchmark-results.json"
+DEFAULT_PASSWORD = "loadtest"
+
+STORE_KEYWORDS = ["拉麵", "雞", "沙拉", "咖啡", "滷肉飯"]
+STORE_CATEGORIES = ["台式", "日式", "義式", "健康餐", "飲品", "韓式"]
+
+
+class InProcessClient:
+    """以 Flask test client 直接呼叫應用程式（每個執行緒各自一個 client）"""
+
+    def __init__(self, app):
+        self._app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body=None):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self._app.test_client()
+        response = client.open(path, method=method, json=body)
+        return response.status_code, response.get_data(), response.headers
+
+
+class HttpClient:
+    """對已啟動的伺服器發送 HTTP 請求"""
+
+    def __init__(self, base_url):
+        self._base_url = base_url.rstrip("/")
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        req = urllib.request.Request(self._base_url + path, data=data, method=method)
+        if data is not None:
+            req.add_header("Content-Type", "application/json")
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                return response.status, response.read(), response.headers
+        except urllib.error.HTTPError as e:
+            return e.code, e.read(), e.headers
+
+
+class Context:
+    """情境共用的資料範圍與計時紀錄"""
+
+    def __init__(self, client, max_restaurant_id, max_user_id, max_item_id):
+        self.client = client
+        self.max_restaurant_id = max_restaurant_id
+        self.max_user_id = max_user_id
+        self.max_item_id = max_item_id
+        self._lock = threading.Lock()
+        self.samples = []
+
+    def call(self, name, method, path, body=None):
+        """發送請求並記錄 (名稱, 耗時秒, 是否成功, 查詢數標頭)"""
+        started = time.perf_counter()
+        try:
+            status, data, headers = self.client.request(method, path, body)
+        except OSError:
+            status, data, headers = 0, b"", {}
+        elapsed = time.perf_counter() - started
+        query_count = headers.get("X-DB-Query-Count")
+        with self._lock:
+            self.samples.append((name, elapsed, 200 <= status < 400,
+                                 int(query_count) if query_count is not None else None))
+        return status, data
+
+
+def _json(data):
+    try:
+        return json.loads(data)
+    except ValueError:
+        return {}
+
+
+# ==========================================
+# 情境：每個函式代表一次使用者操作（可包含多個請求）
+# ==========================================
+
+def _stores_all(ctx, rng):
+    ctx.call("stores_all", "GET", "/api/stores")
+
+
+def _stores_summary(ctx, rng):
+    ctx.call("stores_summary", "GET", "/api/stores?view=summary&limit=20")
+
+
+def _stores_keyword(ctx, rng):
+    keyword = urllib.request.quote(rng.choice(STORE_KEYWORDS))
+    ctx.call("stores_keyword", "GET", f"/api/stores?keyword={keyword}&view=summary")
+
+
+def _stores_filters(ctx, rng):
+    categories = urllib.request.quote(",".join(rng.sample(STORE_CATEGORIES, 2)))
+    price = rng.choice(["1", "2", "3"])
+    vegetarian = rng.choice(["true", "false"])
+    ctx.call("stores_filters", "GET",
+             f"/api/stores?categories={categories}&price={price}&vegetarian={vegetarian}&view=summary")
+
+
+def _stores_combined(ctx, rng):
+    keyword = urllib.request.quote(rng.choice(STORE_KEYWORDS))
+    categories = urllib.request.quote(rng.choice(STORE_CATEGORIES))
+    user_id = rng.randint(1, ctx.max_user_id)
+    ctx.call("stores_combined", "GET",
+             f"/api/stores?keyword={keyword}&categories={categories}&user_id={user_id}&view=summary&limit=20")
+
+
+def _store_detail(ctx, rng):
+    ctx.call("store_detail", "GET", f"/api/stores/{rng.randint(1, ctx.max_restaurant_id)}")
+
+
+def _diet_today(ctx, rng):
+    ctx.call("diet_today", "GET", f"/api/diet?user_id={rng.randint(1, ctx.max_user_id)}&today=true&tz=Asia/Taipei")
+
+
+def _diet_range(ctx, rng):
+    end = date.today()
+    start = end - timedelta(days=6)
+    ctx.call("diet_range", "GET",
+             f"/api/diet?user_id={rng.randint(1, ctx.max_user_id)}&start={start}&end={end}&tz=Asia/Taipei")
+
+
+def _diet_write(ctx, rng):
+    """新增後立即刪除，避免壓測改變資料量"""
+    user_id = rng.randint(1, ctx.max_user_id)
+    status, data = ctx.call("diet_post", "POST", "/api/diet", {
+        "user_id": user_id,
+        "item_id": rng.randint(1, ctx.max_item_id),
+        "date": date.today().isoformat(),
+        "meal": rng.choice(["breakfast", "lunch", "dinner"]),
+    })
+    log_id = (_json(data).get("data") or {}).get("log_id") if status == 201 else None
+    if log_id:
+        ctx.call("diet_delete", "DELETE", "/api/diet", {"user_id": user_id, "log_id": log_id})
+
+
+def _favorites(ctx, rng):
+    ctx.call("favorites_get", "GET", f"/api/favorites?user_id={rng.randint(1, ctx.max_user_id)}")
+
+
+def _favorites_toggle(ctx, rng):
+    body = {"user_id": rng.randint(1, ctx.max_user_id), "restaurant_id": rng.randint(1, ctx.max_restaurant_id)}
+    ctx.call("favorites_post", "POST", "/api/favorites", body)
+    ctx.call("favorites_delete", "DELETE", "/api/favorites", body)
+
+
+def _login(ctx, rng):
+    ctx.call("login", "POST", "/auth/login", {
+        "username": f"user{rng.randint(1, ctx.max_user_id):07d}",
+        "password": DEFAULT_PASSWORD,
+    })
+
+
+SCENARIOS = {
+    "stores_all": _stores_all,
+    "stores_summary": _stores_summary,
+    "stores_keyword": _stores_keyword,
+    "stores_filters": _stores_filters,
+    "stores_combined": _stores_combined,
+    "store_detail": _store_detail,
+    "diet_today": _diet_today,
+    "diet_range": _diet_range,
+    "diet_write": _diet_write,
+    "favorites": _favorites,
+    "favorites_toggle": _favorites_toggle,
+    "login": _login,
+}
+
+
+# ==========================================
+# 執行與統計
+# ==========================================
+
+def _questions():
+    """MariaDB 累計的查詢數；無法取得時返回 None"""
+    if not driver_available():
+        return None
+    try:
+        row = fetch_one("SHOW GLOBAL STATUS LIKE 'Questions'")
+    except DatabaseError:
+        return None
+    return int(row["Value"]) if row else None
+
+
+def _max_id(query, fallback):
+    if not driver_available():
+        return fallback
+    try:
+        row = fetch_one(query)
+    except DatabaseError:
+        return fallback
+    return (row or {}).get("max_id") or fallback
+
+
+def _percentile(ordered, p):
+    """nearest-rank 百分位數"""
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))]
+
+
+def _summarize(samples, seconds, queries):
+    """
+    依請求名稱統計
+
+    每個請求都有查詢數標頭時使用標頭；否則以 queries（整個情境的查詢數）平均分攤到所有請求
+    """
+    by_name = {}
+    for name, elapsed, ok, query_count in samples:
+        by_name.setdefault(name, []).append((elapsed, ok, query_count))
+
+    results = {}
+    for name, values in by_name.items():
+        latencies = sorted(elapsed * 1000 for elapsed, _, _ in values)
+        counts = [query_count for _, _, query_count in values]
+        if all(c is not None for c in counts):
+            queries_per_request = round(statistics.mean(counts), 2)
+        else:
+            queries_per_request = round(queries / len(samples), 2) if queries is not None else None
+        results[name] = {
+            "requests": len(values),
+            "errors": sum(1 for _, ok, _ in values if not ok),
+            "throughput_rps": round(len(values) / seconds, 2) if seconds > 0 else None,
+            "mean_ms": round(statistics.mean(latencies), 3),
+            "p50_ms": round(_percentile(latencies, 50), 3),
+            "p95_ms": round(_percentile(latencies, 95), 3),
+            "p99_ms": round(_percentile(latencies, 99), 3),
+            "max_ms": round(latencies[-1], 3),
+            "queries_per_request": queries_per_request,
+        }
+    return results
+
+
+def run_scenario(ctx, scenario, requests, concurrency, seed):
+    """以 concurrency 個執行緒執行 requests 次操作，返回各請求的統計"""
+    ctx.samples = []
+    rngs = [random.Random(f"{seed}:{i}") for i in range(requests)]
+
+    before = _questions()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda rng: scenario(ctx, rng), rngs))
+    seconds = time.perf_counter() - started
+    after = _questions()
+
+    queries = None
+    if before is not None and after is not None:
+        # 扣除 SHOW STATUS 本身
+        queries = max(0, after - before - 1)
+    return _summarize(ctx.samples, seconds, queries)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _print_results(results, baseline):
+    print(f"{'請求':<18} {'次數':>6} {'錯誤':>5} {'req/s':>9} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9} {'查詢/次':>8}")
+    for name, r in results.items():
+        qpr = "-" if r["queries_per_request"] is None else f"{r['queries_per_request']:.1f}"
+        line = (f"{name:<18} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps'] or 0:>9.1f} "
+                f"{r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {qpr:>8}")
+        previous = baseline.get(name)
+        if previous and previous.get("p95_ms"):
+            change = (r["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+            line += f"  p95 {change:+.1f}%"
+        print(line)
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description="API 端對端效能測試")
+    parser.add_argument("--requests", type=int, default=200, help="每個情境的操作次數")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20, help="每個情境正式計時前的暖機次數")
+    parser.add_argument("--scenarios", default="", help=f"逗號分隔，預設全部：{','.join(SCENARIOS)}")
+    parser.add_argument("--base-url", default="", help="連線到已啟動的伺服器（預設在本程序內執行 create_app()）")
+    parser.add_argument("--max-restaurant-id", type=int, default=0, help="預設查詢資料庫")
+    parser.add_argument("--max-user-id", type=int, default=0, help="預設查詢資料庫")
+    parser.add_argument("--max-item-id", type=int, default=0, help="預設查詢資料庫")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default="", help="上次的結果檔，列出 p95 變化")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()] or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        print(f"[ERROR] 未知的情境: {', '.join(unknown)}")
+        sys.exit(1)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            for scenario in json.load(f).get("scenarios", {}).values():
+                baseline.update(scenario)
+
+    app = create_app()
+    with app.app_context():
+        client = HttpClient(args.base_url) if args.base_url else InProcessClient(app)
+        ctx = Context(
+            client,
+            args.max_restaurant_id or _max_id("SELECT MAX(restaurantID) AS max_id FROM restaurants", 30),
+            args.max_user_id or _max_id("SELECT MAX(userID) AS max_id FROM users", 3),
+            args.max_item_id or _max_id("SELECT MAX(itemID) AS max_id FROM menu_items", 80),
+        )
+        concurrency = max(1, args.concurrency)
+
+        report = {
+            "commit": _git_commit(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "config": {
+                "requests": args.requests,
+                "concurrency": concurrency,
+                "base_url": args.base_url or None,
+                "max_restaurant_id": ctx.max_restaurant_id,
+                "max_user_id": ctx.max_user_id,
+                "max_item_id": ctx.max_item_id,
+                "seed": args.seed,
+            },
+            "scenarios": {},
+        }
+
+        for name in names:
+            scenario = SCENARIOS[name]
+            if args.warmup > 0:
+                run_scenario(ctx, scenario, args.warmup, concurrency, f"warmup:{args.seed}")
+            print(f"\n[{name}]")
+            results = run_scenario(ctx, scenario, max(1, args.requests), concurrency, args.seed)
+            report["scenarios"][name] = results
+            _print_results(results, baseline)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n[OK] 結果已寫入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+JSON 編碼效能比較腳本
+以 /api/stores（含菜單）與 /api/diet 的回應結構產生測試資料，
+比較 stdlib 與 orjson provider 的編碼時間與輸出大小（不需連線資料庫）
+
+使用方法：
+    python3 src/scripts/benchmark_json.py [--stores N] [--menu-items N] [--logs N] [--rounds N]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+# 將專案根目錄加入 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from app import create_app
+from modules.frontend.serializers import restaurant_to_store
+from services.restaurant_service import MenuItem, Restaurant
+from utils.json_provider import JSON_PROVIDER_ORJSON, JSON_PROVIDER_STDLIB, get_provider_class, orjson
+
+
+def _stores_payload(stores: int, menu_items: int):
+    """/api/stores 的回應結構（含菜單）"""
+    data = []
+    for rid in range(1, stores + 1):
+        restaurant = Restaurant(
+            restaurant_id=rid,
+            name=f"測試餐廳 {rid}",
+            address=f"台中市西屯區文華路 {rid} 號",
+            average_rating=3.0 + (rid % 20) / 10,
+            price_range=rid % 3 + 1,
+            food_type="中式",
+            menu_items=[
+                MenuItem(
+                    item_id=rid * 100 + i, restaurant_id=rid, name=f"招牌餐點 {i}",
+                    price=80 + i * 5, calories=450 + i, protein=20.5, carbs=60.0, fat=12.3
+                )
+                for i in range(menu_items)
+            ],
+        )
+        store = restaurant_to_store(restaurant)
+        store["is_favorited"] = rid % 7 == 0
+        data.append(store)
+    return {"success": True, "data": data, "next_cursor": None}
+
+
+def _diet_payload(logs: int):
+    """/api/diet 的回應結構，含 MariaDB 返回的 datetime 與 Decimal"""
+    started = datetime(2025, 1, 1, 7, 30)
+    data = [
+        {
+            "id": i,
+            "item_id": i % 500,
+            "name": f"餐點 {i}",
+            "restaurant": f"測試餐廳 {i % 50}",
+            "cals": 520,
+            "protein": Decimal("25.50"),
+            "carbs": Decimal("61.20"),
+            "fat": Decimal("14.00"),
+            "portion_size": 1.0,
+            "timestamp": started + timedelta(hours=5 * i),
+            "meal": "lunch",
+        }
+        for i in range(logs)
+    ]
+    summary = {"calories": 1560.0, "protein": Decimal("76.5"), "carbs": 183.6, "fat": 42.0}
+    return {"success": True, "data": data, "summary": summary, "next_cursor": None}
+
+
+def _measure(provider, payload, rounds: int):
+    """返回 (每次編碼耗時 ms 列表, 輸出位元組數)"""
+    timings = []
+    body = b""
+    for _ in range(rounds):
+        started = time.perf_counter()
+        body = provider.dumps_bytes(payload)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings, len(body)
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description="比較 JSON provider 編碼效能")
+    parser.add_argument("--stores", type=int, default=200)
+    parser.add_argument("--menu-items", type=int, default=15)
+    parser.add_argument("--logs", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    app = create_app()
+    providers = [JSON_PROVIDER_STDLIB]
+    if orjson is not None:
+        providers.append(JSON_PROVIDER_ORJSON)
+    else:
+        print("[WARN] 未安裝 orjson，只量測 stdlib")
+
+    payloads = {
+        "/api/stores": _stores_payload(args.stores, args.menu_items),
+        "/api/diet": _diet_payload(args.logs),
+    }
+
+    print(f"{'payload':<12} {'provider':<8} {'平均(ms)':>9} {'p95(ms)':>9} {'bytes':>9}")
+    for label, payload in payloads.items():
+        baseline = None
+        for name in providers:
+            provider = get_provider_class(name)(app)
+            timings, size = _measure(provider, payload, args.rounds)
+            mean = statistics.mean(timings)
+            p95 = sorted(timings)[min(len(timings) - 1, int(len(timings) * 0.95))]
+            speedup = f"  x{baseline / mean:.1f}" if baseline else ""
+            baseline = baseline or mean
+            print(f"{label:<12} {name:<8} {mean:>9.3f} {p95:>9.3f} {size:>9}{speedup}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+關鍵字搜尋效能比較腳本
+比較 LIKE '%kw%' 與 FULLTEXT 兩種搜尋模式的查詢時間與結果數
+
+使用方法：
+    python3 src/scripts/benchmark_search.py [關鍵字 ...] [--rounds N]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# 將專案根目錄加入 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from app import create_app
+from services.db import driver_available
+from services.restaurant_service import RestaurantService, SEARCH_MODE_FULLTEXT, SEARCH_MODE_LIKE
+
+DEFAULT_KEYWORDS = ["滷肉飯", "拉麵", "雞", "沙拉", "pizza", "咖啡"]
+
+
+def _measure(keyword: str, mode: str, rounds: int):
+    """執行多次搜尋，返回 (耗時列表 ms, 結果 ID 集合)"""
+    timings = []
+    ids = set()
+    for _ in range(rounds):
+        started = time.perf_counter()
+        results = RestaurantService.search_restaurants(keyword=keyword, search_mode=mode)
+        timings.append((time.perf_counter() - started) * 1000)
+        ids = {r.restaurant_id for r in results}
+    return timings, ids
+
+
+def _p95(values):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description="比較 LIKE 與 FULLTEXT 搜尋效能")
+    parser.add_argument("keywords", nargs="*", default=DEFAULT_KEYWORDS)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    if not driver_available():
+        print("[ERROR] 尚未安裝 mariadb Python 驅動")
+        sys.exit(1)
+
+    app = create_app()
+    with app.app_context():
+        print(f"{'關鍵字':<10} {'模式':<9} {'平均(ms)':>9} {'p95(ms)':>9} {'結果數':>6}")
+        for keyword in args.keywords:
+            like_times, like_ids = _measure(keyword, SEARCH_MODE_LIKE, args.rounds)
+            ft_times, ft_ids = _measure(keyword, SEARCH_MODE_FULLTEXT, args.rounds)
+
+            for mode, timings, ids in (("like", like_times, like_ids), ("fulltext", ft_times, ft_ids)):
+                print(f"{keyword:<10} {mode:<9} {statistics.mean(timings):>9.2f} {_p95(timings):>9.2f} {len(ids):>6}")
+
+            speedup = statistics.mean(like_times) / max(statistics.mean(ft_times), 1e-9)
+            missing = like_ids - ft_ids
+            print(f"{'':<10} 加速 {speedup:.1f}x" + (f"，全文檢索少了 {len(missing)} 筆" if missing else ""))
+
+
+if __name__ == "__main__":
+    main()
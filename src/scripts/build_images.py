@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+圖片建置腳本
+為 src/static/images 中的餐廳與菜色圖片產生縮圖、卡片尺寸與 WebP 版本，
+並寫入 static/images/_variants/manifest.json（需安裝 Pillow）
+
+使用方法：
+    python3 src/scripts/build_images.py
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# 將專案根目錄加入 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from utils.images import IMAGE_FORMATS, IMAGE_VARIANTS, build_all, pillow_available
+
+STATIC_FOLDER = project_root / "src" / "static"
+
+
+def main():
+    """主函數"""
+    if not pillow_available():
+        print("[ERROR] 尚未安裝 Pillow（pip install Pillow），無法產生縮圖")
+        sys.exit(1)
+
+    manifest = build_all(str(STATIC_FOLDER))
+
+    original_bytes = sum(os.path.getsize(STATIC_FOLDER / relative) for relative in manifest)
+    print(f"[OK] 已處理 {len(manifest)} 張圖片（原圖共 {original_bytes} bytes）")
+    for size in IMAGE_VARIANTS:
+        for fmt in IMAGE_FORMATS:
+            total = sum(
+                os.path.getsize(STATIC_FOLDER / entry[size][fmt]["path"])
+                for entry in manifest.values()
+                if fmt in entry.get(size, {})
+            )
+            print(f"    {size:<6} {fmt:<5} {total:>9} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+模組清單產生腳本
+掃描 src/modules 並確認每個模組都能匯入且有對應的 Blueprint，寫入 modules/manifest.json。
+STARTUP_MODE=lazy 時應用程式依此清單載入模組，不在啟動時掃描資料夾；
+新增或移除模組後需重新執行（deploy.sh 會自動執行）
+
+使用方法：
+    python3 src/scripts/build_module_manifest.py [--output PATH]
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# 將專案根目錄加入 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from app import DEFAULT_MODULE_MANIFEST, discover_modules
+from utils.debug import INFO_PRINT, ERROR_PRINT
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description="產生 STARTUP_MODE=lazy 使用的模組清單")
+    parser.add_argument("--output", default=DEFAULT_MODULE_MANIFEST, help="輸出路徑（預設 src/modules/manifest.json）")
+    args = parser.parse_args()
+
+    entries = []
+    failed = False
+    for module_name, blueprint_name in sorted(discover_modules()):
+        started = time.perf_counter()
+        try:
+            module = importlib.import_module(f"modules.{module_name}")
+        except Exception as e:
+            ERROR_PRINT(f"[ERROR] 無法匯入模組 {module_name}: {e}")
+            failed = True
+            continue
+        elapsed = time.perf_counter() - started
+        if not hasattr(module, blueprint_name):
+            # 與啟動時相同，沒有 Blueprint 的資料夾不列入清單
+            ERROR_PRINT(f"[WARN] 模組 {module_name} 未找到 Blueprint ({blueprint_name})，略過")
+            continue
+        entries.append({"name": module_name, "blueprint": blueprint_name})
+        INFO_PRINT(f"[OK] {module_name}（import {elapsed * 1000:.1f}ms）")
+
+    if failed:
+        ERROR_PRINT("[ERROR] 有模組無法匯入，未寫入模組清單")
+        sys.exit(1)
+
+    tmp_path = f"{args.output}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"modules": entries}, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, args.output)
+    INFO_PRINT(f"[OK] 已寫入 {len(entries)} 個模組到 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
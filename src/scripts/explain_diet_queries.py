@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+飲食記錄查詢索引檢查腳本
+對 DietService 的日期範圍查詢執行 EXPLAIN，確認 diet_logs 使用
+idx_diet_user_time (userID, timestamp) 做範圍掃描；任一查詢未使用索引時以非 0 結束，
+可放在部署前檢查或 CI 中作為回歸檢查
+
+使用方法：
+    python3 src/scripts/explain_diet_queries.py [--user-id N]
+
+注意：資料量極少時優化器可能選擇全表掃描，請在有一定資料量的資料庫上執行
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 將專案根目錄加入 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from app import create_app
+from services.db import fetch_all, driver_available
+from services.diet_service import LOGS_IN_RANGE_QUERY, RANGE_BUCKETS_QUERY, day_range
+from utils.debug import INFO_PRINT, ERROR_PRINT
+
+EXPECTED_INDEX = "idx_diet_user_time"
+
+
+def _diet_queries(user_id: int):
+    """返回 [(名稱, SQL, 參數)]，SQL 與 DietService 實際使用的相同"""
+    today_start, today_end = day_range()
+    date_start, date_end = day_range("2024-01-01")
+    return [
+        ("get_today_diet_logs", LOGS_IN_RANGE_QUERY, (user_id, today_start, today_end)),
+        ("get_date_diet_logs", LOGS_IN_RANGE_QUERY, (user_id, date_start, date_end)),
+        ("get_diet_range (buckets)", RANGE_BUCKETS_QUERY, (user_id, date_start, today_end)),
+    ]
+
+
+def _check(name: str, query: str, params: tuple) -> bool:
+    plan = fetch_all("EXPLAIN " + query, params)
+    diet_rows = [row for row in plan if row.get("table") == "d"]
+    if not diet_rows:
+        ERROR_PRINT(f"[ERROR] {name}: EXPLAIN 結果中找不到 diet_logs")
+        return False
+
+    row = diet_rows[0]
+    # 必須是以複合索引做範圍掃描（只用到 userID 時 type 會是 ref）
+    ok = row.get("key") == EXPECTED_INDEX and row.get("type") == "range"
+    status = "[OK]" if ok else "[FAIL]"
+    message = f"{status} {name}: type={row.get('type')} key={row.get('key')} key_len={row.get('key_len')} rows={row.get('rows')}"
+    if ok:
+        INFO_PRINT(message)
+    else:
+        ERROR_PRINT(message)
+    return ok
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description="檢查飲食記錄查詢是否使用索引")
+    parser.add_argument("--user-id", type=int, default=1)
+    args = parser.parse_args()
+
+    if not driver_available():
+        ERROR_PRINT("[ERROR] 尚未安裝 mariadb Python 驅動")
+        sys.exit(1)
+
+    app = create_app()
+    with app.app_context():
+        results = [_check(name, query, params) for name, query, params in _diet_queries(args.user_id)]
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
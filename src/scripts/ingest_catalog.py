@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+目錄資料批次匯入腳本
+將 restaurants.csv / menu_items.csv 串流匯入 MariaDB（executemany 分批 upsert），
+完成後重建全文檢索索引並清除目錄快取
+
+使用方法：
+    python3 src/scripts/ingest_catalog.py [--restaurants PATH] [--menu-items PATH] [--batch-size N]
+
+    只匯入其中一個檔案時，另一個參數給空字串，例如 --restaurants ""
+    壓測資料集（dataset/app.py --restaurants N --users M）另外以 --users / --diet-logs / --reviews 指定
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 將專案根目錄加入 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from app import create_app
+from services.db import driver_available
+from services.diet_service import DietService
+from services.ingest_service import (
+    DEFAULT_BATCH_SIZE, ingest_diet_logs, ingest_menu_items, ingest_restaurants, ingest_reviews, ingest_users,
+)
+from services.restaurant_service import RestaurantService
+from services.search_index import rebuild_search_index
+from utils.debug import INFO_PRINT, ERROR_PRINT
+
+DATASET_DIR = project_root / "dataset"
+
+# 受影響的餐廳超過此數量時改為全部重建索引（避免 IN (...) 清單過長）
+FULL_REINDEX_THRESHOLD = 5000
+
+
+def _progress(result):
+    INFO_PRINT(f"    {result.table}: {result.rows} 筆（{result.rows_per_second:,.0f} 筆/秒）")
+
+
+def _report(result):
+    summary = (
+        f"{result.table}: {result.rows} 筆 / {result.batches} 批，"
+        f"{result.seconds:.2f} 秒（{result.rows_per_second:,.0f} 筆/秒）"
+    )
+    if result.failed_batches:
+        ERROR_PRINT(f"[ERROR] {summary}，{result.failed_batches} 批失敗（未寫入）")
+    else:
+        INFO_PRINT(f"[OK] {summary}")
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description="批次匯入餐廳與菜單 CSV")
+    parser.add_argument("--restaurants", default=str(DATASET_DIR / "restaurants.csv"))
+    parser.add_argument("--menu-items", default=str(DATASET_DIR / "menu_items.csv"))
+    parser.add_argument("--users", default="", help="使用者 CSV（預設不匯入）")
+    parser.add_argument("--diet-logs", default="", help="飲食紀錄 CSV（預設不匯入；匯入後自動重建 daily_nutrition）")
+    parser.add_argument("--reviews", default="", help="評論 CSV（預設不匯入）")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--restaurant-id-offset", type=int, default=0,
+                        help="CSV 沒有 restaurantID 欄位時，ID = offset + 列號")
+    parser.add_argument("--item-id-offset", type=int, default=0,
+                        help="CSV 沒有 itemID 欄位時，ID = offset + 列號")
+    parser.add_argument("--skip-search-index", action="store_true", help="不重建全文檢索索引")
+    parser.add_argument("--rebuild-nutrition", action="store_true",
+                        help="重建 daily_nutrition（更新既有菜色的營養值時使用）")
+    args = parser.parse_args()
+
+    if not driver_available():
+        ERROR_PRINT("[ERROR] 尚未安裝 mariadb Python 驅動")
+        ERROR_PRINT("請執行: pip install mariadb")
+        sys.exit(1)
+
+    app = create_app()
+    with app.app_context():
+        touched = set()
+        failed = False
+        steps = [
+            (args.restaurants, ingest_restaurants, args.restaurant_id_offset),
+            (args.menu_items, ingest_menu_items, args.item_id_offset),
+            (args.users, ingest_users, 0),
+            (args.diet_logs, ingest_diet_logs, 0),
+            (args.reviews, ingest_reviews, 0),
+        ]
+        try:
+            # 依外鍵順序匯入
+            for path, ingest, id_offset in steps:
+                if not path:
+                    continue
+                result = ingest(path, args.batch_size, id_offset, _progress)
+                _report(result)
+                touched |= result.restaurant_ids
+                failed |= result.failed_batches > 0
+        except (OSError, ValueError) as e:
+            ERROR_PRINT(f"[ERROR] {e}")
+            sys.exit(1)
+
+        if failed:
+            # 失敗的批次整批 rollback；以下只針對已寫入的資料，修正後重新匯入即可（upsert 可重複執行）
+            ERROR_PRINT("[ERROR] 部分批次匯入失敗：仍會為已寫入的資料重建索引與彙總並清除快取，"
+                        "失敗的列請修正後重新匯入")
+
+        if touched and not args.skip_search_index:
+            ids = None if len(touched) > FULL_REINDEX_THRESHOLD else sorted(touched)
+            count = rebuild_search_index(ids)
+            INFO_PRINT(f"[OK] 已重建 {count} 間餐廳的全文檢索索引")
+
+        if args.rebuild_nutrition or args.diet_logs:
+            count = DietService.rebuild_daily_nutrition()
+            INFO_PRINT(f"[OK] 已重建 {count} 筆每日營養彙總")
+
+        RestaurantService.invalidate_cache()
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+餐廳列表回應大小量測腳本
+比較 /api/stores 完整模式（含菜單）與摘要模式（view=summary）的 JSON 大小與 SQL 查詢數
+
+使用方法：
+    python3 src/scripts/measure_store_payload.py [--keyword 關鍵字] [--limit N]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 將專案根目錄加入 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from app import create_app
+from services import restaurant_service as restaurant_module
+from services.db import driver_available
+from services.restaurant_service import RestaurantService
+
+
+def _measure(client, params):
+    """呼叫 /api/stores，返回 (JSON 位元組數, SQL 查詢數, 餐廳數)"""
+    original = restaurant_module.fetch_all
+    calls = []
+
+    def counting_fetch_all(query, params=None):
+        calls.append(query)
+        return original(query, params)
+
+    restaurant_module.fetch_all = counting_fetch_all
+    try:
+        response = client.get("/api/stores", query_string=params)
+    finally:
+        restaurant_module.fetch_all = original
+
+    body = response.get_data()
+    return len(body), len(calls), len(response.get_json().get("data", []))
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description="量測餐廳列表摘要模式節省的回應大小與查詢數")
+    parser.add_argument("--keyword", default="")
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    if not driver_available():
+        print("[ERROR] 尚未安裝 mariadb Python 驅動")
+        sys.exit(1)
+
+    app = create_app()
+    # 停用目錄快取，量測的是實際查詢
+    RestaurantService.configure_cache(ttl=0)
+
+    params = {}
+    if args.keyword:
+        params["keyword"] = args.keyword
+    if args.limit:
+        params["limit"] = args.limit
+
+    client = app.test_client()
+    full_bytes, full_queries, count = _measure(client, params)
+    summary_bytes, summary_queries, _ = _measure(client, dict(params, view="summary"))
+
+    saved = full_bytes - summary_bytes
+    ratio = saved / full_bytes * 100 if full_bytes else 0.0
+    print(f"餐廳數: {count}")
+    print(f"{'模式':<8} {'JSON 位元組':>12} {'SQL 查詢數':>10}")
+    print(f"{'full':<8} {full_bytes:>12} {full_queries:>10}")
+    print(f"{'summary':<8} {summary_bytes:>12} {summary_queries:>10}")
+    print(f"節省 {saved} bytes（{ratio:.1f}%），少 {full_queries - summary_queries} 次查詢")
+
+
+if __name__ == "__main__":
+    main()
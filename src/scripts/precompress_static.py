@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+靜態檔案預先壓縮腳本
+為 src/static 中的 JS / CSS / SVG 等檔案產生 .br 與 .gz 版本，
+應用程式啟動後會直接送出對應的壓縮檔，不需在每次請求時壓縮
+
+使用方法：
+    python3 src/scripts/precompress_static.py [--min-size BYTES]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# 將專案根目錄加入 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from utils.compression import DEFAULT_MIN_SIZE, available_encodings, precompress_static
+from utils.debug import INFO_PRINT
+
+STATIC_FOLDER = project_root / "src" / "static"
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description="產生靜態檔案的預先壓縮版本")
+    parser.add_argument("--min-size", type=int, default=DEFAULT_MIN_SIZE)
+    args = parser.parse_args()
+
+    INFO_PRINT(f"[INFO] 壓縮格式: {', '.join(available_encodings())}")
+    written = precompress_static(str(STATIC_FOLDER), args.min_size)
+    print(f"[OK] 已產生 {written} 個壓縮檔")
+
+
+if __name__ == "__main__":
+    main()
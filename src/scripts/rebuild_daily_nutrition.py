@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+每日營養彙總重建腳本
+由 diet_logs 重新計算 daily_nutrition（回填既有資料或修正誤差）
+
+使用方法：
+    python3 src/scripts/rebuild_daily_nutrition.py [--user-id N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# 將專案根目錄加入 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from app import create_app
+from services.db import driver_available
+from services.diet_service import DietService
+from utils.debug import INFO_PRINT, ERROR_PRINT
+
+
+def main():
+    """主函數"""
+    parser = argparse.ArgumentParser(description="重建 daily_nutrition 彙總資料")
+    parser.add_argument("--user-id", type=int, default=None, help="只重建指定使用者")
+    args = parser.parse_args()
+
+    if not driver_available():
+        ERROR_PRINT("[ERROR] 尚未安裝 mariadb Python 驅動")
+        ERROR_PRINT("請執行: pip install mariadb")
+        sys.exit(1)
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        written = DietService.rebuild_daily_nutrition(args.user_id)
+        elapsed = time.perf_counter() - started
+
+    if written < 0:
+        sys.exit(1)
+    INFO_PRINT(f"[OK] 已寫入 {written} 筆每日營養彙總（{elapsed:.2f} 秒）")
+
+
+if __name__ == "__main__":
+    main()
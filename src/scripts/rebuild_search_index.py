@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+全文檢索索引重建腳本
+依 restaurants / menu_items 內容重新產生 restaurant_search 資料表
+
+使用方法：
+    python3 src/scripts/rebuild_search_index.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# 將專案根目錄加入 Python 路徑
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from app import create_app
+from services.db import driver_available
+from services.search_index import rebuild_search_index
+from utils.debug import INFO_PRINT, ERROR_PRINT
+
+
+def main():
+    """主函數"""
+    if not driver_available():
+        ERROR_PRINT("[ERROR] 尚未安裝 mariadb Python 驅動")
+        ERROR_PRINT("請執行: pip install mariadb")
+        sys.exit(1)
+
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        count = rebuild_search_index()
+        elapsed = time.perf_counter() - started
+
+    INFO_PRINT(f"[OK] 已重建 {count} 間餐廳的全文檢索索引（{elapsed:.2f} 秒）")
+
+
+if __name__ == "__main__":
+    main()
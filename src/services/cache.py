@@ -0,0 +1,507 @@
+"""
+快取服務
+提供可替換的快取後端與以版本號失效的命名空間
+
+後端：
+    - memory: 程序內 LRU + TTL（每個 worker 各自一份）
+    - sqlite: 以 SQLite 檔案作為共用儲存，同一台機器的多個 gunicorn worker 共享
+      （功能上對應 Redis 的 GET/SET/INCR，不需額外安裝服務）
+
+失效方式：
+    每個命名空間與 scope 各有一個版本計數器，實際快取鍵包含版本號。
+    失效時只需遞增計數器（INCR），舊資料不再被讀到並於 TTL 後自然淘汰，
+    所有 worker 都能立即看到新版本。
+    （僅限 sqlite：memory 後端的計數器在各程序內，腳本或其他 worker 呼叫 bump()
+    不會影響執行中的伺服器，只能等 TTL 到期）
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+import sqlite3
+import stat
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from utils.debug import WARN_PRINT
+
+# 快取值外層包一層 tuple，以區分「快取了 None」與「未命中」
+_MISSING = object()
+
+
+class CacheBackend(ABC):
+    """快取後端介面"""
+
+    name = "base"
+    # 是否由多個程序共用（bump() 能讓其他 worker 的項目失效）
+    shared = False
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        """取得快取值，未命中返回 _MISSING"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """寫入快取值；ttl <= 0 表示不寫入"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """刪除快取值"""
+
+    @abstractmethod
+    def get_counters(self, keys: Iterable[str]) -> Dict[str, int]:
+        """讀取版本計數器（不存在視為 0，不受 LRU/TTL 淘汰）"""
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        """遞增版本計數器並返回新值"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """清除所有快取值（版本計數器保留）"""
+
+    @abstractmethod
+    def size(self, prefix: str = "") -> int:
+        """項目數；prefix 只計算鍵值以此開頭的項目"""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """程序內快取：TTL + 容量上限（LRU 淘汰）"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_counters(self, keys: Iterable[str]) -> Dict[str, int]:
+        with self._lock:
+            return {k: self._counters.get(k, 0) for k in keys}
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def size(self, prefix: str = "") -> int:
+        with self._lock:
+            if not prefix:
+                return len(self._entries)
+            return sum(1 for key in self._entries if key.startswith(prefix))
+
+
+# ==================== SQLite 快取值編碼 ====================
+# 快取檔案可能被其他程序讀寫，值以 JSON 儲存（不使用 pickle，讀取時不會執行任意程式碼）。
+# JSON 無法表示的 tuple / frozenset / dataclass 以標記物件保存，dataclass 只還原已註冊的類別。
+
+_TAG = "__cache__"
+_dataclasses: Dict[str, Type[Any]] = {}
+
+
+def register_cache_type(cls: Type[Any]) -> Type[Any]:
+    """註冊可存入共用快取的 dataclass（可作為裝飾器使用）"""
+    _dataclasses[cls.__name__] = cls
+    return cls
+
+
+def _to_json_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [_to_json_value(v) for v in value]
+    if isinstance(value, tuple):
+        return {_TAG: "tuple", "v": [_to_json_value(v) for v in value]}
+    if isinstance(value, (set, frozenset)):
+        return {_TAG: "frozenset", "v": [_to_json_value(v) for v in value]}
+    if isinstance(value, dict):
+        if not all(isinstance(k, str) for k in value):
+            raise TypeError("快取的 dict 鍵值必須是字串")
+        return {k: _to_json_value(v) for k, v in value.items()}
+    if dataclasses.is_dataclass(value) and _dataclasses.get(type(value).__name__) is type(value):
+        return {
+            _TAG: "dataclass",
+            "type": type(value).__name__,
+            "v": {f.name: _to_json_value(getattr(value, f.name)) for f in dataclasses.fields(value)},
+        }
+    raise TypeError(f"無法存入共用快取的型別: {type(value).__name__}")
+
+
+def _from_json_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_from_json_value(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    tag = value.get(_TAG)
+    if tag == "tuple":
+        return tuple(_from_json_value(v) for v in value["v"])
+    if tag == "frozenset":
+        return frozenset(_from_json_value(v) for v in value["v"])
+    if tag == "dataclass":
+        cls = _dataclasses.get(value["type"])
+        if cls is None:
+            raise ValueError(f"未註冊的快取型別: {value['type']}")
+        return cls(**{k: _from_json_value(v) for k, v in value["v"].items()})
+    return {k: _from_json_value(v) for k, v in value.items()}
+
+
+def encode_value(value: Any) -> bytes:
+    """將快取值編碼為 JSON（TypeError：含有無法存入的型別）"""
+    return json.dumps(_to_json_value(value), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_value(payload: bytes) -> Any:
+    """還原 encode_value 的結果（ValueError / KeyError / TypeError：格式錯誤）"""
+    return _from_json_value(json.loads(payload))
+
+
+def _prepare_cache_file(path: str) -> None:
+    """
+    建立（0600）並檢查快取檔案：必須由目前使用者擁有，且群組與其他使用者不可寫入
+
+    Raises:
+        PermissionError: 檔案不安全
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o600)
+    try:
+        info = os.fstat(fd)
+    finally:
+        os.close(fd)
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        raise PermissionError(f"快取檔案 {path} 不屬於目前使用者")
+    if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"快取檔案 {path} 可被群組或其他使用者寫入")
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    以 SQLite 檔案實作的共用快取
+
+    值以 JSON 序列化（見 encode_value）；使用 WAL 模式讓多個程序可同時讀取。
+    檔案路徑必須明確指定，建立時權限為 0600，不屬於目前使用者或可被他人寫入時拒絕使用。
+    每 PRUNE_INTERVAL 次寫入清理一次過期項目，超過容量時刪除最早到期的項目。
+    SQLite 錯誤視為未命中 / 略過寫入並輸出警告，快取不會讓請求失敗。
+    """
+
+    name = "sqlite"
+    shared = True
+    PRUNE_INTERVAL = 200
+    WARN_INTERVAL = 10.0
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 65536):
+        if not path:
+            raise ValueError("sqlite 快取後端需要指定檔案路徑（CACHE_PATH）")
+        _prepare_cache_file(path)
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._writes = 0
+        self._last_warning = float("-inf")
+
+    def _connection(self) -> sqlite3.Connection:
+        """取得連線；fork 後的子程序會重新開啟，避免共用 file handle"""
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries(expires_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_counters ("
+                " key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _warn(self, operation: str, exc: Exception) -> None:
+        """SQLite 錯誤（鎖定逾時、磁碟已滿等）不影響請求，只輸出警告（每 WARN_INTERVAL 秒最多一次）"""
+        now = time.monotonic()
+        if now - self._last_warning >= self.WARN_INTERVAL:
+            self._last_warning = now
+            WARN_PRINT(f"[WARN] 快取 {operation} 失敗，略過快取: {exc}")
+
+    def get(self, key: str) -> Any:
+        try:
+            with self._lock:
+                row = self._connection().execute(
+                    "SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?",
+                    (key, time.time()),
+                ).fetchone()
+        except sqlite3.Error as e:
+            self._warn("讀取", e)
+            return _MISSING
+        if row is None:
+            return _MISSING
+        try:
+            return decode_value(row[0])
+        except (ValueError, KeyError, TypeError) as e:
+            # 格式不符（例如舊版本寫入的資料）視為未命中
+            self._warn("解碼", e)
+            return _MISSING
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        try:
+            payload = encode_value(value)
+        except TypeError as e:
+            self._warn("編碼", e)
+            return
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, payload, time.time() + ttl),
+                )
+                self._writes += 1
+                if self._writes % self.PRUNE_INTERVAL == 0:
+                    self._prune(conn)
+        except sqlite3.Error as e:
+            self._warn("寫入", e)
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+        overflow = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0] - self.max_entries
+        if overflow > 0:
+            conn.execute(
+                "DELETE FROM cache_entries WHERE key IN ("
+                " SELECT key FROM cache_entries ORDER BY expires_at LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += overflow
+
+    def delete(self, key: str) -> None:
+        try:
+            with self._lock:
+                self._connection().execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            self._warn("刪除", e)
+
+    def get_counters(self, keys: Iterable[str]) -> Dict[str, int]:
+        keys = list(keys)
+        result = {k: 0 for k in keys}
+        if not keys:
+            return result
+        placeholders = ",".join(["?" for _ in keys])
+        try:
+            with self._lock:
+                rows = self._connection().execute(
+                    f"SELECT key, value FROM cache_counters WHERE key IN ({placeholders})",
+                    tuple(keys),
+                ).fetchall()
+        except sqlite3.Error as e:
+            self._warn("讀取版本", e)
+            # 無法得知目前版本：返回不會重複的負數版本，快取鍵與 ETag 都不會命中舊資料
+            unknown = -time.time_ns()
+            return {k: unknown for k in keys}
+        result.update(dict(rows))
+        return result
+
+    def incr(self, key: str) -> int:
+        try:
+            with self._lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT INTO cache_counters (key, value) VALUES (?, 1)"
+                    " ON CONFLICT(key) DO UPDATE SET value = value + 1",
+                    (key,),
+                )
+                return conn.execute("SELECT value FROM cache_counters WHERE key = ?", (key,)).fetchone()[0]
+        except sqlite3.Error as e:
+            # 失效未寫入：舊項目最晚在 TTL 後淘汰
+            self._warn("遞增版本", e)
+            return 0
+
+    def clear(self) -> None:
+        try:
+            with self._lock:
+                self._connection().execute("DELETE FROM cache_entries")
+        except sqlite3.Error as e:
+            self._warn("清除", e)
+
+    def size(self, prefix: str = "") -> int:
+        query = "SELECT COUNT(*) FROM cache_entries WHERE expires_at > ?"
+        params: Tuple[Any, ...] = (time.time(),)
+        if prefix:
+            # 以主鍵範圍 [prefix, prefix 最後一字 + 1) 計算，不需掃描整個資料表
+            query += " AND key >= ? AND key < ?"
+            params += (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1))
+        try:
+            with self._lock:
+                return self._connection().execute(query, params).fetchone()[0]
+        except sqlite3.Error as e:
+            self._warn("統計", e)
+            return 0
+
+
+_BACKENDS = {
+    MemoryCacheBackend.name: MemoryCacheBackend,
+    SQLiteCacheBackend.name: SQLiteCacheBackend,
+}
+
+_backend: CacheBackend = MemoryCacheBackend()
+
+
+def configure_backend(name: str = "memory", **options: Any) -> CacheBackend:
+    """
+    設定全域快取後端
+
+    Args:
+        name: 'memory' 或 'sqlite'
+        options: 傳給後端建構子的參數（例如 max_entries、path）
+    """
+    global _backend
+    if name not in _BACKENDS:
+        raise ValueError(f"不支援的快取後端: {name}")
+    _backend = _BACKENDS[name](**options)
+    return _backend
+
+
+def get_backend() -> CacheBackend:
+    """取得目前的全域快取後端"""
+    return _backend
+
+
+# 所有建立過的 VersionedCache（供 cache_stats() 彙整）
+_caches: List["VersionedCache"] = []
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """所有快取命名空間的命中統計，{namespace: stats}"""
+    return {cache.namespace: cache.stats() for cache in list(_caches)}
+
+
+class VersionedCache:
+    """
+    以版本號失效的快取命名空間
+
+    快取鍵格式：{namespace}:{命名空間版本}[:{scope}={scope 版本}]:{key}
+    bump() 遞增命名空間版本（全部失效），bump(scope) 只讓該 scope 的項目失效。
+    shared_only=True 時只在共用後端（sqlite）啟用：寫入後必須立即反映在所有 worker 的資料
+    不能使用各程序獨立的 memory 後端，否則其他 worker 會在 TTL 內返回舊資料。
+    """
+
+    def __init__(self, namespace: str, ttl: float, backend: Optional[CacheBackend] = None,
+                 shared_only: bool = False):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.shared_only = shared_only
+        self._backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        _caches.append(self)
+
+    @property
+    def backend(self) -> CacheBackend:
+        # 未指定時跟隨全域後端，create_app() 切換後端後即生效
+        return self._backend or get_backend()
+
+    def _counter_key(self, scope: Optional[str] = None) -> str:
+        return f"{self.namespace}:version" if scope is None else f"{self.namespace}:version:{scope}"
+
+    def _full_key(self, key: str, scopes: Tuple[str, ...]) -> str:
+        counter_keys = [self._counter_key()] + [self._counter_key(s) for s in scopes]
+        versions = self.backend.get_counters(counter_keys)
+        parts = [self.namespace, str(versions[counter_keys[0]])]
+        parts.extend(f"{s}={versions[k]}" for s, k in zip(scopes, counter_keys[1:]))
+        parts.append(key)
+        return ":".join(parts)
+
+    def versions(self, scopes: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+        """
+        批次讀取多個 scope 的版本，返回 {scope: (命名空間版本, scope 版本)}
+
+        供程序內衍生資料（例如序列化結果）判斷是否過期，一次讀取所有計數器
+        """
+        scopes = list(scopes)
+        namespace_key = self._counter_key()
+        counters = self.backend.get_counters([namespace_key] + [self._counter_key(s) for s in scopes])
+        return {s: (counters[namespace_key], counters[self._counter_key(s)]) for s in scopes}
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], scopes: Tuple[str, ...] = ()) -> Any:
+        """
+        讀取快取，未命中時呼叫 loader 並寫入
+        loader 拋出例外時不會寫入快取
+        """
+        backend = self.backend
+        if self.ttl <= 0 or (self.shared_only and not backend.shared):
+            return loader()
+
+        full_key = self._full_key(key, scopes)
+        cached = backend.get(full_key)
+        if cached is not _MISSING:
+            with self._lock:
+                self.hits += 1
+            return cached[0]
+
+        with self._lock:
+            self.misses += 1
+        value = loader()
+        backend.set(full_key, (value,), self.ttl)
+        return value
+
+    def bump(self, scope: Optional[str] = None) -> None:
+        """使整個命名空間（scope=None）或指定 scope 的快取失效"""
+        self.backend.incr(self._counter_key(scope))
+
+    def stats(self) -> Dict[str, Any]:
+        """命中統計（hits/misses 為本程序的計數）"""
+        backend = self.backend
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": backend.name,
+                "entries": backend.size(f"{self.namespace}:"),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": getattr(backend, "evictions", 0),
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
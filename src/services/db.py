@@ -2,13 +2,20 @@
 from __future__ import annotations
 
 import os
+import re
+import threading
+import time
+from collections import deque
 from contextlib import contextmanager
 from dataclasses import dataclass
-from typing import Any, Dict, Optional, List
+from functools import lru_cache
+from typing import Any, Deque, Dict, Optional, List, Tuple
 
-from flask import current_app
+from flask import current_app, g, has_request_context
 from werkzeug.security import check_password_hash
 
+from utils.debug import get_logger
+
 try:
     import mariadb
 except ImportError:  # pragma: no cover
@@ -16,7 +23,11 @@ except ImportError:  # pragma: no cover
 
 
 class DatabaseError(RuntimeError):
-    """自訂例外"""
+    """自訂例外（errno 為驅動回報的錯誤碼；連線池逾時等非伺服器錯誤為 None）"""
+
+    def __init__(self, message: str, errno: Optional[int] = None):
+        super().__init__(message)
+        self.errno = errno
 
 
 @dataclass
@@ -30,7 +41,17 @@ def driver_available() -> bool:
     return mariadb is not None
 
 
-def _get_db_config() -> Dict[str, Any]:
+# 連線池設定鍵值（放在 DB_CONFIG 中，不會傳給 mariadb.connect）
+_POOL_KEYS = {
+    "pool_size": 5,             # 常駐連線數
+    "pool_max_overflow": 10,    # 尖峰時允許額外建立的連線數
+    "pool_timeout": 10.0,       # 連線用盡時等待的秒數
+    "pool_idle_timeout": 300.0, # 閒置超過此秒數的連線會被關閉
+    "pool_pre_ping": 30.0,      # 閒置超過此秒數，取出前先 ping 檢查
+}
+
+
+def _get_raw_config() -> Dict[str, Any]:
     defaults = {
         "host": os.getenv("DB_HOST", "127.0.0.1"),
         "port": int(os.getenv("DB_PORT", 3306)),
@@ -44,25 +65,237 @@ def _get_db_config() -> Dict[str, Any]:
     except RuntimeError:
         app_config = {}
 
-    return {**defaults, **{k: v for k, v in app_config.items() if v}}
+    # 連線池數值允許為 0，因此不套用「空值略過」規則
+    merged = {**defaults, **{k: v for k, v in app_config.items() if v or k in _POOL_KEYS}}
+    return merged
+
+
+def _get_db_config() -> Dict[str, Any]:
+    """取得 mariadb.connect 使用的連線參數（不含連線池設定）"""
+    return {k: v for k, v in _get_raw_config().items() if k not in _POOL_KEYS}
+
+
+def _get_pool_options() -> Dict[str, Any]:
+    raw = _get_raw_config()
+    return {k: raw.get(k, default) for k, default in _POOL_KEYS.items()}
+
+
+class ConnectionPool:
+    """
+    MariaDB 連線池
+
+    - 常駐 pool_size 條連線，尖峰時最多再建立 pool_max_overflow 條
+    - 歸還時超出 pool_size 的連線直接關閉
+    - 閒置超過 pool_idle_timeout 的連線會被淘汰
+    - 閒置超過 pool_pre_ping 秒的連線在取出前先 ping，失效則重建
+    - 連線以 autocommit 模式建立，單一語句不會留下未結束的交易（包含 SELECT 的一致性快照），
+      歸還時不需 rollback；多語句交易由 transaction() 以 begin() 明確開始
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        pool_size: int = 5,
+        pool_max_overflow: int = 10,
+        pool_timeout: float = 10.0,
+        pool_idle_timeout: float = 300.0,
+        pool_pre_ping: float = 30.0,
+    ):
+        self._config = dict(config)
+        self.label = f"{config.get('host')}:{config.get('port')}/{config.get('database')}"
+        self.size = max(int(pool_size), 0)
+        self.max_overflow = max(int(pool_max_overflow), 0)
+        self.timeout = float(pool_timeout)
+        self.idle_timeout = float(pool_idle_timeout)
+        self.pre_ping = float(pool_pre_ping)
+
+        self._idle: Deque[Tuple[Any, float]] = deque()  # (conn, 最後歸還時間)
+        self._in_use = 0
+        self._cond = threading.Condition()
+
+    @property
+    def capacity(self) -> int:
+        return self.size + self.max_overflow
+
+    def _connect(self):
+        conn = mariadb.connect(**self._config)
+        conn.autocommit = True
+        return conn
+
+    @staticmethod
+    def _close_quietly(conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _evict_idle(self, now: float) -> List[Any]:
+        """移除閒置過久的連線（需持有鎖），返回待關閉的連線"""
+        expired = []
+        if self.idle_timeout <= 0:
+            return expired
+        # deque 左側為最久未使用的連線
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            expired.append(self._idle.popleft()[0])
+        return expired
+
+    def acquire(self):
+        """取得連線；連線用盡時等待，逾時則拋出 DatabaseError"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                expired = self._evict_idle(now)
+                conn, idle_since, create = None, now, False
+                while conn is None:
+                    if self._idle:
+                        # 取最近歸還的連線（右側），較可能仍然有效
+                        conn, idle_since = self._idle.pop()
+                    elif self._in_use < self.capacity:
+                        create = True
+                        break
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            for c in expired:
+                                self._close_quietly(c)
+                            raise DatabaseError("資料庫連線池已滿，等待逾時")
+                        self._cond.wait(remaining)
+                self._in_use += 1
+
+            for c in expired:
+                self._close_quietly(c)
+
+            if create:
+                try:
+                    return self._connect()
+                except Exception:
+                    self._release_slot()
+                    raise
+
+            if self.pre_ping <= 0 or time.monotonic() - idle_since < self.pre_ping:
+                return conn
+            try:
+                conn.ping()
+                return conn
+            except Exception:
+                # 健康檢查失敗：丟棄並重新取得
+                self._close_quietly(conn)
+                self._release_slot()
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify()
+
+    def release(self, conn, discard: bool = False, rollback: bool = False) -> None:
+        """
+        歸還連線
+
+        Args:
+            discard: 連線已損壞，直接關閉
+            rollback: 使用期間發生錯誤，可能留下未結束的交易，歸還前先 rollback
+                      （正常使用時連線為 autocommit，省去每次歸還的往返）
+        """
+        if rollback and not discard:
+            try:
+                # 清掉未提交的交易，避免影響下一位使用者
+                conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if not discard and len(self._idle) < self.size:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+
+        if conn is not None:
+            self._close_quietly(conn)
+
+    def close(self) -> None:
+        """關閉所有閒置連線"""
+        with self._cond:
+            idle = [c for c, _ in self._idle]
+            self._idle.clear()
+        for c in idle:
+            self._close_quietly(c)
+
+    def stats(self) -> Dict[str, int]:
+        """連線池使用狀況"""
+        with self._cond:
+            return {
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+            }
+
+
+# 以連線參數區分連線池（不同 app 設定使用不同連線池）
+_pools: Dict[Tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    """取得目前設定對應的連線池（不存在則建立）"""
+    config = _get_db_config()
+    options = _get_pool_options()
+    key = tuple(sorted((k, str(v)) for k, v in {**config, **options}.items()))
+
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(config, **options)
+                _pools[key] = pool
+    return pool
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    """所有連線池的使用狀況，以 host:port/database 區分"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.label: pool.stats() for pool in pools}
+
+
+def close_all_pools() -> None:
+    """關閉所有連線池（測試或程式結束時使用）"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
 
 
 @contextmanager
 def get_connection():
-    """取得資料庫連線（自動關閉）"""
+    """從連線池取得資料庫連線（離開時自動歸還）"""
     if not driver_available():
         raise DatabaseError("尚未安裝 mariadb Python 驅動")
 
-    config = _get_db_config()
-    conn = None
+    pool = get_pool()
+    try:
+        conn = pool.acquire()
+    except mariadb.Error as exc:  # type: ignore[union-attr]
+        raise DatabaseError(str(exc), getattr(exc, "errno", None)) from exc
+
+    broken = False
+    failed = False
     try:
-        conn = mariadb.connect(**config)
         yield conn
     except mariadb.Error as exc:  # type: ignore[union-attr]
-        raise DatabaseError(str(exc)) from exc
+        # 連線層級錯誤時不放回連線池
+        broken = isinstance(exc, (mariadb.InterfaceError, mariadb.OperationalError))
+        failed = True
+        raise DatabaseError(str(exc), getattr(exc, "errno", None)) from exc
+    except BaseException:
+        failed = True
+        raise
     finally:
-        if conn:
-            conn.close()
+        pool.release(conn, discard=broken, rollback=failed)
 
 
 def authenticate_user(username: str, password: str) -> Optional[Dict[str, Any]]:
@@ -91,45 +324,189 @@ def authenticate_user(username: str, password: str) -> Optional[Dict[str, Any]]:
     return None
 
 
+# ==================== 查詢統計 ====================
+
+# 超過此秒數的查詢寫入慢查詢紀錄（0 表示停用）
+_slow_query_seconds = 0.2
+# 慢查詢紀錄：經由 utils.debug 的背景佇列輸出（SLOW_QUERY_LOG 指定時寫入該檔案）
+_slow_query_logger = get_logger("slow_sql")
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=1024)
+def normalize_sql(query: str) -> str:
+    """
+    正規化 SQL 以便彙整同一類查詢
+
+    常值改為 ?，IN (?, ?, ...) 合併為 IN (...)，空白壓縮為單一空格
+    """
+    query = _STRING_LITERAL.sub("?", query)
+    query = _NUMBER_LITERAL.sub("?", query)
+    query = _PLACEHOLDER_LIST.sub("(...)", query)
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+class QueryStats:
+    """單一請求的查詢統計（次數、總耗時；keep_queries 時保留每筆查詢）"""
+
+    __slots__ = ("count", "seconds", "queries")
+
+    def __init__(self, keep_queries: bool = False):
+        self.count = 0
+        self.seconds = 0.0
+        self.queries: Optional[List[Tuple[str, float]]] = [] if keep_queries else None
+
+    def add(self, query: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        if self.queries is not None:
+            self.queries.append((query, seconds))
+
+
+def configure_query_log(slow_query_ms: float = 200, log_path: Optional[str] = None) -> None:
+    """設定慢查詢門檻（毫秒，0 表示停用）與紀錄檔路徑（None 表示 stderr）"""
+    global _slow_query_seconds, _slow_query_logger
+    _slow_query_seconds = max(float(slow_query_ms), 0.0) / 1000
+    _slow_query_logger = get_logger("slow_sql", log_path or None)
+
+
+def begin_query_stats(keep_queries: bool = False) -> QueryStats:
+    """開始統計目前請求的查詢（通常由 before_request 呼叫）"""
+    stats = QueryStats(keep_queries)
+    g._query_stats = stats
+    return stats
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """目前請求的查詢統計；不在請求中或未開始統計時返回 None"""
+    if not has_request_context():
+        return None
+    return g.get("_query_stats")
+
+
+def _log_slow_query(query: str, seconds: float) -> None:
+    line = f"[SLOW SQL] {seconds * 1000:.1f}ms {normalize_sql(query)}"
+    if has_request_context():
+        from flask import request
+        line += f" ({request.method} {request.path})"
+    _slow_query_logger.warning(line)
+
+
+def _record_query(query: str, started: float) -> None:
+    """記錄一次查詢的耗時（started 為 time.perf_counter() 的值）"""
+    seconds = time.perf_counter() - started
+    stats = current_query_stats()
+    if stats is not None:
+        stats.add(query, seconds)
+    if _slow_query_seconds and seconds >= _slow_query_seconds:
+        _log_slow_query(query, seconds)
+
+
+class _InstrumentedCursor:
+    """transaction() 使用的 cursor：execute / executemany 計入查詢統計"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query: str, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, *args, **kwargs)
+        finally:
+            _record_query(query, started)
+
+    def executemany(self, query: str, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, *args, **kwargs)
+        finally:
+            _record_query(query, started)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+
 # ==================== 通用查詢函式 ====================
 
 def fetch_all(query: str, params: tuple = ()) -> List[Dict[str, Any]]:
     """執行查詢並返回所有結果（字典列表）"""
-    with get_connection() as conn:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        cursor.close()
+    started = time.perf_counter()
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(query, params)
+            results = cursor.fetchall()
+            cursor.close()
+    finally:
+        _record_query(query, started)
     return results if results else []
 
 
 def fetch_one(query: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
     """執行查詢並返回單一結果（字典）"""
-    with get_connection() as conn:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, params)
-        result = cursor.fetchone()
-        cursor.close()
+    started = time.perf_counter()
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(query, params)
+            result = cursor.fetchone()
+            cursor.close()
+    finally:
+        _record_query(query, started)
     return result
 
 
 def execute(query: str, params: tuple = ()) -> int:
     """執行 INSERT/UPDATE/DELETE 並返回影響的行數"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        conn.commit()
-        affected = cursor.rowcount
-        cursor.close()
+    started = time.perf_counter()
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            # autocommit 連線，語句執行完即已提交
+            cursor.execute(query, params)
+            affected = cursor.rowcount
+            cursor.close()
+    finally:
+        _record_query(query, started)
     return affected
 
 
+@contextmanager
+def transaction():
+    """
+    在同一連線與交易中執行多個語句（字典 cursor）
+    正常離開時 commit，發生例外時 rollback
+    """
+    with get_connection() as conn:
+        # 連線池的連線為 autocommit，需明確開始交易
+        conn.begin()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            yield _InstrumentedCursor(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+
+
 def execute_returning_id(query: str, params: tuple = ()) -> int:
     """執行 INSERT 並返回新插入的 ID"""
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        conn.commit()
-        last_id = cursor.lastrowid
-        cursor.close()
+    started = time.perf_counter()
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            last_id = cursor.lastrowid
+            cursor.close()
+    finally:
+        _record_query(query, started)
     return last_id
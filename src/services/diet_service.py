@@ -3,10 +3,274 @@
 處理用戶的飲食記錄 CRUD
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Union
 from dataclasses import dataclass
-from datetime import datetime
-from services.db import fetch_all, fetch_one, execute, execute_returning_id, driver_available, DatabaseError
+from datetime import datetime, date, timedelta, tzinfo
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from services.db import fetch_all, fetch_one, transaction, driver_available, DatabaseError
+from services.cache import VersionedCache
+from utils.pagination import InvalidCursor, encode_cursor, decode_cursor
+from utils.debug import ERROR_PRINT, WARN_PRINT
+
+# 今日營養總計快取：每位使用者一個 scope，記錄新增/刪除/修改時遞增版本即失效
+# 只在 sqlite 共用後端啟用（memory 後端時 bump 只影響處理寫入的 worker）
+NUTRITION_SUMMARY_CACHE_TTL = 60
+summary_cache = VersionedCache('diet_summary', NUTRITION_SUMMARY_CACHE_TTL, shared_only=True)
+
+# 將單筆飲食紀錄累加到 daily_nutrition（與 INSERT 在同一交易中執行）
+_ADD_TO_DAILY_QUERY = """
+    INSERT INTO daily_nutrition
+        (userID, logDate, totalCalories, totalProtein, totalCarbs, totalFat, logCount)
+    SELECT d.userID, DATE(d.timestamp),
+           COALESCE(m.calories, 0) * d.portionSize,
+           COALESCE(m.protein, 0) * d.portionSize,
+           COALESCE(m.carbs, 0) * d.portionSize,
+           COALESCE(m.fat, 0) * d.portionSize,
+           1
+    FROM diet_logs d
+    JOIN menu_items m ON d.itemID = m.itemID
+    WHERE d.logID = ?
+    ON DUPLICATE KEY UPDATE
+        totalCalories = totalCalories + VALUES(totalCalories),
+        totalProtein = totalProtein + VALUES(totalProtein),
+        totalCarbs = totalCarbs + VALUES(totalCarbs),
+        totalFat = totalFat + VALUES(totalFat),
+        logCount = logCount + 1
+"""
+
+# 鎖定單筆紀錄並取得其營養值（刪除 / 修改前使用）
+_LOCK_LOG_QUERY = """
+    SELECT d.portionSize, DATE(d.timestamp) AS logDate,
+           COALESCE(m.calories, 0) AS calories, COALESCE(m.protein, 0) AS protein,
+           COALESCE(m.carbs, 0) AS carbs, COALESCE(m.fat, 0) AS fat
+    FROM diet_logs d
+    JOIN menu_items m ON d.itemID = m.itemID
+    WHERE d.logID = ? AND d.userID = ?
+    FOR UPDATE
+"""
+
+# 以差量調整 daily_nutrition（factor 為份量變化量，刪除時為 -portionSize）
+_ADJUST_DAILY_QUERY = """
+    UPDATE daily_nutrition
+    SET totalCalories = totalCalories + ?,
+        totalProtein = totalProtein + ?,
+        totalCarbs = totalCarbs + ?,
+        totalFat = totalFat + ?,
+        logCount = logCount + ?
+    WHERE userID = ? AND logDate = ?
+"""
+
+
+def _adjust_daily(cursor, user_id: int, row: Dict[str, Any], factor: float, count_delta: int) -> None:
+    """依紀錄的營養值乘上 factor 調整當日彙總"""
+    cursor.execute(_ADJUST_DAILY_QUERY, (
+        float(row['calories']) * factor,
+        float(row['protein']) * factor,
+        float(row['carbs']) * factor,
+        float(row['fat']) * factor,
+        count_delta,
+        user_id,
+        row['logDate'],
+    ))
+    if count_delta < 0:
+        # 當日已無紀錄時移除彙總列，避免浮點殘差
+        cursor.execute(
+            "DELETE FROM daily_nutrition WHERE userID = ? AND logDate = ? AND logCount <= 0",
+            (user_id, row['logDate'])
+        )
+
+
+# ==================== 日期範圍 ====================
+# diet_logs.timestamp 為不含時區的 DATETIME（以資料庫儲存時區記錄）。
+# 查詢一律使用半開區間 timestamp >= 開始 AND timestamp < 結束，
+# 避免 DATE(timestamp) 讓 idx_diet_user_time (userID, timestamp) 無法使用。
+
+_user_tz: Optional[tzinfo] = None     # 使用者預設時區；None 表示與儲存時區相同
+_storage_tz: Optional[tzinfo] = None  # 資料庫儲存時區；None 表示伺服器本地時間
+
+
+def _load_tz(name: Optional[str]) -> Optional[tzinfo]:
+    """依 IANA 名稱載入時區，無效時返回 None"""
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        WARN_PRINT(f"[WARN] 無效的時區名稱: {name}")
+        return None
+
+
+def _to_storage(local: datetime, tz: Optional[tzinfo]) -> datetime:
+    """將使用者時區的 naive datetime 轉為儲存時區的 naive datetime"""
+    if tz is None:
+        return local
+    aware = local.replace(tzinfo=tz)
+    converted = aware.astimezone(_storage_tz) if _storage_tz else aware.astimezone()
+    return converted.replace(tzinfo=None)
+
+
+def _resolve_tz(tz: Optional[str]) -> Optional[tzinfo]:
+    return _load_tz(tz) or _user_tz
+
+
+def to_user_time(stored: datetime, tz: Optional[str] = None) -> datetime:
+    """將儲存時區的 naive datetime 轉為使用者時區的 naive datetime"""
+    zone = _resolve_tz(tz)
+    if zone is None or stored is None:
+        return stored
+    aware = stored.replace(tzinfo=_storage_tz) if _storage_tz else stored.astimezone()
+    return aware.astimezone(zone).replace(tzinfo=None)
+
+
+def meal_type_for(moment: Optional[datetime]) -> str:
+    """依進食時間判斷餐別（與前端的早午晚餐區間一致）"""
+    if moment is None:
+        return 'other'
+    hour = moment.hour
+    if 5 <= hour < 11:
+        return 'breakfast'
+    if 11 <= hour < 17:
+        return 'lunch'
+    if 17 <= hour < 22:
+        return 'dinner'
+    return 'other'
+
+
+def user_today(tz: Optional[str] = None) -> date:
+    """取得使用者時區的今天日期"""
+    zone = _resolve_tz(tz)
+    if zone is None:
+        return datetime.now().date()
+    return datetime.now(zone).date()
+
+
+def day_range(day: Optional[Union[date, str]] = None, tz: Optional[str] = None) -> Tuple[datetime, datetime]:
+    """
+    取得使用者某一天的 [開始, 結束) 時間範圍（已轉為儲存時區）
+    
+    Args:
+        day: 日期或 YYYY-MM-DD 字串；None 表示今天
+        tz: IANA 時區名稱；None 使用預設使用者時區
+        
+    Raises:
+        ValueError: 日期字串格式錯誤
+    """
+    zone = _resolve_tz(tz)
+    if day is None:
+        day = user_today(tz)
+    elif isinstance(day, str):
+        day = date.fromisoformat(day)
+    start = datetime.combine(day, datetime.min.time())
+    return _to_storage(start, zone), _to_storage(start + timedelta(days=1), zone)
+
+
+# 指定時間範圍內的飲食紀錄（idx_diet_user_time: userID 等值 + timestamp 範圍）
+LOGS_IN_RANGE_QUERY = """
+    SELECT d.logID, d.userID, d.itemID, d.timestamp, d.portionSize,
+           m.name as itemName, r.name as restaurantName,
+           m.calories, m.protein, m.carbs, m.fat
+    FROM diet_logs d
+    JOIN menu_items m ON d.itemID = m.itemID
+    JOIN restaurants r ON m.restaurantID = r.restaurantID
+    WHERE d.userID = ? AND d.timestamp >= ? AND d.timestamp < ?
+    ORDER BY d.timestamp DESC
+"""
+
+
+# 範圍查詢：單頁飲食紀錄（keyset 分頁，依 (timestamp, logID) 由新到舊）
+_LOGS_RANGE_PAGE_QUERY = """
+    SELECT d.logID, d.userID, d.itemID, d.timestamp, d.portionSize,
+           m.name as itemName, r.name as restaurantName,
+           m.calories, m.protein, m.carbs, m.fat
+    FROM diet_logs d
+    JOIN menu_items m ON d.itemID = m.itemID
+    JOIN restaurants r ON m.restaurantID = r.restaurantID
+    WHERE d.userID = ? AND d.timestamp >= ? AND d.timestamp < ?
+    {cursor_condition}
+    ORDER BY d.timestamp DESC, d.logID DESC
+    LIMIT ?
+"""
+
+# 範圍查詢：依小時分組的營養總計，於 Python 端換算使用者時區後再分日、分餐
+RANGE_BUCKETS_QUERY = """
+    SELECT DATE(d.timestamp) AS logDate, HOUR(d.timestamp) AS logHour,
+           COUNT(*) AS logCount,
+           COALESCE(SUM(m.calories * d.portionSize), 0) AS totalCalories,
+           COALESCE(SUM(m.protein * d.portionSize), 0) AS totalProtein,
+           COALESCE(SUM(m.carbs * d.portionSize), 0) AS totalCarbs,
+           COALESCE(SUM(m.fat * d.portionSize), 0) AS totalFat
+    FROM diet_logs d
+    JOIN menu_items m ON d.itemID = m.itemID
+    WHERE d.userID = ? AND d.timestamp >= ? AND d.timestamp < ?
+    GROUP BY DATE(d.timestamp), HOUR(d.timestamp)
+"""
+
+# 今日營養總計：使用者的一天與儲存時區的日期界線不一致時，直接加總範圍內的紀錄
+_RANGE_TOTALS_QUERY = """
+    SELECT COALESCE(SUM(m.calories * d.portionSize), 0) AS totalCalories,
+           COALESCE(SUM(m.protein * d.portionSize), 0) AS totalProtein,
+           COALESCE(SUM(m.carbs * d.portionSize), 0) AS totalCarbs,
+           COALESCE(SUM(m.fat * d.portionSize), 0) AS totalFat
+    FROM diet_logs d
+    JOIN menu_items m ON d.itemID = m.itemID
+    WHERE d.userID = ? AND d.timestamp >= ? AND d.timestamp < ?
+"""
+
+# 範圍查詢限制
+MAX_RANGE_DAYS = 366
+RANGE_PAGE_SIZE = 200
+MAX_RANGE_PAGE_SIZE = 1000
+
+_NUTRIENTS = (
+    ('calories', 'totalCalories'),
+    ('protein', 'totalProtein'),
+    ('carbs', 'totalCarbs'),
+    ('fat', 'totalFat'),
+)
+
+
+def _empty_totals() -> Dict[str, float]:
+    return {'calories': 0.0, 'protein': 0.0, 'carbs': 0.0, 'fat': 0.0, 'count': 0}
+
+
+def _round_totals(totals: Dict[str, float]) -> Dict[str, float]:
+    return {k: (v if k == 'count' else round(v, 1)) for k, v in totals.items()}
+
+
+def _decode_log_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """
+    解碼飲食記錄分頁游標 (timestamp, logID)
+
+    Raises:
+        InvalidCursor: 游標格式或型別錯誤
+    """
+    position = decode_cursor(cursor, 2)
+    if position is None:
+        return None
+    timestamp, log_id = position
+    if not isinstance(timestamp, str) or not isinstance(log_id, int) or isinstance(log_id, bool):
+        raise InvalidCursor("無效的分頁游標")
+    try:
+        return datetime.fromisoformat(timestamp), log_id
+    except (TypeError, ValueError) as exc:
+        raise InvalidCursor("無效的分頁游標") from exc
+
+
+def _row_to_diet_log(row: Dict[str, Any]) -> "DietLog":
+    """將資料列轉換為 DietLog"""
+    return DietLog(
+        log_id=row['logID'],
+        user_id=row['userID'],
+        item_id=row['itemID'],
+        timestamp=row['timestamp'],
+        portion_size=float(row['portionSize'] or 1.0),
+        item_name=row['itemName'] or '',
+        restaurant_name=row['restaurantName'] or '',
+        calories=int(row['calories'] or 0),
+        protein=float(row['protein'] or 0),
+        carbs=float(row['carbs'] or 0),
+        fat=float(row['fat'] or 0)
+    )
 
 
 @dataclass
@@ -30,6 +294,24 @@ class DietLog:
 class DietService:
     """飲食記錄服務"""
     
+    @staticmethod
+    def configure_timezones(user_tz: Optional[str] = None, storage_tz: Optional[str] = None) -> None:
+        """
+        設定時區
+        
+        Args:
+            user_tz: 使用者預設時區（IANA 名稱，例如 Asia/Taipei）
+            storage_tz: diet_logs.timestamp 的儲存時區；None 表示伺服器本地時間
+        """
+        global _user_tz, _storage_tz
+        _user_tz = _load_tz(user_tz)
+        _storage_tz = _load_tz(storage_tz)
+    
+    @staticmethod
+    def invalidate_user_cache(user_id: int) -> None:
+        """使用者飲食記錄異動後，讓該使用者的營養總計快取失效"""
+        summary_cache.bump(f"user:{user_id}")
+    
     @staticmethod
     def add_diet_log(user_id: int, item_id: int, portion_size: float = 1.0, timestamp: Optional[str] = None) -> Optional[int]:
         """
@@ -45,88 +327,123 @@ class DietService:
             新記錄的 ID，失敗則返回 None
         """
         if not driver_available():
-            print("[ERROR] 資料庫驅動不可用")
+            ERROR_PRINT("[ERROR] 資料庫驅動不可用")
             return None
         
         try:
-            if timestamp:
-                query = """
-                    INSERT INTO diet_logs (userID, itemID, timestamp, portionSize)
-                    VALUES (?, ?, ?, ?)
-                """
-                log_id = execute_returning_id(query, (user_id, item_id, timestamp, portion_size))
-            else:
-                query = """
-                    INSERT INTO diet_logs (userID, itemID, timestamp, portionSize)
-                    VALUES (?, ?, NOW(), ?)
-                """
-                log_id = execute_returning_id(query, (user_id, item_id, portion_size))
+            with transaction() as cursor:
+                if timestamp:
+                    query = """
+                        INSERT INTO diet_logs (userID, itemID, timestamp, portionSize)
+                        VALUES (?, ?, ?, ?)
+                    """
+                    cursor.execute(query, (user_id, item_id, timestamp, portion_size))
+                else:
+                    query = """
+                        INSERT INTO diet_logs (userID, itemID, timestamp, portionSize)
+                        VALUES (?, ?, NOW(), ?)
+                    """
+                    cursor.execute(query, (user_id, item_id, portion_size))
+                log_id = cursor.lastrowid
+                
+                # 同一交易中更新每日彙總
+                cursor.execute(_ADD_TO_DAILY_QUERY, (log_id,))
+            
+            DietService.invalidate_user_cache(user_id)
             return log_id
             
         except DatabaseError as e:
-            print(f"[ERROR] 新增飲食記錄失敗: {e}")
+            ERROR_PRINT(f"[ERROR] 新增飲食記錄失敗: {e}")
             return None
     
     @staticmethod
-    def get_user_diet_logs(user_id: int, limit: int = 50) -> List[DietLog]:
+    def get_user_diet_logs(user_id: int, limit: int = 50, cursor: Optional[str] = None) -> List[DietLog]:
         """
         取得使用者的飲食記錄
         
         Args:
             user_id: 使用者 ID
             limit: 最多返回筆數
+            cursor: 上一頁返回的游標（需要下一頁游標時請使用 get_user_diet_logs_page）
             
         Returns:
             飲食記錄列表
         """
+        return DietService.get_user_diet_logs_page(user_id, limit, cursor)[0]
+    
+    @staticmethod
+    def get_user_diet_logs_page(
+        user_id: int,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[DietLog], Optional[str]]:
+        """
+        取得使用者的飲食記錄（keyset 分頁，依 (timestamp, logID) 由新到舊）
+        
+        Args:
+            user_id: 使用者 ID
+            limit: 每頁筆數（最多 MAX_RANGE_PAGE_SIZE）
+            cursor: 上一頁返回的 next_cursor
+            
+        Returns:
+            (飲食記錄列表, 下一頁游標；沒有下一頁時為 None)
+            
+        Raises:
+            InvalidCursor: 游標格式錯誤
+        """
+        limit = max(1, min(int(limit), MAX_RANGE_PAGE_SIZE))
+        position = _decode_log_cursor(cursor)
+        
         if not driver_available():
-            return []
+            return [], None
         
         try:
-            query = """
+            params: List[Any] = [user_id]
+            cursor_condition = ""
+            if position is not None:
+                cursor_condition = "AND (d.timestamp < ? OR (d.timestamp = ? AND d.logID < ?))"
+                cursor_time, cursor_id = position
+                params.extend([cursor_time, cursor_time, cursor_id])
+            params.append(limit + 1)
+            
+            query = f"""
                 SELECT d.logID, d.userID, d.itemID, d.timestamp, d.portionSize,
                        m.name as itemName, r.name as restaurantName,
                        m.calories, m.protein, m.carbs, m.fat
                 FROM diet_logs d
                 JOIN menu_items m ON d.itemID = m.itemID
                 JOIN restaurants r ON m.restaurantID = r.restaurantID
-                WHERE d.userID = ?
-                ORDER BY d.timestamp DESC
+                WHERE d.userID = ? {cursor_condition}
+                ORDER BY d.timestamp DESC, d.logID DESC
                 LIMIT ?
             """
-            rows = fetch_all(query, (user_id, limit))
-            
-            logs = []
-            for row in rows:
-                log = DietLog(
-                    log_id=row['logID'],
-                    user_id=row['userID'],
-                    item_id=row['itemID'],
-                    timestamp=row['timestamp'],
-                    portion_size=float(row['portionSize'] or 1.0),
-                    item_name=row['itemName'] or '',
-                    restaurant_name=row['restaurantName'] or '',
-                    calories=int(row['calories'] or 0),
-                    protein=float(row['protein'] or 0),
-                    carbs=float(row['carbs'] or 0),
-                    fat=float(row['fat'] or 0)
-                )
-                logs.append(log)
+            rows = fetch_all(query, tuple(params))
+            logs = [_row_to_diet_log(row) for row in rows[:limit]]
             
-            return logs
+            next_cursor = None
+            if len(rows) > limit:
+                next_cursor = encode_cursor((logs[-1].timestamp, logs[-1].log_id))
+            return logs, next_cursor
             
         except DatabaseError as e:
-            print(f"[ERROR] 讀取飲食記錄失敗: {e}")
-            return []
+            ERROR_PRINT(f"[ERROR] 讀取飲食記錄失敗: {e}")
+            return [], None
+
+    @staticmethod
+    def _get_logs_in_range(user_id: int, start: datetime, end: datetime) -> List[DietLog]:
+        """取得 [start, end) 範圍內的飲食記錄（錯誤以 DatabaseError 拋出）"""
+        rows = fetch_all(LOGS_IN_RANGE_QUERY, (user_id, start, end))
+        return [_row_to_diet_log(row) for row in rows]
 
     @staticmethod
-    def get_date_diet_logs(user_id: int, date_str: str) -> List[DietLog]:
+    def get_date_diet_logs(user_id: int, date_str: str, tz: Optional[str] = None) -> List[DietLog]:
         """
         取得使用者指定日期的飲食記錄
         
         Args:
             user_id: 使用者 ID
             date_str: 日期字串 (YYYY-MM-DD)
+            tz: 使用者時區（IANA 名稱，可選）
             
         Returns:
             該日飲食記錄列表
@@ -135,48 +452,26 @@ class DietService:
             return []
         
         try:
-            query = """
-                SELECT d.logID, d.userID, d.itemID, d.timestamp, d.portionSize,
-                       m.name as itemName, r.name as restaurantName,
-                       m.calories, m.protein, m.carbs, m.fat
-                FROM diet_logs d
-                JOIN menu_items m ON d.itemID = m.itemID
-                JOIN restaurants r ON m.restaurantID = r.restaurantID
-                WHERE d.userID = ? AND DATE(d.timestamp) = ?
-                ORDER BY d.timestamp DESC
-            """
-            rows = fetch_all(query, (user_id, date_str))
-            
-            logs = []
-            for row in rows:
-                log = DietLog(
-                    log_id=row['logID'],
-                    user_id=row['userID'],
-                    item_id=row['itemID'],
-                    timestamp=row['timestamp'],
-                    portion_size=float(row['portionSize'] or 1.0),
-                    item_name=row['itemName'] or '',
-                    restaurant_name=row['restaurantName'] or '',
-                    calories=int(row['calories'] or 0),
-                    protein=float(row['protein'] or 0),
-                    carbs=float(row['carbs'] or 0),
-                    fat=float(row['fat'] or 0)
-                )
-                logs.append(log)
-            
-            return logs
+            start, end = day_range(date_str, tz)
+        except ValueError:
+            ERROR_PRINT(f"[ERROR] 日期格式錯誤: {date_str}")
+            return []
+        
+        try:
+            return DietService._get_logs_in_range(user_id, start, end)
             
         except DatabaseError as e:
-            print(f"[ERROR] 讀取飲食記錄失敗: {e}")
+            ERROR_PRINT(f"[ERROR] 讀取飲食記錄失敗: {e}")
             return []
     
     @staticmethod
-    def get_today_diet_logs(user_id: int) -> List[DietLog]:
+    def get_today_diet_logs(user_id: int, tz: Optional[str] = None) -> List[DietLog]:
         """
         取得使用者今日的飲食記錄
         
         Args:
             user_id: 使用者 ID
+            tz: 使用者時區（IANA 名稱，可選）
             
         Returns:
             今日飲食記錄列表
@@ -185,48 +480,133 @@ class DietService:
             return []
         
         try:
-            query = """
-                SELECT d.logID, d.userID, d.itemID, d.timestamp, d.portionSize,
-                       m.name as itemName, r.name as restaurantName,
-                       m.calories, m.protein, m.carbs, m.fat
-                FROM diet_logs d
-                JOIN menu_items m ON d.itemID = m.itemID
-                JOIN restaurants r ON m.restaurantID = r.restaurantID
-                WHERE d.userID = ? AND DATE(d.timestamp) = CURDATE()
-                ORDER BY d.timestamp DESC
-            """
-            rows = fetch_all(query, (user_id,))
-            
-            logs = []
-            for row in rows:
-                log = DietLog(
-                    log_id=row['logID'],
-                    user_id=row['userID'],
-                    item_id=row['itemID'],
-                    timestamp=row['timestamp'],
-                    portion_size=float(row['portionSize'] or 1.0),
-                    item_name=row['itemName'] or '',
-                    restaurant_name=row['restaurantName'] or '',
-                    calories=int(row['calories'] or 0),
-                    protein=float(row['protein'] or 0),
-                    carbs=float(row['carbs'] or 0),
-                    fat=float(row['fat'] or 0)
-                )
-                logs.append(log)
-            
-            return logs
+            start, end = day_range(None, tz)
+            return DietService._get_logs_in_range(user_id, start, end)
             
         except DatabaseError as e:
-            print(f"[ERROR] 讀取今日飲食記錄失敗: {e}")
+            ERROR_PRINT(f"[ERROR] 讀取今日飲食記錄失敗: {e}")
             return []
     
     @staticmethod
-    def get_today_nutrition_summary(user_id: int) -> Dict[str, float]:
+    def get_diet_range(
+        user_id: int,
+        start_date: str,
+        end_date: str,
+        tz: Optional[str] = None,
+        limit: int = RANGE_PAGE_SIZE,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        取得日期範圍內的飲食記錄與每日 / 每餐營養總計
+        
+        記錄以 (timestamp, logID) 由新到舊做 keyset 分頁；營養總計涵蓋整個範圍，
+        只在第一頁（cursor 為 None）計算。每頁固定 1~2 次查詢，與範圍天數無關。
+        
+        Args:
+            user_id: 使用者 ID
+            start_date: 起始日期 YYYY-MM-DD（含）
+            end_date: 結束日期 YYYY-MM-DD（含）
+            tz: 使用者時區（IANA 名稱，可選）
+            limit: 每頁記錄筆數（最多 MAX_RANGE_PAGE_SIZE）
+            cursor: 上一頁返回的 next_cursor
+            
+        Returns:
+            {'logs': [DietLog], 'days': [每日總計] 或 None, 'next_cursor': str 或 None}
+            
+        Raises:
+            ValueError: 日期、範圍或游標無效
+        """
+        first_day = date.fromisoformat(start_date)
+        last_day = date.fromisoformat(end_date)
+        if last_day < first_day:
+            raise ValueError("結束日期不可早於起始日期")
+        if (last_day - first_day).days + 1 > MAX_RANGE_DAYS:
+            raise ValueError(f"日期範圍最多 {MAX_RANGE_DAYS} 天")
+        limit = max(1, min(int(limit), MAX_RANGE_PAGE_SIZE))
+        position = _decode_log_cursor(cursor)
+        
+        result: Dict[str, Any] = {'logs': [], 'days': None, 'next_cursor': None}
+        if not driver_available():
+            return result
+        
+        start, _ = day_range(first_day, tz)
+        _, end = day_range(last_day, tz)
+        
+        try:
+            # 1. 單頁記錄
+            params: List[Any] = [user_id, start, end]
+            cursor_condition = ""
+            if position is not None:
+                cursor_condition = "AND (d.timestamp < ? OR (d.timestamp = ? AND d.logID < ?))"
+                cursor_time, cursor_id = position
+                params.extend([cursor_time, cursor_time, cursor_id])
+            params.append(limit + 1)
+            
+            rows = fetch_all(
+                _LOGS_RANGE_PAGE_QUERY.format(cursor_condition=cursor_condition),
+                tuple(params)
+            )
+            logs = [_row_to_diet_log(row) for row in rows[:limit]]
+            result['logs'] = logs
+            if len(rows) > limit:
+                last = logs[-1]
+                result['next_cursor'] = encode_cursor((last.timestamp, last.log_id))
+            
+            # 2. 整個範圍的每日 / 每餐總計（僅第一頁）
+            if position is None:
+                result['days'] = DietService._bucket_range(user_id, first_day, last_day, start, end, tz)
+            
+            return result
+            
+        except DatabaseError as e:
+            ERROR_PRINT(f"[ERROR] 讀取飲食記錄範圍失敗: {e}")
+            return result
+    
+    @staticmethod
+    def _bucket_range(
+        user_id: int,
+        first_day: date,
+        last_day: date,
+        start: datetime,
+        end: datetime,
+        tz: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """依使用者時區將小時分組結果彙整為每日 / 每餐總計（含無記錄的日期）"""
+        days: Dict[str, Dict[str, Any]] = {}
+        current = first_day
+        while current <= last_day:
+            days[current.isoformat()] = {'totals': _empty_totals(), 'meals': {}}
+            current += timedelta(days=1)
+        
+        for row in fetch_all(RANGE_BUCKETS_QUERY, (user_id, start, end)):
+            stored = datetime.combine(row['logDate'], datetime.min.time()) + timedelta(hours=int(row['logHour']))
+            local = to_user_time(stored, tz)
+            bucket = days.get(local.date().isoformat())
+            if bucket is None:
+                continue
+            meal = bucket['meals'].setdefault(meal_type_for(local), _empty_totals())
+            for target in (bucket['totals'], meal):
+                for key, column in _NUTRIENTS:
+                    target[key] += float(row[column] or 0)
+                target['count'] += int(row['logCount'])
+        
+        return [
+            {
+                'date': day,
+                **_round_totals(bucket['totals']),
+                'meals': {meal: _round_totals(t) for meal, t in bucket['meals'].items()},
+            }
+            for day, bucket in days.items()
+        ]
+    
+    @staticmethod
+    def get_today_nutrition_summary(user_id: int, tz: Optional[str] = None) -> Dict[str, float]:
         """
         取得使用者今日營養攝取總計
         
         Args:
             user_id: 使用者 ID
+            tz: 使用者時區（IANA 名稱，可選）
             
         Returns:
             營養攝取總計 dict
@@ -234,18 +614,23 @@ class DietService:
         if not driver_available():
             return {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0}
         
-        try:
-            query = """
-                SELECT 
-                    COALESCE(SUM(m.calories * d.portionSize), 0) as totalCalories,
-                    COALESCE(SUM(m.protein * d.portionSize), 0) as totalProtein,
-                    COALESCE(SUM(m.carbs * d.portionSize), 0) as totalCarbs,
-                    COALESCE(SUM(m.fat * d.portionSize), 0) as totalFat
-                FROM diet_logs d
-                JOIN menu_items m ON d.itemID = m.itemID
-                WHERE d.userID = ? AND DATE(d.timestamp) = CURDATE()
-            """
-            row = fetch_one(query, (user_id,))
+        today = user_today(tz)
+        start, end = day_range(today, tz)
+        # daily_nutrition 以儲存時區的日期分組；使用者的今天剛好是儲存時區的一整天時才能直接使用
+        storage_day = start == datetime.combine(today, datetime.min.time()) and end - start == timedelta(days=1)
+        
+        def load():
+            if storage_day:
+                # daily_nutrition 由寫入時同步維護，這裡只需一次主鍵查詢
+                query = """
+                    SELECT totalCalories, totalProtein, totalCarbs, totalFat
+                    FROM daily_nutrition
+                    WHERE userID = ? AND logDate = ?
+                """
+                row = fetch_one(query, (user_id, today))
+            else:
+                # 與 get_today_diet_logs 相同的 [start, end) 範圍
+                row = fetch_one(_RANGE_TOTALS_QUERY, (user_id, start, end))
             
             if row:
                 return {
@@ -256,9 +641,15 @@ class DietService:
                 }
             
             return {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0}
+        
+        try:
+            # 鍵值包含日期與範圍，跨日或時區不同時使用各自的項目
+            return dict(summary_cache.get_or_load(
+                f"today:{user_id}:{today.isoformat()}:{start.isoformat()}", load, (f"user:{user_id}",)
+            ))
             
         except DatabaseError as e:
-            print(f"[ERROR] 計算今日營養攝取失敗: {e}")
+            ERROR_PRINT(f"[ERROR] 計算今日營養攝取失敗: {e}")
             return {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0}
     
     @staticmethod
@@ -277,16 +668,24 @@ class DietService:
             return False
         
         try:
-            # 確保只能刪除自己的記錄
-            query = """
-                DELETE FROM diet_logs
-                WHERE logID = ? AND userID = ?
-            """
-            affected = execute(query, (log_id, user_id))
-            return affected > 0
+            with transaction() as cursor:
+                # 確保只能刪除自己的記錄，並鎖定該筆以免重複扣除彙總
+                cursor.execute(_LOCK_LOG_QUERY, (log_id, user_id))
+                row = cursor.fetchone()
+                if not row:
+                    return False
+                
+                cursor.execute(
+                    "DELETE FROM diet_logs WHERE logID = ? AND userID = ?",
+                    (log_id, user_id)
+                )
+                _adjust_daily(cursor, user_id, row, -float(row['portionSize'] or 1.0), -1)
+            
+            DietService.invalidate_user_cache(user_id)
+            return True
             
         except DatabaseError as e:
-            print(f"[ERROR] 刪除飲食記錄失敗: {e}")
+            ERROR_PRINT(f"[ERROR] 刪除飲食記錄失敗: {e}")
             return False
     
     @staticmethod
@@ -306,14 +705,74 @@ class DietService:
             return False
         
         try:
-            query = """
-                UPDATE diet_logs
-                SET portionSize = ?
-                WHERE logID = ? AND userID = ?
-            """
-            affected = execute(query, (portion_size, log_id, user_id))
-            return affected > 0
+            with transaction() as cursor:
+                cursor.execute(_LOCK_LOG_QUERY, (log_id, user_id))
+                row = cursor.fetchone()
+                if not row:
+                    return False
+                
+                query = """
+                    UPDATE diet_logs
+                    SET portionSize = ?
+                    WHERE logID = ? AND userID = ?
+                """
+                cursor.execute(query, (portion_size, log_id, user_id))
+                delta = float(portion_size) - float(row['portionSize'] or 1.0)
+                _adjust_daily(cursor, user_id, row, delta, 0)
+            
+            DietService.invalidate_user_cache(user_id)
+            return True
             
         except DatabaseError as e:
-            print(f"[ERROR] 更新飲食記錄失敗: {e}")
+            ERROR_PRINT(f"[ERROR] 更新飲食記錄失敗: {e}")
             return False
+    
+    @staticmethod
+    def rebuild_daily_nutrition(user_id: Optional[int] = None) -> int:
+        """
+        由 diet_logs 重新計算 daily_nutrition（回填既有資料或修正誤差）
+        
+        Args:
+            user_id: 只重建指定使用者；None 表示全部重建
+            
+        Returns:
+            寫入的彙總列數，失敗返回 -1
+        """
+        if not driver_available():
+            return -1
+        
+        where = "WHERE d.userID = ?" if user_id is not None else ""
+        params = (user_id,) if user_id is not None else ()
+        
+        try:
+            with transaction() as cursor:
+                if user_id is not None:
+                    cursor.execute("DELETE FROM daily_nutrition WHERE userID = ?", params)
+                else:
+                    cursor.execute("DELETE FROM daily_nutrition")
+                
+                cursor.execute(f"""
+                    INSERT INTO daily_nutrition
+                        (userID, logDate, totalCalories, totalProtein, totalCarbs, totalFat, logCount)
+                    SELECT d.userID, DATE(d.timestamp),
+                           COALESCE(SUM(m.calories * d.portionSize), 0),
+                           COALESCE(SUM(m.protein * d.portionSize), 0),
+                           COALESCE(SUM(m.carbs * d.portionSize), 0),
+                           COALESCE(SUM(m.fat * d.portionSize), 0),
+                           COUNT(*)
+                    FROM diet_logs d
+                    JOIN menu_items m ON d.itemID = m.itemID
+                    {where}
+                    GROUP BY d.userID, DATE(d.timestamp)
+                """, params)
+                written = cursor.rowcount
+            
+            if user_id is not None:
+                DietService.invalidate_user_cache(user_id)
+            else:
+                summary_cache.bump()
+            return written
+            
+        except DatabaseError as e:
+            ERROR_PRINT(f"[ERROR] 重建每日營養彙總失敗: {e}")
+            return -1
@@ -0,0 +1,137 @@
+"""
+收藏資料庫服務
+處理使用者收藏的餐廳（favorites 資料表）
+"""
+
+from typing import FrozenSet, List
+
+from services.db import fetch_all, execute, driver_available, DatabaseError
+from services.cache import VersionedCache
+from services.restaurant_service import Restaurant, RestaurantService
+from utils.debug import ERROR_PRINT
+
+# 每位使用者的收藏 ID 集合快取：一個使用者一個 scope，新增/移除時遞增版本即失效
+# 只在 sqlite 共用後端啟用（memory 後端時 bump 只影響處理寫入的 worker）
+FAVORITES_CACHE_TTL = 300
+favorites_cache = VersionedCache('favorites', FAVORITES_CACHE_TTL, shared_only=True)
+
+
+class FavoritesService:
+    """收藏服務"""
+
+    @staticmethod
+    def invalidate_user_cache(user_id: int) -> None:
+        """使用者收藏異動後，讓該使用者的收藏集合快取失效"""
+        favorites_cache.bump(f"user:{user_id}")
+
+    @staticmethod
+    def favorites_version(user_id: int) -> str:
+        """使用者收藏的版本（新增/移除時遞增，供 HTTP ETag 使用）"""
+        scope = f"user:{user_id}"
+        return "%d.%d" % favorites_cache.versions([scope])[scope]
+
+    @staticmethod
+    def _load_ids(user_id: int) -> List[int]:
+        """依收藏時間（新到舊）讀取收藏的餐廳 ID"""
+        query = """
+            SELECT restaurantID
+            FROM favorites
+            WHERE userID = ?
+            ORDER BY created_at DESC, restaurantID DESC
+        """
+        return [row['restaurantID'] for row in fetch_all(query, (user_id,))]
+
+    @staticmethod
+    def get_favorite_ids(user_id: int) -> FrozenSet[int]:
+        """
+        取得使用者收藏的餐廳 ID 集合（已快取）
+
+        供列表逐筆判斷 is_favorited 使用，成員檢查為 O(1)
+        """
+        if not driver_available():
+            return frozenset()
+
+        try:
+            return favorites_cache.get_or_load(
+                f"ids:{user_id}",
+                lambda: frozenset(FavoritesService._load_ids(user_id)),
+                (f"user:{user_id}",)
+            )
+        except DatabaseError as e:
+            ERROR_PRINT(f"[ERROR] 讀取收藏失敗: {e}")
+            return frozenset()
+
+    @staticmethod
+    def is_favorited(user_id: int, restaurant_id: int) -> bool:
+        """檢查餐廳是否已被使用者收藏"""
+        return restaurant_id in FavoritesService.get_favorite_ids(user_id)
+
+    @staticmethod
+    def get_favorite_restaurants(user_id: int, include_menus: bool = True) -> List[Restaurant]:
+        """
+        取得使用者收藏的餐廳（依收藏時間新到舊）
+
+        餐廳與菜單皆以批次查詢載入，不隨收藏數量逐筆查詢
+        """
+        if not driver_available():
+            return []
+
+        try:
+            restaurant_ids = FavoritesService._load_ids(user_id)
+        except DatabaseError as e:
+            ERROR_PRINT(f"[ERROR] 讀取收藏失敗: {e}")
+            return []
+
+        return RestaurantService.get_restaurants_by_ids(restaurant_ids, include_menus)
+
+    @staticmethod
+    def add_favorite(user_id: int, restaurant_id: int) -> bool:
+        """
+        新增收藏（已收藏時視為成功）
+
+        Returns:
+            是否成功
+        """
+        if not driver_available():
+            ERROR_PRINT("[ERROR] 資料庫驅動不可用")
+            return False
+
+        try:
+            # 不使用 INSERT IGNORE，以免餐廳不存在的外鍵錯誤也被忽略
+            execute(
+                """
+                INSERT INTO favorites (userID, restaurantID) VALUES (?, ?)
+                ON DUPLICATE KEY UPDATE userID = userID
+                """,
+                (user_id, restaurant_id)
+            )
+        except DatabaseError as e:
+            ERROR_PRINT(f"[ERROR] 新增收藏失敗: {e}")
+            return False
+
+        FavoritesService.invalidate_user_cache(user_id)
+        return True
+
+    @staticmethod
+    def remove_favorite(user_id: int, restaurant_id: int) -> bool:
+        """
+        移除收藏（未收藏時視為成功）
+
+        Returns:
+            是否成功
+        """
+        if not driver_available():
+            ERROR_PRINT("[ERROR] 資料庫驅動不可用")
+            return False
+
+        try:
+            execute(
+                "DELETE FROM favorites WHERE userID = ? AND restaurantID = ?",
+                (user_id, restaurant_id)
+            )
+        except DatabaseError as e:
+            ERROR_PRINT(f"[ERROR] 移除收藏失敗: {e}")
+            return False
+
+        FavoritesService.invalidate_user_cache(user_id)
+        return True
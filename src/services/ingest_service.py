@@ -0,0 +1,275 @@
+"""
+目錄資料匯入服務
+以串流方式讀取 restaurants.csv / menu_items.csv（以及壓測資料集的 users / diet_logs / reviews），
+分批 executemany 寫入 MariaDB
+
+- 每批在同一個交易中寫入並 commit，失敗時只回滾該批
+- 以主鍵 upsert（INSERT ... ON DUPLICATE KEY UPDATE），重複匯入同一份檔案不會產生重複資料
+- CSV 沒有 restaurantID / itemID 欄位時，以資料列順序（從 1 起算，加上 id_offset）作為 ID，
+  與 dataset/app.py 產生的 menu_items.restaurantID（餐廳列順序 + 1）一致
+"""
+
+import csv
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from services.db import transaction, driver_available, DatabaseError
+from utils.debug import ERROR_PRINT
+
+# 每批寫入的資料列數
+DEFAULT_BATCH_SIZE = 1000
+
+_UPSERT_RESTAURANTS_QUERY = """
+    INSERT INTO restaurants
+        (restaurantID, name, address, averageRating, priceRange, foodType, vegetarianOption)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON DUPLICATE KEY UPDATE
+        name = VALUES(name),
+        address = VALUES(address),
+        averageRating = VALUES(averageRating),
+        priceRange = VALUES(priceRange),
+        foodType = VALUES(foodType),
+        vegetarianOption = VALUES(vegetarianOption)
+"""
+
+_UPSERT_MENU_ITEMS_QUERY = """
+    INSERT INTO menu_items
+        (itemID, restaurantID, name, description, price, calories, protein, carbs, fat)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON DUPLICATE KEY UPDATE
+        restaurantID = VALUES(restaurantID),
+        name = VALUES(name),
+        description = VALUES(description),
+        price = VALUES(price),
+        calories = VALUES(calories),
+        protein = VALUES(protein),
+        carbs = VALUES(carbs),
+        fat = VALUES(fat)
+"""
+
+_UPSERT_USERS_QUERY = """
+    INSERT INTO users
+        (userID, username, hashedPassword, mode, budget, targetCalories, targetProtein, targetFat)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON DUPLICATE KEY UPDATE
+        username = VALUES(username),
+        hashedPassword = VALUES(hashedPassword),
+        mode = VALUES(mode),
+        budget = VALUES(budget),
+        targetCalories = VALUES(targetCalories),
+        targetProtein = VALUES(targetProtein),
+        targetFat = VALUES(targetFat)
+"""
+
+_UPSERT_DIET_LOGS_QUERY = """
+    INSERT INTO diet_logs (logID, userID, itemID, timestamp, portionSize)
+    VALUES (?, ?, ?, ?, ?)
+    ON DUPLICATE KEY UPDATE
+        userID = VALUES(userID),
+        itemID = VALUES(itemID),
+        timestamp = VALUES(timestamp),
+        portionSize = VALUES(portionSize)
+"""
+
+_UPSERT_REVIEWS_QUERY = """
+    INSERT INTO reviews (reviewID, restaurantID, userID, rating, comment, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON DUPLICATE KEY UPDATE
+        restaurantID = VALUES(restaurantID),
+        userID = VALUES(userID),
+        rating = VALUES(rating),
+        comment = VALUES(comment),
+        timestamp = VALUES(timestamp)
+"""
+
+
+@dataclass
+class IngestResult:
+    """匯入結果"""
+    table: str
+    rows: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    seconds: float = 0.0
+    restaurant_ids: Set[int] = field(default_factory=set)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def _optional(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip()
+    return value or None
+
+
+def _number(value: Optional[str], cast: Callable[[str], Any]) -> Any:
+    value = _optional(value)
+    return cast(value) if value is not None else None
+
+
+def _restaurant_row(row: Dict[str, str], row_id: int) -> Tuple:
+    return (
+        _number(row.get("restaurantID"), int) or row_id,
+        row["name"].strip(),
+        _optional(row.get("address")),
+        _number(row.get("averageRating"), float) or 0,
+        _number(row.get("priceRange"), int),
+        _optional(row.get("foodType")),
+        _optional(row.get("vegetarianOption")),
+    )
+
+
+def _menu_item_row(row: Dict[str, str], row_id: int) -> Tuple:
+    return (
+        _number(row.get("itemID"), int) or row_id,
+        int(row["restaurantID"]),
+        row["name"].strip(),
+        _optional(row.get("description")),
+        _number(row.get("price"), float) or 0,
+        _number(row.get("calories"), lambda v: int(float(v))),
+        _number(row.get("protein"), float),
+        _number(row.get("carbs"), float),
+        _number(row.get("fat"), float),
+    )
+
+
+def _user_row(row: Dict[str, str], row_id: int) -> Tuple:
+    return (
+        _number(row.get("userID"), int) or row_id,
+        row["username"].strip(),
+        row["hashedPassword"],
+        _optional(row.get("mode")) or "NORMAL",
+        _number(row.get("budget"), float) or 0,
+        _number(row.get("targetCalories"), int),
+        _number(row.get("targetProtein"), float),
+        _number(row.get("targetFat"), float),
+    )
+
+
+def _diet_log_row(row: Dict[str, str], row_id: int) -> Tuple:
+    return (
+        _number(row.get("logID"), int) or row_id,
+        int(row["userID"]),
+        int(row["itemID"]),
+        row["timestamp"].strip(),
+        _number(row.get("portionSize"), float) or 1.0,
+    )
+
+
+def _review_row(row: Dict[str, str], row_id: int) -> Tuple:
+    return (
+        _number(row.get("reviewID"), int) or row_id,
+        int(row["restaurantID"]),
+        int(row["userID"]),
+        int(row["rating"]),
+        _optional(row.get("comment")),
+        row["timestamp"].strip(),
+    )
+
+
+def _read_batches(path: str, convert: Callable[[Dict[str, str], int], Tuple],
+                  batch_size: int, id_offset: int) -> Iterator[List[Tuple]]:
+    """逐列讀取 CSV 並分批返回（不會一次讀入整個檔案）"""
+    # utf-8-sig：dataset/app.py 產生的檔案帶有 BOM
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        batch: List[Tuple] = []
+        for line_number, row in enumerate(csv.DictReader(f), start=1):
+            try:
+                batch.append(convert(row, id_offset + line_number))
+            except (KeyError, ValueError, AttributeError) as e:
+                raise ValueError(f"{path} 第 {line_number + 1} 行格式錯誤: {e}") from e
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _ingest(table: str, path: str, query: str, convert: Callable[[Dict[str, str], int], Tuple],
+            restaurant_index: Optional[int], batch_size: int, id_offset: int,
+            progress: Optional[Callable[[IngestResult], None]]) -> IngestResult:
+    result = IngestResult(table=table)
+    if not driver_available():
+        ERROR_PRINT("[ERROR] 資料庫驅動不可用")
+        return result
+
+    started = time.perf_counter()
+    for batch in _read_batches(path, convert, max(1, batch_size), id_offset):
+        try:
+            with transaction() as cursor:
+                cursor.executemany(query, batch)
+        except DatabaseError as e:
+            ERROR_PRINT(f"[ERROR] 匯入 {table} 第 {result.batches + 1} 批失敗: {e}")
+            result.failed_batches += 1
+        else:
+            result.rows += len(batch)
+            if restaurant_index is not None:
+                result.restaurant_ids.update(row[restaurant_index] for row in batch)
+        result.batches += 1
+        result.seconds = time.perf_counter() - started
+        if progress:
+            progress(result)
+
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def ingest_restaurants(path: str, batch_size: int = DEFAULT_BATCH_SIZE, id_offset: int = 0,
+                       progress: Optional[Callable[[IngestResult], None]] = None) -> IngestResult:
+    """
+    匯入餐廳 CSV（欄位：[restaurantID,] name, address, averageRating, priceRange, foodType, vegetarianOption）
+
+    Args:
+        path: CSV 路徑
+        batch_size: 每批（每個交易）寫入的資料列數
+        id_offset: CSV 沒有 restaurantID 欄位時，ID 為 id_offset + 列號
+        progress: 每批完成後呼叫，用於顯示進度
+    """
+    return _ingest("restaurants", path, _UPSERT_RESTAURANTS_QUERY, _restaurant_row,
+                   0, batch_size, id_offset, progress)
+
+
+def ingest_menu_items(path: str, batch_size: int = DEFAULT_BATCH_SIZE, id_offset: int = 0,
+                      progress: Optional[Callable[[IngestResult], None]] = None) -> IngestResult:
+    """
+    匯入菜單 CSV（欄位：[itemID,] restaurantID, name, description, price, calories, protein, carbs, fat）
+
+    參數同 ingest_restaurants；餐廳需已存在（外鍵），請先匯入 restaurants.csv
+    """
+    return _ingest("menu_items", path, _UPSERT_MENU_ITEMS_QUERY, _menu_item_row,
+                   1, batch_size, id_offset, progress)
+
+
+def ingest_users(path: str, batch_size: int = DEFAULT_BATCH_SIZE, id_offset: int = 0,
+                 progress: Optional[Callable[[IngestResult], None]] = None) -> IngestResult:
+    """
+    匯入使用者 CSV（欄位：[userID,] username, hashedPassword, mode, budget, targetCalories, targetProtein, targetFat）
+
+    參數同 ingest_restaurants
+    """
+    return _ingest("users", path, _UPSERT_USERS_QUERY, _user_row,
+                   None, batch_size, id_offset, progress)
+
+
+def ingest_diet_logs(path: str, batch_size: int = DEFAULT_BATCH_SIZE, id_offset: int = 0,
+                     progress: Optional[Callable[[IngestResult], None]] = None) -> IngestResult:
+    """
+    匯入飲食紀錄 CSV（欄位：[logID,] userID, itemID, timestamp, portionSize）
+
+    參數同 ingest_restaurants；匯入後需重建 daily_nutrition
+    """
+    return _ingest("diet_logs", path, _UPSERT_DIET_LOGS_QUERY, _diet_log_row,
+                   None, batch_size, id_offset, progress)
+
+
+def ingest_reviews(path: str, batch_size: int = DEFAULT_BATCH_SIZE, id_offset: int = 0,
+                   progress: Optional[Callable[[IngestResult], None]] = None) -> IngestResult:
+    """
+    匯入評論 CSV（欄位：[reviewID,] restaurantID, userID, rating, comment, timestamp）
+
+    參數同 ingest_restaurants
+    """
+    return _ingest("reviews", path, _UPSERT_REVIEWS_QUERY, _review_row,
+                   None, batch_size, id_offset, progress)
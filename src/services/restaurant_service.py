@@ -3,11 +3,18 @@
 從資料庫讀取餐廳和菜單資料
 """
 
-from typing import List, Optional, Dict, Any
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass, field
 from services.db import fetch_all, fetch_one, execute, driver_available, DatabaseError
+from services.search_index import build_boolean_query
+from services.cache import VersionedCache, register_cache_type
+from utils.pagination import InvalidCursor, encode_cursor, decode_cursor
+from utils.debug import ERROR_PRINT, WARN_PRINT
 
 
+@register_cache_type
 @dataclass
 class MenuItem:
     """菜單項目"""
@@ -22,6 +29,7 @@ class MenuItem:
     fat: float = 0
 
 
+@register_cache_type
 @dataclass
 class Restaurant:
     """餐廳資料"""
@@ -35,6 +43,70 @@ class Restaurant:
     menu_items: List[MenuItem] = field(default_factory=list)
 
 
+# 關鍵字搜尋模式：'fulltext' 使用 restaurant_search 的 FULLTEXT 索引，'like' 為舊的 LIKE 掃描
+SEARCH_MODE_FULLTEXT = 'fulltext'
+SEARCH_MODE_LIKE = 'like'
+
+# 全文檢索不可用的錯誤碼：ER_NO_SUCH_TABLE（未執行 003 migration）、
+# ER_FT_MATCHING_KEY_NOT_FOUND（缺少 FULLTEXT 索引）；其他錯誤（連線中斷、連線池逾時）照常拋出
+_FULLTEXT_MISSING_ERRNOS = (1146, 1191)
+# 重新確認全文檢索索引是否可用的間隔（秒）：索引為空或資料表不存在時改走 LIKE，
+# 執行 migration 或 rebuild_search_index.py 之後不需重啟即可恢復
+FULLTEXT_RECHECK_INTERVAL = 60
+
+# 分頁查詢每頁最多筆數
+MAX_PAGE_SIZE = 200
+
+# 批次載入菜單時每次 IN (...) 最多帶入的餐廳數
+MENU_BATCH_SIZE = 500
+
+_MENU_COLUMNS = """
+    itemID, restaurantID, name, description, price,
+    calories, protein, carbs, fat
+"""
+
+
+def _row_to_restaurant(row: Dict[str, Any]) -> Restaurant:
+    """將資料列轉換為 Restaurant"""
+    return Restaurant(
+        restaurant_id=row['restaurantID'],
+        name=row['name'],
+        address=row['address'] or '',
+        average_rating=float(row['averageRating'] or 0),
+        price_range=int(row['priceRange'] or 1),
+        food_type=row['foodType'] or '',
+        vegetarian_option=row['vegetarianOption'] or '葷食',
+        menu_items=[]
+    )
+
+
+def _row_to_menu_item(row: Dict[str, Any]) -> MenuItem:
+    """將資料列轉換為 MenuItem"""
+    return MenuItem(
+        item_id=row['itemID'],
+        restaurant_id=row['restaurantID'],
+        name=row['name'],
+        price=float(row['price'] or 0),
+        description=row['description'] or '',
+        calories=int(row['calories'] or 0),
+        protein=float(row['protein'] or 0),
+        carbs=float(row['carbs'] or 0),
+        fat=float(row['fat'] or 0)
+    )
+
+
+# 目錄快取 TTL：資料約一天更新一次，可設長一些
+CATALOG_CACHE_TTL = 300
+
+# 目錄快取（read-through）：後端由 services.cache 設定，可在多個 worker 間共用
+# - 只快取成功的查詢結果；查詢拋出例外時不寫入
+# - 快取的物件為共用實例，呼叫端不應修改
+catalog_cache = VersionedCache('catalog', CATALOG_CACHE_TTL)
+
+# 列表、搜尋結果與菜單項目共用的 scope，任一餐廳異動都會使其失效
+_COLLECTIONS_SCOPE = 'collections'
+
+
 class RestaurantService:
     """餐廳資料庫服務"""
     
@@ -44,14 +116,123 @@ class RestaurantService:
         if not driver_available():
             return []
         
-        try:
+        def load():
             query = "SELECT restaurantID, name FROM restaurants ORDER BY name"
             rows = fetch_all(query)
             return [{'id': row['restaurantID'], 'name': row['name']} for row in rows]
+        
+        try:
+            return catalog_cache.get_or_load('restaurant_list', load, (_COLLECTIONS_SCOPE,))
         except DatabaseError as e:
-            print(f"[ERROR] 讀取餐廳列表失敗: {e}")
+            ERROR_PRINT(f"[ERROR] 讀取餐廳列表失敗: {e}")
             return []
 
+    @staticmethod
+    def invalidate_cache(restaurant_id: Optional[int] = None) -> None:
+        """
+        目錄資料異動後清除快取
+        
+        Args:
+            restaurant_id: 只清除與該餐廳相關的項目；None 表示清除整個目錄
+        """
+        if restaurant_id is None:
+            catalog_cache.bump()
+        else:
+            # 列表與搜尋結果可能包含該餐廳，一併失效
+            catalog_cache.bump(f'restaurant:{restaurant_id}')
+            catalog_cache.bump(_COLLECTIONS_SCOPE)
+
+    @staticmethod
+    def configure_cache(ttl: float) -> None:
+        """設定目錄快取的 TTL（秒）；為 0 時停用快取"""
+        catalog_cache.ttl = ttl
+
+    @staticmethod
+    def restaurant_versions(restaurant_ids: List[int]) -> Dict[int, Tuple[int, int]]:
+        """
+        批次取得餐廳的快取版本（與 invalidate_cache 同步遞增）
+
+        供衍生資料（例如預先序列化的 JSON）判斷是否需要重建
+        """
+        versions = catalog_cache.versions(f'restaurant:{rid}' for rid in restaurant_ids)
+        return {rid: versions[f'restaurant:{rid}'] for rid in restaurant_ids}
+
+    @staticmethod
+    def catalog_epoch() -> Optional[int]:
+        """
+        目錄快取 TTL 的週期編號；快取停用時返回 None
+
+        未經 invalidate_cache 的資料變更（例如其他程序寫入資料庫）最晚在 TTL 後反映，
+        衍生資料以此週期輪替，不會比目錄快取更久
+        """
+        if catalog_cache.ttl <= 0:
+            return None
+        return int(time.time() // catalog_cache.ttl)
+
+    @staticmethod
+    def catalog_version(restaurant_id: Optional[int] = None) -> Optional[str]:
+        """
+        目錄資料版本（供 HTTP ETag 使用，不需查詢資料庫）
+
+        Args:
+            restaurant_id: 單一餐廳的版本；None 表示列表/搜尋的版本
+
+        Returns:
+            版本字串；快取停用時返回 None（無法得知資料是否變更）
+        """
+        epoch = RestaurantService.catalog_epoch()
+        if epoch is None:
+            return None
+        scope = _COLLECTIONS_SCOPE if restaurant_id is None else f'restaurant:{restaurant_id}'
+        namespace_version, scope_version = catalog_cache.versions([scope])[scope]
+        return f"{namespace_version}.{scope_version}.{epoch}"
+
+    @staticmethod
+    def cache_stats() -> Dict[str, Any]:
+        """取得目錄快取命中統計"""
+        return catalog_cache.stats()
+
+    @staticmethod
+    def load_menus(restaurant_ids: List[int]) -> Dict[int, List[MenuItem]]:
+        """
+        批次載入多間餐廳的菜單
+        
+        以 WHERE restaurantID IN (...) 一次查詢（每批最多 MENU_BATCH_SIZE 間），
+        再於 Python 端依餐廳分組，避免每間餐廳各查一次（N+1）。
+        
+        Args:
+            restaurant_ids: 餐廳 ID 列表
+            
+        Returns:
+            {restaurant_id: [MenuItem, ...]}，沒有菜單的餐廳不會出現在結果中
+        """
+        menus: Dict[int, List[MenuItem]] = {}
+        unique_ids = list(dict.fromkeys(restaurant_ids))
+        
+        for start in range(0, len(unique_ids), MENU_BATCH_SIZE):
+            batch = unique_ids[start:start + MENU_BATCH_SIZE]
+            placeholders = ','.join(['?' for _ in batch])
+            menu_query = f"""
+                SELECT {_MENU_COLUMNS}
+                FROM menu_items
+                WHERE restaurantID IN ({placeholders})
+                ORDER BY restaurantID, itemID
+            """
+            for menu_row in fetch_all(menu_query, tuple(batch)):
+                menus.setdefault(menu_row['restaurantID'], []).append(_row_to_menu_item(menu_row))
+        
+        return menus
+
+    @staticmethod
+    def _attach_menus(restaurants: List[Restaurant]) -> List[Restaurant]:
+        """為餐廳列表批次附加菜單"""
+        if not restaurants:
+            return restaurants
+        menus = RestaurantService.load_menus([r.restaurant_id for r in restaurants])
+        for restaurant in restaurants:
+            restaurant.menu_items = menus.get(restaurant.restaurant_id, [])
+        return restaurants
+
     @staticmethod
     def get_all_restaurants() -> List[Restaurant]:
         """取得所有餐廳（含菜單）"""
@@ -67,49 +248,13 @@ class RestaurantService:
                 ORDER BY averageRating DESC
             """
             rows = fetch_all(query)
+            restaurants = [_row_to_restaurant(row) for row in rows]
             
-            restaurants = []
-            for row in rows:
-                restaurant = Restaurant(
-                    restaurant_id=row['restaurantID'],
-                    name=row['name'],
-                    address=row['address'] or '',
-                    average_rating=float(row['averageRating'] or 0),
-                    price_range=int(row['priceRange'] or 1),
-                    food_type=row['foodType'] or '',
-                    vegetarian_option=row['vegetarianOption'] or '葷食',
-                    menu_items=[]
-                )
-                
-                # 查詢該餐廳的菜單
-                menu_query = """
-                    SELECT itemID, restaurantID, name, description, price,
-                           calories, protein, carbs, fat
-                    FROM menu_items
-                    WHERE restaurantID = ?
-                """
-                menu_rows = fetch_all(menu_query, (restaurant.restaurant_id,))
-                
-                for menu_row in menu_rows:
-                    menu_item = MenuItem(
-                        item_id=menu_row['itemID'],
-                        restaurant_id=menu_row['restaurantID'],
-                        name=menu_row['name'],
-                        price=float(menu_row['price'] or 0),
-                        description=menu_row['description'] or '',
-                        calories=int(menu_row['calories'] or 0),
-                        protein=float(menu_row['protein'] or 0),
-                        carbs=float(menu_row['carbs'] or 0),
-                        fat=float(menu_row['fat'] or 0)
-                    )
-                    restaurant.menu_items.append(menu_item)
-                
-                restaurants.append(restaurant)
-            
-            return restaurants
+            # 一次載入所有餐廳的菜單
+            return RestaurantService._attach_menus(restaurants)
             
         except DatabaseError as e:
-            print(f"[ERROR] 讀取餐廳資料失敗: {e}")
+            ERROR_PRINT(f"[ERROR] 讀取餐廳資料失敗: {e}")
             return []
     
     @staticmethod
@@ -118,7 +263,7 @@ class RestaurantService:
         if not driver_available():
             return None
         
-        try:
+        def load():
             query = """
                 SELECT restaurantID, name, address, averageRating,
                        priceRange, foodType, vegetarianOption
@@ -130,142 +275,281 @@ class RestaurantService:
             if not row:
                 return None
             
-            restaurant = Restaurant(
-                restaurant_id=row['restaurantID'],
-                name=row['name'],
-                address=row['address'] or '',
-                average_rating=float(row['averageRating'] or 0),
-                price_range=int(row['priceRange'] or 1),
-                food_type=row['foodType'] or '',
-                vegetarian_option=row['vegetarianOption'] or '葷食',
-                menu_items=[]
-            )
-            
-            # 查詢菜單
-            menu_query = """
-                SELECT itemID, restaurantID, name, description, price,
-                       calories, protein, carbs, fat
-                FROM menu_items
-                WHERE restaurantID = ?
-            """
-            menu_rows = fetch_all(menu_query, (restaurant_id,))
-            
-            for menu_row in menu_rows:
-                menu_item = MenuItem(
-                    item_id=menu_row['itemID'],
-                    restaurant_id=menu_row['restaurantID'],
-                    name=menu_row['name'],
-                    price=float(menu_row['price'] or 0),
-                    description=menu_row['description'] or '',
-                    calories=int(menu_row['calories'] or 0),
-                    protein=float(menu_row['protein'] or 0),
-                    carbs=float(menu_row['carbs'] or 0),
-                    fat=float(menu_row['fat'] or 0)
-                )
-                restaurant.menu_items.append(menu_item)
-            
+            restaurant = _row_to_restaurant(row)
+            RestaurantService._attach_menus([restaurant])
             return restaurant
-            
+        
+        try:
+            return catalog_cache.get_or_load(
+                f'restaurant:{restaurant_id}', load, (f'restaurant:{restaurant_id}',)
+            )
         except DatabaseError as e:
-            print(f"[ERROR] 讀取餐廳資料失敗: {e}")
+            ERROR_PRINT(f"[ERROR] 讀取餐廳資料失敗: {e}")
             return None
-    
+
+    @staticmethod
+    def get_restaurants_by_ids(restaurant_ids: List[int], include_menus: bool = True) -> List[Restaurant]:
+        """
+        批次取得多間餐廳
+
+        以 WHERE restaurantID IN (...) 查詢（每批最多 MENU_BATCH_SIZE 間），
+        菜單同樣以批次載入；結果依傳入的 ID 順序排列，不存在的 ID 略過。
+        """
+        if not driver_available() or not restaurant_ids:
+            return []
+
+        unique_ids = list(dict.fromkeys(restaurant_ids))
+        try:
+            found: Dict[int, Restaurant] = {}
+            for start in range(0, len(unique_ids), MENU_BATCH_SIZE):
+                batch = unique_ids[start:start + MENU_BATCH_SIZE]
+                placeholders = ','.join(['?' for _ in batch])
+                query = f"""
+                    SELECT restaurantID, name, address, averageRating,
+                           priceRange, foodType, vegetarianOption
+                    FROM restaurants
+                    WHERE restaurantID IN ({placeholders})
+                """
+                for row in fetch_all(query, tuple(batch)):
+                    found[row['restaurantID']] = _row_to_restaurant(row)
+
+            restaurants = [found[rid] for rid in unique_ids if rid in found]
+            if include_menus:
+                RestaurantService._attach_menus(restaurants)
+            return restaurants
+
+        except DatabaseError as e:
+            ERROR_PRINT(f"[ERROR] 批次讀取餐廳資料失敗: {e}")
+            return []
+
+    # 全文檢索索引不可用（資料表不存在或尚未建立索引內容）時為 False，改走 LIKE；
+    # 每 FULLTEXT_RECHECK_INTERVAL 秒重新確認
+    fulltext_available = True
+    _fulltext_checked_at: Optional[float] = None
+
+    @staticmethod
+    def _fulltext_ready() -> bool:
+        """確認 restaurant_search 存在且有內容（結果保留 FULLTEXT_RECHECK_INTERVAL 秒）"""
+        now = time.monotonic()
+        checked_at = RestaurantService._fulltext_checked_at
+        if checked_at is not None and now - checked_at < FULLTEXT_RECHECK_INTERVAL:
+            return RestaurantService.fulltext_available
+        RestaurantService._fulltext_checked_at = now
+        try:
+            ready = fetch_one("SELECT 1 AS found FROM restaurant_search LIMIT 1") is not None
+            if not ready:
+                WARN_PRINT("[WARN] 全文檢索索引尚無資料（請執行 src/scripts/rebuild_search_index.py），改用 LIKE 搜尋")
+        except DatabaseError as e:
+            if e.errno not in _FULLTEXT_MISSING_ERRNOS:
+                # 暫時性錯誤：沿用先前的狀態，下次請求再確認
+                RestaurantService._fulltext_checked_at = checked_at
+                raise
+            WARN_PRINT(f"[WARN] 全文檢索不可用，改用 LIKE 搜尋: {e}")
+            ready = False
+        RestaurantService.fulltext_available = ready
+        return ready
+
     @staticmethod
     def search_restaurants(
         keyword: Optional[str] = None,
         categories: Optional[List[str]] = None,
         price_range: Optional[int] = None,
-        vegetarian: bool = False
+        vegetarian: bool = False,
+        search_mode: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        include_menus: bool = True
     ) -> List[Restaurant]:
-        """搜尋餐廳"""
+        """
+        搜尋餐廳
+        
+        有關鍵字時預設使用全文檢索（依相關度、評分排序），
+        無法產生全文檢索查詢或索引不可用時退回 LIKE 比對。
+        需要下一頁游標時請使用 search_restaurants_page。
+        
+        Args:
+            search_mode: 強制指定 'fulltext' 或 'like'；None 表示自動選擇
+            limit: 每頁筆數；None 表示不分頁
+            cursor: 上一頁返回的 next_cursor
+            include_menus: False 時不查詢菜單（menu_items 為空列表）
+        """
+        return RestaurantService.search_restaurants_page(
+            keyword, categories, price_range, vegetarian, search_mode, limit, cursor, include_menus
+        )[0]
+    
+    @staticmethod
+    def search_restaurants_page(
+        keyword: Optional[str] = None,
+        categories: Optional[List[str]] = None,
+        price_range: Optional[int] = None,
+        vegetarian: bool = False,
+        search_mode: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        include_menus: bool = True
+    ) -> Tuple[List[Restaurant], Optional[str]]:
+        """
+        搜尋餐廳（keyset 分頁）
+        
+        分頁時依 (averageRating, restaurantID) 由高到低排序，
+        以游標位置接續查詢，查詢成本不隨頁數增加；
+        不分頁（limit 為 None）的關鍵字搜尋仍依相關度排序。
+        include_menus 為 False 時只查詢餐廳本身（摘要模式），不讀取 menu_items。
+        
+        Returns:
+            (餐廳列表, 下一頁游標；沒有下一頁時為 None)
+            
+        Raises:
+            InvalidCursor: 游標格式錯誤，或提供游標但未指定 limit
+        """
+        if limit is not None:
+            limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        position = decode_cursor(cursor, 2)
+        if position is not None:
+            if limit is None:
+                raise InvalidCursor("使用分頁游標時必須指定 limit")
+            try:
+                # 評分欄位為 DECIMAL(3,1)（sql/007），游標值以 Decimal 帶入才能精確比較
+                position = (Decimal(str(position[0])).quantize(Decimal('0.1')), int(position[1]))
+            except (ArithmeticError, TypeError, ValueError) as exc:
+                raise InvalidCursor("無效的分頁游標") from exc
+        
         if not driver_available():
-            return []
+            return [], None
         
+        key = 'search:' + repr((
+            keyword, sorted(categories or []), price_range, vegetarian, search_mode, limit, position,
+            include_menus
+        ))
         try:
-            # 建立動態查詢
-            conditions = []
-            params = []
-            
+            return catalog_cache.get_or_load(
+                key,
+                lambda: RestaurantService._query_restaurants(
+                    keyword, categories, price_range, vegetarian, search_mode, limit, position,
+                    include_menus
+                ),
+                (_COLLECTIONS_SCOPE,)
+            )
+        except DatabaseError as e:
+            ERROR_PRINT(f"[ERROR] 搜尋餐廳失敗: {e}")
+            return [], None
+    
+    @staticmethod
+    def _query_restaurants(
+        keyword: Optional[str],
+        categories: Optional[List[str]],
+        price_range: Optional[int],
+        vegetarian: bool,
+        search_mode: Optional[str],
+        limit: Optional[int] = None,
+        position: Optional[Tuple[Any, ...]] = None,
+        include_menus: bool = True
+    ) -> Tuple[List[Restaurant], Optional[str]]:
+        """執行搜尋查詢（不經快取，錯誤以 DatabaseError 拋出）"""
+        # 建立動態查詢
+        conditions = []
+        params = []
+        select_extra = ""
+        select_params = []
+        order_by = "r.averageRating DESC"
+        
+        fulltext_query = None
+        if keyword and search_mode != SEARCH_MODE_LIKE and (
+            search_mode == SEARCH_MODE_FULLTEXT or RestaurantService._fulltext_ready()
+        ):
+            fulltext_query = build_boolean_query(keyword)
+        
+        if fulltext_query:
+            # 餐廳名稱命中的權重高於菜名
+            base_query = """
+                SELECT r.restaurantID, r.name, r.address, r.averageRating,
+                       r.priceRange, r.foodType, r.vegetarianOption{select_extra}
+                FROM restaurants r
+                JOIN restaurant_search s ON s.restaurantID = r.restaurantID
+                WHERE 1=1
+            """
+            conditions.append("MATCH(s.nameTokens, s.menuTokens) AGAINST(? IN BOOLEAN MODE)")
+            params.append(fulltext_query)
+            # 不分頁時依相關度排序（分頁時改用 keyset 排序鍵）
+            if limit is None:
+                select_extra = """,
+                       (2 * MATCH(s.nameTokens) AGAINST(? IN BOOLEAN MODE)
+                        + MATCH(s.menuTokens) AGAINST(? IN BOOLEAN MODE)) AS relevance"""
+                select_params = [fulltext_query, fulltext_query]
+                order_by = "relevance DESC, r.averageRating DESC"
+        else:
             base_query = """
                 SELECT DISTINCT r.restaurantID, r.name, r.address, r.averageRating,
-                       r.priceRange, r.foodType, r.vegetarianOption
+                       r.priceRange, r.foodType, r.vegetarianOption{select_extra}
                 FROM restaurants r
                 LEFT JOIN menu_items m ON r.restaurantID = m.restaurantID
                 WHERE 1=1
             """
-            
             # 關鍵字搜尋（餐廳名稱或菜單名稱）
             if keyword:
                 conditions.append("(r.name LIKE ? OR m.name LIKE ?)")
                 params.extend([f"%{keyword}%", f"%{keyword}%"])
-            
-            # 類別篩選
-            if categories and len(categories) > 0:
-                placeholders = ','.join(['?' for _ in categories])
-                conditions.append(f"r.foodType IN ({placeholders})")
-                params.extend(categories)
-            
-            # 價格範圍篩選（精確匹配）
-            if price_range is not None:
-                conditions.append("r.priceRange = ?")
-                params.append(price_range)
-            
-            # 素食篩選
-            if vegetarian:
-                conditions.append("r.vegetarianOption IN ('全素', '蛋奶素')")
-            
-            # 組合查詢
-            if conditions:
-                base_query += " AND " + " AND ".join(conditions)
-            
-            base_query += " ORDER BY r.averageRating DESC"
-            
-            rows = fetch_all(base_query, tuple(params))
-            
-            # 組裝結果
-            restaurants = []
-            for row in rows:
-                restaurant = Restaurant(
-                    restaurant_id=row['restaurantID'],
-                    name=row['name'],
-                    address=row['address'] or '',
-                    average_rating=float(row['averageRating'] or 0),
-                    price_range=int(row['priceRange'] or 1),
-                    food_type=row['foodType'] or '',
-                    vegetarian_option=row['vegetarianOption'] or '葷食',
-                    menu_items=[]
+        
+        # 類別篩選
+        if categories and len(categories) > 0:
+            placeholders = ','.join(['?' for _ in categories])
+            conditions.append(f"r.foodType IN ({placeholders})")
+            params.extend(categories)
+        
+        # 價格範圍篩選（精確匹配）
+        if price_range is not None:
+            conditions.append("r.priceRange = ?")
+            params.append(price_range)
+        
+        # 素食篩選
+        if vegetarian:
+            conditions.append("r.vegetarianOption IN ('全素', '蛋奶素')")
+        
+        # 分頁：從游標位置之後開始（keyset）
+        # averageRating 需為 DECIMAL NOT NULL（sql/007）；FLOAT 與游標值的等值比較不會成立，NULL 不參與比較
+        if limit is not None:
+            order_by = "r.averageRating DESC, r.restaurantID DESC"
+            if position is not None:
+                conditions.append(
+                    "(r.averageRating < ? OR (r.averageRating = ? AND r.restaurantID < ?))"
                 )
-                
-                # 查詢菜單
-                menu_query = """
-                    SELECT itemID, restaurantID, name, description, price,
-                           calories, protein, carbs, fat
-                    FROM menu_items
-                    WHERE restaurantID = ?
-                """
-                menu_rows = fetch_all(menu_query, (restaurant.restaurant_id,))
-                
-                for menu_row in menu_rows:
-                    menu_item = MenuItem(
-                        item_id=menu_row['itemID'],
-                        restaurant_id=menu_row['restaurantID'],
-                        name=menu_row['name'],
-                        price=float(menu_row['price'] or 0),
-                        description=menu_row['description'] or '',
-                        calories=int(menu_row['calories'] or 0),
-                        protein=float(menu_row['protein'] or 0),
-                        carbs=float(menu_row['carbs'] or 0),
-                        fat=float(menu_row['fat'] or 0)
-                    )
-                    restaurant.menu_items.append(menu_item)
-                
-                restaurants.append(restaurant)
-            
-            return restaurants
-            
+                params.extend([position[0], position[0], position[1]])
+        
+        # 組合查詢
+        base_query = base_query.format(select_extra=select_extra)
+        if conditions:
+            base_query += " AND " + " AND ".join(conditions)
+        
+        base_query += f" ORDER BY {order_by}"
+        if limit is not None:
+            # 多取一筆以判斷是否還有下一頁
+            base_query += " LIMIT ?"
+            params.append(limit + 1)
+        
+        try:
+            rows = fetch_all(base_query, tuple(select_params + params))
         except DatabaseError as e:
-            print(f"[ERROR] 搜尋餐廳失敗: {e}")
-            return []
+            if not fulltext_query or search_mode == SEARCH_MODE_FULLTEXT or e.errno not in _FULLTEXT_MISSING_ERRNOS:
+                raise
+            WARN_PRINT(f"[WARN] 全文檢索不可用，改用 LIKE 搜尋: {e}")
+            RestaurantService.fulltext_available = False
+            RestaurantService._fulltext_checked_at = time.monotonic()
+            return RestaurantService._query_restaurants(
+                keyword, categories, price_range, vegetarian, SEARCH_MODE_LIKE, limit, position,
+                include_menus
+            )
+        
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor((str(last['averageRating']), last['restaurantID']))
+        
+        # 組裝結果（菜單以單一批次查詢載入；摘要模式不查詢菜單）
+        restaurants = [_row_to_restaurant(row) for row in rows]
+        if include_menus:
+            RestaurantService._attach_menus(restaurants)
+        return restaurants, next_cursor
     
     @staticmethod
     def get_menu_item_by_id(item_id: int) -> Optional[MenuItem]:
@@ -273,10 +557,9 @@ class RestaurantService:
         if not driver_available():
             return None
         
-        try:
-            query = """
-                SELECT itemID, restaurantID, name, description, price,
-                       calories, protein, carbs, fat
+        def load():
+            query = f"""
+                SELECT {_MENU_COLUMNS}
                 FROM menu_items
                 WHERE itemID = ?
             """
@@ -285,18 +568,10 @@ class RestaurantService:
             if not row:
                 return None
             
-            return MenuItem(
-                item_id=row['itemID'],
-                restaurant_id=row['restaurantID'],
-                name=row['name'],
-                price=float(row['price'] or 0),
-                description=row['description'] or '',
-                calories=int(row['calories'] or 0),
-                protein=float(row['protein'] or 0),
-                carbs=float(row['carbs'] or 0),
-                fat=float(row['fat'] or 0)
-            )
-            
+            return _row_to_menu_item(row)
+        
+        try:
+            return catalog_cache.get_or_load(f'menu_item:{item_id}', load, (_COLLECTIONS_SCOPE,))
         except DatabaseError as e:
-            print(f"[ERROR] 讀取菜單項目失敗: {e}")
+            ERROR_PRINT(f"[ERROR] 讀取菜單項目失敗: {e}")
             return None
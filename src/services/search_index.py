@@ -0,0 +1,145 @@
+"""
+全文檢索索引服務
+維護 restaurant_search 資料表（FULLTEXT 索引），供關鍵字搜尋使用
+
+MariaDB 的 InnoDB FULLTEXT 沒有 ngram parser，且預設 innodb_ft_min_token_size=3
+會忽略兩個字的中文詞，因此斷詞在 Python 端完成：
+    - 中文連續字串切成 bigram（最後一個字另外保留 unigram，單字查詢才找得到）
+    - 英數字以單字為單位
+    - 每個 token 以 "t" + UTF-8 十六進位編碼，長度固定 >= 3 且只含英數字，
+      不受 stopword 與最小長度設定影響，前綴查詢（*）也能直接套用
+
+索引不會隨 restaurants / menu_items 自動更新：
+    - scripts/ingest_catalog.py 匯入後會重建受影響的餐廳
+    - 其他寫入（SQL.sh、手動 SQL、後台編輯）後需執行 scripts/rebuild_search_index.py，
+      或以 rebuild_search_index([restaurantID, ...]) 只重建異動的餐廳；
+      在那之前關鍵字搜尋仍依舊的名稱 / 菜名比對（新增的餐廳搜尋不到）
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+from services.db import fetch_all, get_connection, driver_available, DatabaseError
+from utils.debug import ERROR_PRINT
+
+# 中日韓統一表意文字（含擴充 A 與相容字）
+_CJK_CHARS = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_RE = re.compile(f"[{_CJK_CHARS}]+|[0-9a-z]+")
+_CJK_RE = re.compile(f"[{_CJK_CHARS}]")
+
+# innodb_ft_max_token_size 預設 84，編碼後長度為 1 + 2 * bytes
+_MAX_WORD_LENGTH = 40
+
+# 重建索引時每批寫入的餐廳數
+REBUILD_BATCH_SIZE = 500
+
+
+def _encode(token: str) -> str:
+    """將 token 編碼為 FULLTEXT 可索引的英數字字串"""
+    return "t" + token.encode("utf-8").hex()
+
+
+def _split(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def tokenize(text: str) -> List[str]:
+    """將文字轉為索引用 token 列表（保持原順序，供片語查詢使用）"""
+    tokens: List[str] = []
+    for run in _split(text):
+        if _CJK_RE.match(run):
+            if len(run) > 1:
+                tokens.extend(_encode(run[i:i + 2]) for i in range(len(run) - 1))
+            tokens.append(_encode(run[-1]))
+        else:
+            tokens.append(_encode(run[:_MAX_WORD_LENGTH]))
+    return tokens
+
+
+def build_boolean_query(keyword: str) -> Optional[str]:
+    """
+    將使用者關鍵字轉為 BOOLEAN MODE 查詢字串
+
+    - 兩字以上的中文：bigram 片語（"..."），等同子字串比對
+    - 單一中文字：前綴查詢，可比對 unigram 與以該字開頭的 bigram
+    - 英數字：單字前綴查詢
+
+    Returns:
+        查詢字串；關鍵字沒有可索引的內容時返回 None（應改用 LIKE）
+    """
+    clauses = []
+    for run in _split(keyword):
+        if _CJK_RE.match(run) and len(run) > 1:
+            bigrams = [_encode(run[i:i + 2]) for i in range(len(run) - 1)]
+            clauses.append('+"' + " ".join(bigrams) + '"')
+        else:
+            clauses.append(f"+{_encode(run[:_MAX_WORD_LENGTH])}*")
+    return " ".join(clauses) if clauses else None
+
+
+def rebuild_search_index(restaurant_ids: Optional[List[int]] = None) -> int:
+    """
+    重建全文檢索索引
+
+    Args:
+        restaurant_ids: 只重建指定餐廳；None 表示全部重建
+
+    Returns:
+        寫入的餐廳數
+    """
+    if not driver_available():
+        return 0
+
+    try:
+        if restaurant_ids is None:
+            rows = fetch_all("SELECT restaurantID, name FROM restaurants")
+        else:
+            rows = []
+            for start in range(0, len(restaurant_ids), REBUILD_BATCH_SIZE):
+                batch = restaurant_ids[start:start + REBUILD_BATCH_SIZE]
+                placeholders = ",".join(["?" for _ in batch])
+                rows.extend(fetch_all(
+                    f"SELECT restaurantID, name FROM restaurants WHERE restaurantID IN ({placeholders})",
+                    tuple(batch),
+                ))
+
+        written = 0
+        for start in range(0, len(rows), REBUILD_BATCH_SIZE):
+            batch = rows[start:start + REBUILD_BATCH_SIZE]
+            ids = [row["restaurantID"] for row in batch]
+            placeholders = ",".join(["?" for _ in ids])
+            menu_names: Dict[int, List[str]] = {}
+            for menu_row in fetch_all(
+                f"SELECT restaurantID, name FROM menu_items WHERE restaurantID IN ({placeholders})",
+                tuple(ids),
+            ):
+                menu_names.setdefault(menu_row["restaurantID"], []).append(menu_row["name"])
+
+            values: List[Tuple[int, str, str]] = [
+                (
+                    row["restaurantID"],
+                    " ".join(tokenize(row["name"])),
+                    # 菜色之間不會產生跨菜名的 bigram，片語查詢不會誤跨兩道菜
+                    " ".join(" ".join(tokenize(name)) for name in menu_names.get(row["restaurantID"], [])),
+                )
+                for row in batch
+            ]
+
+            with get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.executemany(
+                    """
+                    REPLACE INTO restaurant_search (restaurantID, nameTokens, menuTokens)
+                    VALUES (?, ?, ?)
+                    """,
+                    values,
+                )
+                conn.commit()
+                cursor.close()
+            written += len(values)
+
+        return written
+
+    except DatabaseError as e:
+        ERROR_PRINT(f"[ERROR] 重建全文檢索索引失敗: {e}")
+        return 0
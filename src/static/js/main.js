@@ -117,6 +117,8 @@ document.addEventListener('DOMContentLoaded', () => {
             if (filters.price) params.append('price', filters.price);
             if (filters.vegetarian) params.append('vegetarian', 'true');
             params.append('user_id', currentUserId);
+            // 列表不顯示菜單，只取摘要；菜單在詳細頁另外載入
+            params.append('view', 'summary');
 
             const response = await fetch(`${API_BASE}/stores?${params.toString()}`);
             const result = await response.json();
@@ -725,6 +727,21 @@ document.addEventListener('DOMContentLoaded', () => {
         renderCalendar(currentMonth);
     }
 
+    // 卡片圖片：有縮圖時使用 <picture>（WebP 優先），否則使用原圖
+    function renderStoreImage(store) {
+        const imgSet = store.heroImgSet;
+        const fallback = store.heroImg || 'placeholder-store-1.jpg';
+        if (!imgSet || !imgSet.srcset) {
+            return `<img src="${imgSet?.src || fallback}" alt="${store.name}" loading="lazy">`;
+        }
+        const sizes = '(max-width: 480px) 100vw, 320px';
+        return `
+                <picture>
+                    ${imgSet.webpSrcset ? `<source type="image/webp" srcset="${imgSet.webpSrcset}" sizes="${sizes}">` : ''}
+                    <img src="${imgSet.src}" srcset="${imgSet.srcset}" sizes="${sizes}" alt="${store.name}" loading="lazy">
+                </picture>`;
+    }
+
     function renderStoreList(stores) {
         // Ensure storeListContainer exists before trying to access innerHTML
         const container = document.getElementById('store-list-container') || storeListContainer;
@@ -747,7 +764,7 @@ document.addEventListener('DOMContentLoaded', () => {
             card.setAttribute('data-store-id', store.id || store.restaurant_id);
 
             card.innerHTML = `
-                <img src="${store.heroImg || 'placeholder-store-1.jpg'}" alt="${store.name}">
+                ${renderStoreImage(store)}
                 <div class="store-info">
                     <p class="store-name">${store.name}</p>
                     <span class="distance">${store.distance || '0.8 km'}</span>
@@ -838,7 +855,7 @@ document.addEventListener('DOMContentLoaded', () => {
             card.setAttribute('data-store-id', store.id || store.restaurant_id);
 
             card.innerHTML = `
-                <img src="${store.heroImg || 'placeholder-store-1.jpg'}" alt="${store.name}">
+                ${renderStoreImage(store)}
                 <div class="store-info">
                     <p class="store-name">${store.name}</p>
                     <span class="distance">${store.distance || '0.8 km'}</span>
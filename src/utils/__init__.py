@@ -10,6 +10,8 @@ from .debug import (
     is_debug_enabled,
     is_verbose_enabled,
 )
+from .pagination import encode_cursor, decode_cursor, InvalidCursor
+from .json_provider import configure_json
 
 __all__ = [
     "DEBUG_PRINT",
@@ -18,5 +20,9 @@ __all__ = [
     "INFO_PRINT",
     "is_debug_enabled",
     "is_verbose_enabled",
+    "encode_cursor",
+    "decode_cursor",
+    "InvalidCursor",
+    "configure_json",
 ]
 
@@ -0,0 +1,114 @@
+"""
+靜態檔案指紋
+依內容雜湊為 static 中的檔案產生帶指紋的網址，並以一年、immutable 的 Cache-Control 提供
+
+    js/main.js -> /static/js/main.3f2a1b9c0d.js
+
+- 啟動時掃描 static 建立 manifest（原檔名 <-> 指紋檔名），不需另外複製檔案
+- 樣板以 asset_url('js/main.js') 取得網址；內容變更後網址隨之改變，瀏覽器不需重新驗證
+- 除錯模式不加指紋，修改檔案後重新整理即可生效
+"""
+
+import hashlib
+import os
+from typing import Dict, Optional
+
+from flask import Flask, current_app, url_for
+
+from utils.startup import run_or_defer
+
+# 帶指紋檔案的快取時間（一年）
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# 檔名本身已含內容雜湊的資料夾（utils.images 產生），直接視為 immutable
+HASHED_DIRS = ("images/_variants/",)
+
+# 不加指紋的檔案（預先壓縮版本由原檔對應送出）
+_SKIP_SUFFIXES = (".gz", ".br", ".tmp")
+
+_manifest: Dict[str, str] = {}
+_reverse: Dict[str, str] = {}
+
+
+def _fingerprinted_name(relative: str, digest: str) -> str:
+    stem, ext = os.path.splitext(relative)
+    return f"{stem}.{digest}{ext}"
+
+
+def build_manifest(static_folder: str) -> Dict[str, str]:
+    """掃描 static，返回 {原始相對路徑: 帶指紋的相對路徑}"""
+    manifest: Dict[str, str] = {}
+    for root, _dirs, files in os.walk(static_folder):
+        for name in files:
+            if name.endswith(_SKIP_SUFFIXES):
+                continue
+            path = os.path.join(root, name)
+            relative = os.path.relpath(path, static_folder).replace(os.sep, "/")
+            if relative.startswith(HASHED_DIRS):
+                continue
+            with open(path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()[:10]
+            manifest[relative] = _fingerprinted_name(relative, digest)
+    return manifest
+
+
+def asset_manifest() -> Dict[str, str]:
+    """目前使用中的 manifest（唯讀）"""
+    return dict(_manifest)
+
+
+def asset_url(filename: str) -> str:
+    """
+    取得靜態檔案網址（樣板輔助函式）
+
+    manifest 中有的檔案返回帶指紋的網址，其餘與 url_for('static', ...) 相同
+    """
+    if current_app.debug:
+        # app.run(debug=True) 在建立應用程式之後才開啟除錯模式，因此於請求時判斷
+        return url_for("static", filename=filename)
+    return url_for("static", filename=_manifest.get(filename, filename))
+
+
+def _resolve(filename: str) -> Optional[str]:
+    """帶指紋的檔名轉回原始檔名；不是帶指紋的檔名時返回 None"""
+    return _reverse.get(filename)
+
+
+def init_assets(app: Flask) -> None:
+    """
+    建立 manifest（可延後，見 utils.startup）、註冊樣板輔助函式，並讓 static 路由辨識帶指紋的檔名
+
+    設定：
+        ASSET_FINGERPRINT: 是否啟用（除錯模式下 asset_url 不加指紋）
+    """
+    global _manifest, _reverse
+    app.add_template_global(asset_url, "asset_url")
+
+    if not app.static_folder or "static" not in app.view_functions:
+        return
+    if not app.config.get("ASSET_FINGERPRINT", True):
+        _manifest, _reverse = {}, {}
+        return
+
+    def _load_manifest():
+        global _manifest, _reverse
+        manifest = build_manifest(app.static_folder)
+        _reverse = {fingerprinted: original for original, fingerprinted in manifest.items()}
+        _manifest = manifest
+
+    # 雜湊所有靜態檔案是啟動時最耗時的步驟，STARTUP_MODE=lazy 時延後到第一個請求
+    run_or_defer(app, "assets", _load_manifest)
+
+    serve_static = app.view_functions["static"]
+
+    def static_with_fingerprint(filename):
+        original = _resolve(filename)
+        response = serve_static(filename=original or filename)
+        if response.status_code in (200, 304) and (original or filename.startswith(HASHED_DIRS)):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        return response
+
+    app.view_functions["static"] = static_with_fingerprint
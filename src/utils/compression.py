@@ -0,0 +1,204 @@
+"""
+回應壓縮
+為動態回應（JSON、HTML）加上 gzip / brotli 壓縮，靜態檔案則直接提供預先壓縮的版本
+
+- 只壓縮允許的 Content-Type，且超過最小大小的回應
+- 用戶端同時接受時優先使用 brotli（需安裝 brotli 套件），否則 gzip
+- 靜態檔案的 .br / .gz 版本由 scripts/precompress_static.py 產生（或啟動時產生），
+  請求時只需改送對應檔案，不必每次壓縮
+"""
+
+import gzip
+import mimetypes
+import os
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import Flask, Response, request, send_from_directory
+
+from utils.debug import WARN_PRINT
+from utils.startup import run_or_defer
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - 依安裝環境而定
+    brotli = None
+
+# 允許壓縮的 Content-Type（不含 charset）
+COMPRESSIBLE_MIMETYPES = frozenset({
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "text/css",
+    "text/html",
+    "text/plain",
+    "image/svg+xml",
+})
+
+# 小於此大小的回應不壓縮（壓縮的額外標頭與 CPU 不划算）
+DEFAULT_MIN_SIZE = 1024
+
+# 動態回應使用中等壓縮等級，兼顧 CPU；預先壓縮的靜態檔案使用最高等級
+DYNAMIC_GZIP_LEVEL = 6
+DYNAMIC_BROTLI_QUALITY = 5
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+
+# 編碼名稱與預先壓縮檔案的副檔名
+_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """伺服器支援的編碼（依偏好順序）"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def _compress(data: bytes, encoding: str, static: bool = False) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=STATIC_BROTLI_QUALITY if static else DYNAMIC_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=STATIC_GZIP_LEVEL if static else DYNAMIC_GZIP_LEVEL, mtime=0)
+
+
+def _choose_encoding(candidates: Iterable[str]) -> Optional[str]:
+    """依 Accept-Encoding 選擇編碼；用戶端未接受任何候選時返回 None"""
+    accepted = request.accept_encodings
+    for encoding in candidates:
+        if accepted[encoding] > 0:
+            return encoding
+    return None
+
+
+def _add_vary(response: Response) -> None:
+    response.vary.add("Accept-Encoding")
+
+
+def compress_response(response: Response, min_size: int = DEFAULT_MIN_SIZE) -> Response:
+    """after_request：壓縮符合條件的動態回應"""
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    _add_vary(response)
+
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 206, 304)
+        or response.direct_passthrough
+        or response.is_streamed
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    encoding = _choose_encoding(available_encodings())
+    if encoding is None:
+        return response
+
+    response.set_data(_compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    # 壓縮後內容不同，強 ETag 改為弱 ETag
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def precompress_static(static_folder: str, min_size: int = DEFAULT_MIN_SIZE) -> int:
+    """
+    為靜態資料夾中可壓縮的檔案產生 .br / .gz 版本（已是最新的檔案略過）
+
+    Returns:
+        新產生的檔案數
+    """
+    written = 0
+    for root, _dirs, files in os.walk(static_folder):
+        for name in files:
+            if name.endswith((".gz", ".br")):
+                continue
+            mimetype, _ = mimetypes.guess_type(name)
+            if mimetype not in COMPRESSIBLE_MIMETYPES:
+                continue
+            path = os.path.join(root, name)
+            if os.path.getsize(path) < min_size:
+                continue
+            source_mtime = os.path.getmtime(path)
+            data = None
+            for encoding in available_encodings():
+                target = path + _SUFFIXES[encoding]
+                if os.path.exists(target) and os.path.getmtime(target) >= source_mtime:
+                    continue
+                if data is None:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                with open(target, "wb") as f:
+                    f.write(_compress(data, encoding, static=True))
+                written += 1
+    return written
+
+
+def _scan_precompressed(static_folder: str) -> Dict[str, Dict[str, str]]:
+    """找出已預先壓縮且比原檔新的靜態檔案：{相對路徑: {編碼: 壓縮檔相對路徑}}"""
+    variants: Dict[str, Dict[str, str]] = {}
+    for root, _dirs, files in os.walk(static_folder):
+        names = set(files)
+        for name in files:
+            for encoding, suffix in _SUFFIXES.items():
+                if name + suffix not in names:
+                    continue
+                path = os.path.join(root, name)
+                if os.path.getmtime(path + suffix) < os.path.getmtime(path):
+                    continue
+                relative = os.path.relpath(path, static_folder).replace(os.sep, "/")
+                variants.setdefault(relative, {})[encoding] = relative + suffix
+    return variants
+
+
+def init_compression(app: Flask) -> None:
+    """
+    啟用回應壓縮
+
+    設定：
+        COMPRESS_ENABLED: 是否啟用
+        COMPRESS_MIN_SIZE: 最小壓縮大小（bytes）
+        COMPRESS_STATIC_ON_STARTUP: 啟動時產生靜態檔案的預先壓縮版本
+    """
+    if not app.config.get("COMPRESS_ENABLED", True):
+        return
+    min_size = int(app.config.get("COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE))
+
+    @app.after_request
+    def _compress_after_request(response):
+        return compress_response(response, min_size)
+
+    if not app.static_folder or "static" not in app.view_functions:
+        return
+
+    variants: Dict[str, Dict[str, str]] = {}
+
+    def _load_variants():
+        if app.config.get("COMPRESS_STATIC_ON_STARTUP"):
+            try:
+                precompress_static(app.static_folder, min_size)
+            except OSError as e:
+                WARN_PRINT(f"[WARN] 無法產生預先壓縮的靜態檔案: {e}")
+        variants.update(_scan_precompressed(app.static_folder))
+
+    # STARTUP_MODE=lazy 時延後到第一個請求；static 路由照常包裝，送出時才查 variants
+    run_or_defer(app, "compression", _load_variants)
+
+    serve_static = app.view_functions["static"]
+
+    def static_with_precompressed(filename):
+        encodings = variants.get(filename)
+        # 送出預先壓縮的檔案不需要 brotli 套件，有 .br 檔即可使用
+        encoding = _choose_encoding(e for e in ("br", "gzip") if e in encodings) if encodings else None
+        if encoding is None:
+            return serve_static(filename=filename)
+
+        mimetype, _ = mimetypes.guess_type(filename)
+        response = send_from_directory(app.static_folder, encodings[encoding], mimetype=mimetype)
+        response.headers["Content-Encoding"] = encoding
+        _add_vary(response)
+        return response
+
+    app.view_functions["static"] = static_with_precompressed
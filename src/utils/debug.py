@@ -10,24 +10,226 @@
     ERROR_PRINT("這是一個錯誤訊息")
 
 環境變數控制：
-    DEBUG_MODE=1     # 啟用除錯訊息輸出
-    VERBOSE_MODE=1   # 啟用詳細訊息輸出（包含 INFO）
+    DEBUG_MODE=1       # 啟用除錯訊息輸出
+    VERBOSE_MODE=1     # 啟用詳細訊息輸出（包含 INFO）
+    ERROR_OUTPUT=0     # 停用錯誤訊息輸出
+    LOG_FORMAT=json    # 每行輸出一個 JSON 物件（預設 text，與 print 的輸出相同）
+    LOG_SAMPLE_RATE=1  # DEBUG / INFO 訊息的取樣比例（0 ~ 1），警告與錯誤不取樣
+
+訊息經由 logging 的 QueueHandler 交給背景執行緒寫出，呼叫端不會因為輸出而阻塞；
+設定只在載入時與 configure_logging() 時讀取一次。
+在請求中輸出的訊息會附上 request ID（init_request_logging() 註冊，亦回傳於 X-Request-ID 標頭）。
 """
 
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
 import os
+import queue
+import random
+import re
 import sys
-from typing import Any
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+LOGGER_NAME = "app"
+LOG_FORMAT_TEXT = "text"
+LOG_FORMAT_JSON = "json"
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# 外部傳入的 request ID 只接受英數與 -_.，最長 64 字元
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+logger = logging.getLogger(LOGGER_NAME)
+logger.propagate = False
 
 
 def _get_env_bool(key: str, default: bool = False) -> bool:
     """從環境變數讀取布林值"""
-    value = os.getenv(key, "").lower()
-    return value in ("1", "true", "yes", "on", "enabled")
+    value = os.getenv(key)
+    if value is None or value == "":
+        return default
+    return value.lower() in ("1", "true", "yes", "on", "enabled")
+
 
+def _get_env_float(key: str, default: float) -> float:
+    try:
+        return float(os.getenv(key, default))
+    except ValueError:
+        return default
 
-# 讀取環境變數設定
+
+# 讀取環境變數設定（configure_logging() 會重新讀取）
 _DEBUG_ENABLED = _get_env_bool("DEBUG_MODE", default=False)
 _VERBOSE_ENABLED = _get_env_bool("VERBOSE_MODE", default=False)
+_ERROR_ENABLED = _get_env_bool("ERROR_OUTPUT", default=True)
+_SAMPLE_RATE = 1.0
+_log_format = LOG_FORMAT_TEXT
+
+
+def _current_request_id() -> Optional[str]:
+    # 延遲 import：scripts 在沒有 Flask 請求的情況下也會使用本模組
+    from flask import g, has_request_context
+    if not has_request_context():
+        return None
+    return g.get("request_id")
+
+
+class _RequestIdFilter(logging.Filter):
+    """在呼叫端的執行緒取得 request ID（背景執行緒無法存取請求）"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _current_request_id()
+        return True
+
+
+class _TextFormatter(logging.Formatter):
+    """與原本 print 相同的輸出；請求中的訊息前面加上 request ID"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        if record.exc_text:
+            message = f"{message}\n{record.exc_text}"
+        request_id = getattr(record, "request_id", None)
+        return f"[{request_id}] {message}" if request_id else message
+
+
+class _JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname.lower(),
+            "msg": record.getMessage(),
+            "pid": record.process,
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class _ForkSafeQueueHandler(logging.handlers.QueueHandler):
+    """fork 之後（例如 gunicorn worker）在子程序重新啟動背景寫出執行緒"""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if _listener_pid != os.getpid():
+            _start_listener()
+        super().emit(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 預設實作會把例外堆疊併入訊息；改為分開保存，JSON 輸出時放在 exc 欄位
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+_traceback_formatter = logging.Formatter()
+_listener: Optional[logging.handlers.QueueListener] = None
+_listener_pid: Optional[int] = None
+_listener_lock = threading.Lock()
+_output_handlers = []
+
+
+def _build_output_handlers(log_format: str):
+    formatter = _JsonFormatter() if log_format == LOG_FORMAT_JSON else _TextFormatter()
+    if log_format == LOG_FORMAT_JSON:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(formatter)
+        return [handler]
+
+    # text：與原本相同，INFO 輸出到 stdout，其餘輸出到 stderr
+    stdout = logging.StreamHandler(sys.stdout)
+    stdout.addFilter(lambda record: record.levelno == logging.INFO)
+    stderr = logging.StreamHandler(sys.stderr)
+    stderr.addFilter(lambda record: record.levelno != logging.INFO)
+    for handler in (stdout, stderr):
+        handler.setFormatter(formatter)
+    return [stdout, stderr]
+
+
+def _start_listener() -> None:
+    global _listener, _listener_pid
+    with _listener_lock:
+        if _listener_pid == os.getpid():
+            return
+        records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        queue_handler = _ForkSafeQueueHandler(records)
+        queue_handler.addFilter(_RequestIdFilter())
+        logger.addHandler(queue_handler)
+        # fork 後父程序的 listener 執行緒不存在於子程序，直接建立新的
+        _listener = logging.handlers.QueueListener(records, *_output_handlers, respect_handler_level=False)
+        _listener.start()
+        _listener_pid = os.getpid()
+
+
+def _stop_listener() -> None:
+    """程式結束前寫出佇列中剩餘的訊息"""
+    global _listener_pid
+    with _listener_lock:
+        if _listener is not None and _listener_pid == os.getpid():
+            _listener.stop()
+            _listener_pid = None
+
+
+atexit.register(_stop_listener)
+
+
+def configure_logging(log_format: Optional[str] = None, sample_rate: Optional[float] = None) -> None:
+    """
+    讀取環境變數並設定輸出（create_app() 於載入 ENV/.env 後呼叫）
+
+    Args:
+        log_format: text 或 json；None 表示使用 LOG_FORMAT
+        sample_rate: DEBUG / INFO 訊息的取樣比例；None 表示使用 LOG_SAMPLE_RATE
+    """
+    global _DEBUG_ENABLED, _VERBOSE_ENABLED, _ERROR_ENABLED, _SAMPLE_RATE, _output_handlers, _log_format
+    _DEBUG_ENABLED = _get_env_bool("DEBUG_MODE", default=False)
+    _VERBOSE_ENABLED = _get_env_bool("VERBOSE_MODE", default=False)
+    _ERROR_ENABLED = _get_env_bool("ERROR_OUTPUT", default=True)
+    rate = _get_env_float("LOG_SAMPLE_RATE", 1.0) if sample_rate is None else sample_rate
+    _SAMPLE_RATE = min(max(rate, 0.0), 1.0)
+
+    log_format = (log_format or os.getenv("LOG_FORMAT", LOG_FORMAT_TEXT)).lower()
+    if log_format not in (LOG_FORMAT_TEXT, LOG_FORMAT_JSON):
+        log_format = LOG_FORMAT_TEXT
+    _log_format = log_format
+
+    if _DEBUG_ENABLED:
+        logger.setLevel(logging.DEBUG)
+    elif _VERBOSE_ENABLED:
+        logger.setLevel(logging.INFO)
+    elif _ERROR_ENABLED:
+        logger.setLevel(logging.ERROR)
+    else:
+        logger.setLevel(logging.CRITICAL + 1)
+
+    _stop_listener()
+    _output_handlers = _build_output_handlers(log_format)
+    _start_listener()
+
+
+def _sampled() -> bool:
+    return _SAMPLE_RATE >= 1.0 or random.random() < _SAMPLE_RATE
+
+
+def _message(args, kwargs) -> str:
+    # 支援 print 的 sep 參數；end / file 不適用，直接忽略
+    sep = kwargs.get("sep", " ")
+    sep = " " if sep is None else sep
+    return sep.join(str(a) for a in args)
 
 
 def is_debug_enabled() -> bool:
@@ -45,8 +247,8 @@ def DEBUG_PRINT(*args: Any, **kwargs: Any) -> None:
     條件輸出除錯訊息
     只有在 DEBUG_MODE=1 時才會輸出
     """
-    if _DEBUG_ENABLED:
-        print(*args, **kwargs, file=sys.stderr)
+    if _DEBUG_ENABLED and _sampled():
+        logger.debug(_message(args, kwargs))
 
 
 def INFO_PRINT(*args: Any, **kwargs: Any) -> None:
@@ -54,8 +256,8 @@ def INFO_PRINT(*args: Any, **kwargs: Any) -> None:
     條件輸出資訊訊息
     只有在 VERBOSE_MODE=1 或 DEBUG_MODE=1 時才會輸出
     """
-    if _VERBOSE_ENABLED or _DEBUG_ENABLED:
-        print(*args, **kwargs)
+    if (_VERBOSE_ENABLED or _DEBUG_ENABLED) and _sampled():
+        logger.info(_message(args, kwargs))
 
 
 def WARN_PRINT(*args: Any, **kwargs: Any) -> None:
@@ -64,7 +266,7 @@ def WARN_PRINT(*args: Any, **kwargs: Any) -> None:
     只有在 VERBOSE_MODE=1 或 DEBUG_MODE=1 時才會輸出
     """
     if _VERBOSE_ENABLED or _DEBUG_ENABLED:
-        print(*args, **kwargs, file=sys.stderr)
+        logger.warning(_message(args, kwargs))
 
 
 def ERROR_PRINT(*args: Any, **kwargs: Any) -> None:
@@ -73,7 +275,95 @@ def ERROR_PRINT(*args: Any, **kwargs: Any) -> None:
     預設總是輸出（除非明確禁用）
     可以通過環境變數 ERROR_OUTPUT=0 來禁用
     """
-    error_output = _get_env_bool("ERROR_OUTPUT", default=True)
-    if error_output:
-        print(*args, **kwargs, file=sys.stderr)
+    if _ERROR_ENABLED:
+        logger.error(_message(args, kwargs), exc_info=kwargs.get("exc_info", False))
+
+
+class _FileQueueHandler(_ForkSafeQueueHandler):
+    """寫入獨立檔案的佇列 handler：檔案 I/O 同樣在背景執行緒，fork 後於子程序重新啟動"""
+
+    def __init__(self, path: str):
+        super().__init__(queue.SimpleQueue())
+        self.path = path
+        self.addFilter(_RequestIdFilter())
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._pid != os.getpid():
+            self._start()
+        logging.handlers.QueueHandler.emit(self, record)
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            output = logging.FileHandler(self.path, encoding="utf-8", delay=True)
+            if _log_format == LOG_FORMAT_JSON:
+                output.setFormatter(_JsonFormatter())
+            else:
+                output.setFormatter(_TimestampTextFormatter())
+            self._listener = logging.handlers.QueueListener(self.queue, output)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+                for handler in self._listener.handlers:
+                    handler.close()
+            self._listener = None
+            self._pid = None
+
+
+class _TimestampTextFormatter(_TextFormatter):
+    """寫入檔案時在每行前面加上時間"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record.created))} {super().format(record)}"
+
+
+def get_logger(name: str, log_path: Optional[str] = None) -> logging.Logger:
+    """
+    取得 app.<name> 子 logger，供不受 DEBUG_MODE / VERBOSE_MODE / ERROR_OUTPUT 控制的紀錄使用
+    （例如慢查詢紀錄）：WARNING 以上一律輸出
+
+    Args:
+        log_path: None 時與其他訊息經由同一個佇列輸出（格式與 request ID 相同）；
+                  指定時改為寫入該檔案。重複呼叫會取代先前的設定
+    """
+    child = logger.getChild(name)
+    child.setLevel(logging.WARNING)
+    for handler in list(child.handlers):
+        child.removeHandler(handler)
+        if isinstance(handler, _FileQueueHandler):
+            handler.stop()
+    if log_path:
+        child.addHandler(_FileQueueHandler(log_path))
+        child.propagate = False
+    else:
+        child.propagate = True
+    return child
+
+
+def init_request_logging(app) -> None:
+    """為每個請求指定 request ID（沿用上游代理的 X-Request-ID），並回傳於回應標頭"""
+    from flask import g, request
+
+    @app.before_request
+    def _assign_request_id():
+        incoming = request.headers.get(REQUEST_ID_HEADER, "")
+        g.request_id = incoming if _REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex[:16]
+
+    @app.after_request
+    def _echo_request_id(response):
+        request_id = g.get("request_id")
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        return response
+
 
+configure_logging()
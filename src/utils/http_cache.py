@@ -0,0 +1,73 @@
+"""
+HTTP 快取工具
+為唯讀 API 加上 ETag / If-None-Match（304）與 Cache-Control
+
+ETag 優先以資料版本計算（不需查詢資料庫即可回應 304）；
+無法取得版本時退回以回應內容雜湊計算（仍可省下傳輸量）。
+"""
+
+import hashlib
+from functools import wraps
+from typing import Any, Callable, Iterable, Optional
+
+from flask import Response, current_app, make_response, request
+
+
+def _make_etag(*parts: Any) -> str:
+    """以請求路徑（含查詢參數）與版本組成 ETag"""
+    digest = hashlib.sha1(request.full_path.encode("utf-8"))
+    for part in parts:
+        digest.update(b"|")
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def _apply_cache_headers(response: Response, etag: str, private: bool) -> Response:
+    response.set_etag(etag, weak=True)
+    if private:
+        response.cache_control.private = True
+    else:
+        response.cache_control.public = True
+    response.cache_control.max_age = int(current_app.config.get("HTTP_CACHE_MAX_AGE", 0))
+    return response
+
+
+def conditional_response(
+    version_func: Optional[Callable[..., Optional[str]]] = None,
+    private_args: Iterable[str] = (),
+):
+    """
+    為 GET 路由加上條件式請求支援
+
+    Args:
+        version_func: 以路由參數呼叫，返回資料版本字串；返回 None 時改用內容雜湊
+        private_args: 會讓回應含個人化欄位的查詢參數（例如 user_id），
+                      有帶入時以 Cache-Control: private 回應，共用快取（反向代理）不保存
+    """
+    private_args = tuple(private_args)
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(*args, **kwargs)
+
+            private = any(request.args.get(name) for name in private_args)
+            version = version_func(*args, **kwargs) if version_func else None
+            etag = _make_etag(version) if version is not None else None
+            if etag and request.if_none_match.contains_weak(etag):
+                return _apply_cache_headers(Response(status=304), etag, private)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            if etag is None:
+                etag = _make_etag(response.get_data())
+                if request.if_none_match.contains_weak(etag):
+                    return _apply_cache_headers(Response(status=304), etag, private)
+            return _apply_cache_headers(response, etag, private)
+
+        return wrapper
+
+    return decorator
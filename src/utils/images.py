@@ -0,0 +1,223 @@
+"""
+圖片處理
+為 static/images 中的餐廳與菜色圖片產生縮圖、卡片尺寸與 WebP 版本
+
+- 產生的檔案放在 static/images/_variants/，檔名包含原圖內容雜湊，內容變更即換網址
+- scripts/build_images.py 於部署時一次產生所有版本並寫入 manifest.json
+- manifest 沒有記錄的圖片改用 /img/<尺寸>/<格式>/<路徑> 按需產生（需安裝 Pillow），
+  未安裝 Pillow 時直接送出原圖
+- image_set() 返回可直接用於 <img srcset> / <source srcset> 的網址
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from flask import Flask, abort, send_from_directory
+
+from utils.debug import ERROR_PRINT
+from utils.startup import run_or_defer
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - 依安裝環境而定
+    Image = None
+
+# 各尺寸的寬度（px）；原圖較窄時不放大
+IMAGE_VARIANTS = {"thumb": 160, "card": 320}
+IMAGE_FORMATS = ("webp", "jpg")
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+# 需要處理的圖片資料夾（相對於 static）
+SOURCE_DIRS = ("images/stores", "images/dishes")
+SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+VARIANT_DIR = "images/_variants"
+MANIFEST_NAME = "manifest.json"
+
+STATIC_URL = "/static"
+ON_DEMAND_URL = "/img"
+
+_static_folder: Optional[str] = None
+_manifest: Dict[str, Dict[str, Any]] = {}
+# 按需產生的圖片（不影響 image_set 的輸出，避免只有部分尺寸時 srcset 不完整）
+_on_demand: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+_lock = threading.Lock()
+
+
+def pillow_available() -> bool:
+    """是否已安裝 Pillow"""
+    return Image is not None
+
+
+def _file_digest(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()[:10]
+
+
+def _variant_path(relative: str, digest: str, size: str, fmt: str) -> str:
+    """例如 images/stores/store_1.jpg -> images/_variants/stores/store_1-card-1a2b3c4d5e.webp"""
+    subdir, name = os.path.split(relative)
+    stem = os.path.splitext(name)[0]
+    subdir = subdir[len("images/"):] if subdir.startswith("images/") else subdir
+    return f"{VARIANT_DIR}/{subdir}/{stem}-{size}-{digest}.{fmt}"
+
+
+def build_variant(static_folder: str, relative: str, size: str, fmt: str,
+                  digest: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    產生單一尺寸與格式的圖片（已存在時略過）
+
+    Returns:
+        {"path": 相對於 static 的路徑, "width": 寬度}；無法處理時返回 None
+    """
+    if Image is None or size not in IMAGE_VARIANTS or fmt not in IMAGE_FORMATS:
+        return None
+    source = os.path.join(static_folder, relative)
+    if not os.path.isfile(source):
+        return None
+
+    digest = digest or _file_digest(source)
+    target_relative = _variant_path(relative, digest, size, fmt)
+    target = os.path.join(static_folder, target_relative)
+
+    with Image.open(source) as image:
+        width = min(IMAGE_VARIANTS[size], image.width)
+        if not os.path.exists(target):
+            height = max(1, round(image.height * width / image.width))
+            resized = image.convert("RGB").resize((width, height), Image.LANCZOS)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # 先寫入暫存檔再改名，避免多個 worker 同時產生時讀到寫一半的檔案
+            temp = f"{target}.{os.getpid()}.tmp"
+            if fmt == "webp":
+                resized.save(temp, "WEBP", quality=WEBP_QUALITY, method=6)
+            else:
+                resized.save(temp, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+            os.replace(temp, target)
+
+    return {"path": target_relative, "width": width}
+
+
+def build_all(static_folder: str) -> Dict[str, Dict[str, Any]]:
+    """
+    產生所有來源圖片的各尺寸版本並寫入 manifest.json
+
+    Returns:
+        manifest：{原圖相對路徑: {尺寸: {格式: {"path", "width"}}}}
+    """
+    manifest: Dict[str, Dict[str, Any]] = {}
+    for source_dir in SOURCE_DIRS:
+        folder = os.path.join(static_folder, source_dir)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if not name.lower().endswith(SOURCE_EXTENSIONS):
+                continue
+            relative = f"{source_dir}/{name}"
+            digest = _file_digest(os.path.join(folder, name))
+            entry: Dict[str, Any] = {}
+            for size in IMAGE_VARIANTS:
+                for fmt in IMAGE_FORMATS:
+                    variant = build_variant(static_folder, relative, size, fmt, digest)
+                    if variant:
+                        entry.setdefault(size, {})[fmt] = variant
+            if entry:
+                manifest[relative] = entry
+
+    manifest_path = os.path.join(static_folder, VARIANT_DIR, MANIFEST_NAME)
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder: str) -> Dict[str, Dict[str, Any]]:
+    """讀取 manifest.json（不存在或格式錯誤時返回空 dict）"""
+    path = os.path.join(static_folder, VARIANT_DIR, MANIFEST_NAME)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _srcset(urls_with_width) -> str:
+    return ", ".join(f"{url} {width}w" for url, width in urls_with_width)
+
+
+def image_set(relative: str) -> Dict[str, str]:
+    """
+    取得圖片的響應式網址
+
+    Args:
+        relative: 原圖相對於 static 的路徑，例如 images/stores/store_1.jpg
+
+    Returns:
+        {"src": 卡片尺寸 JPEG, "srcset": JPEG srcset, "webpSrcset": WebP srcset}；
+        無法產生縮圖時只有 src（原圖）
+    """
+    entry = _manifest.get(relative) or {}
+    sizes = [size for size in IMAGE_VARIANTS if size in entry]
+    if sizes:
+        result = {
+            "srcset": _srcset((f"{STATIC_URL}/{entry[s]['jpg']['path']}", entry[s]['jpg']['width'])
+                              for s in sizes if "jpg" in entry[s]),
+            "webpSrcset": _srcset((f"{STATIC_URL}/{entry[s]['webp']['path']}", entry[s]['webp']['width'])
+                                  for s in sizes if "webp" in entry[s]),
+        }
+        largest = entry[sizes[-1]].get("jpg")
+        result["src"] = f"{STATIC_URL}/{largest['path']}" if largest else f"{STATIC_URL}/{relative}"
+        return result
+
+    if Image is None:
+        return {"src": f"{STATIC_URL}/{relative}"}
+
+    # 尚未建置：改用按需產生的網址
+    return {
+        "src": f"{ON_DEMAND_URL}/card/jpg/{relative}",
+        "srcset": _srcset((f"{ON_DEMAND_URL}/{s}/jpg/{relative}", w) for s, w in IMAGE_VARIANTS.items()),
+        "webpSrcset": _srcset((f"{ON_DEMAND_URL}/{s}/webp/{relative}", w) for s, w in IMAGE_VARIANTS.items()),
+    }
+
+
+def _serve_variant(size: str, fmt: str, filename: str):
+    """按需產生並送出圖片；未安裝 Pillow 或無法處理時送出原圖"""
+    if (
+        size not in IMAGE_VARIANTS
+        or fmt not in IMAGE_FORMATS
+        or not filename.startswith(tuple(f"{d}/" for d in SOURCE_DIRS))
+        or ".." in filename.split("/")
+    ):
+        abort(404)
+
+    key = (filename, size, fmt)
+    cached = _manifest.get(filename, {}).get(size, {}).get(fmt) or _on_demand.get(key)
+    if cached is None:
+        try:
+            cached = build_variant(_static_folder, filename, size, fmt)
+        except OSError as e:
+            ERROR_PRINT(f"[ERROR] 產生圖片失敗 {filename}: {e}")
+            cached = None
+        if cached is not None:
+            with _lock:
+                _on_demand[key] = cached
+
+    return send_from_directory(_static_folder, cached["path"] if cached else filename)
+
+
+def init_images(app: Flask) -> None:
+    """載入圖片 manifest（可延後，見 utils.startup）並註冊按需產生的路由"""
+    global _static_folder
+    _static_folder = app.static_folder
+
+    def _load_manifest():
+        global _manifest
+        _manifest = load_manifest(app.static_folder)
+
+    run_or_defer(app, "images", _load_manifest)
+    app.add_url_rule(
+        f"{ON_DEMAND_URL}/<size>/<fmt>/<path:filename>", "image_variant", _serve_variant
+    )
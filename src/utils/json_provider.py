@@ -0,0 +1,137 @@
+"""
+JSON 編碼工具
+提供 Flask JSON provider：有安裝 orjson 時使用 orjson，否則使用標準函式庫 json
+
+兩者輸出一致，且與 Flask 預設的 JSON 格式相同（既有 API 使用者不受影響）：
+    - datetime / date 以 HTTP 日期字串（RFC 1123，例如 Wed, 21 Oct 2015 07:28:00 GMT）輸出
+    - Decimal（MariaDB DECIMAL 欄位）與 UUID 以字串輸出
+    - Flask 預設無法編碼的 time / timedelta 另外以 ISO 8601 字串 / 秒數輸出
+    - 中文不轉義為 \\uXXXX，回應較小
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, time, timedelta
+from typing import Any, Optional, Type
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+from utils.debug import WARN_PRINT
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 依安裝環境而定
+    orjson = None
+
+JSON_PROVIDER_AUTO = "auto"
+JSON_PROVIDER_ORJSON = "orjson"
+JSON_PROVIDER_STDLIB = "stdlib"
+
+
+def _default(obj: Any) -> Any:
+    """標準 json 無法處理的型別轉換（與 Flask 預設相同；orjson 也以此處理日期與 Decimal）"""
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, time):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if isinstance(obj, timedelta):
+        # MariaDB TIME 欄位會以 timedelta 返回
+        return obj.total_seconds()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """標準函式庫 json，補上 time / timedelta 處理"""
+
+    name = JSON_PROVIDER_STDLIB
+    ensure_ascii = False
+    default = staticmethod(_default)
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        """編碼為 UTF-8 bytes（精簡格式）"""
+        return json.dumps(
+            obj, default=_default, ensure_ascii=False, sort_keys=self.sort_keys, separators=(",", ":")
+        ).encode("utf-8")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """以 orjson 編碼，直接產生 bytes，不經過 str"""
+
+    name = JSON_PROVIDER_ORJSON
+    ensure_ascii = False
+    default = staticmethod(_default)
+
+    def _options(self) -> int:
+        # orjson 預設以 ISO 8601 輸出日期，改交給 _default 維持 Flask 的 HTTP 日期格式
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option
+
+    def dumps_bytes(self, obj: Any) -> bytes:
+        """編碼為 UTF-8 bytes（精簡格式）"""
+        return orjson.dumps(obj, default=_default, option=self._options())
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        # 指定縮排等 orjson 不支援的參數時交由標準函式庫處理
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self._app.debug:
+            # 除錯模式保留縮排，方便閱讀
+            return super().response(obj)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
+
+
+def get_provider_class(name: Optional[str] = JSON_PROVIDER_AUTO) -> Type[DefaultJSONProvider]:
+    """
+    依名稱取得 provider 類別
+
+    Args:
+        name: 'auto'（有 orjson 就使用）、'orjson' 或 'stdlib'
+    """
+    name = (name or JSON_PROVIDER_AUTO).lower()
+    if name == JSON_PROVIDER_STDLIB:
+        return StdlibJSONProvider
+    if name in (JSON_PROVIDER_AUTO, JSON_PROVIDER_ORJSON):
+        if orjson is not None:
+            return OrjsonProvider
+        if name == JSON_PROVIDER_ORJSON:
+            WARN_PRINT("[WARN] 未安裝 orjson，改用標準函式庫 json")
+        return StdlibJSONProvider
+    raise ValueError(f"不支援的 JSON provider: {name}")
+
+
+def configure_json(app: Flask, name: Optional[str] = JSON_PROVIDER_AUTO) -> DefaultJSONProvider:
+    """為應用程式設定 JSON provider，返回 provider 實例"""
+    provider_class = get_provider_class(name)
+    app.json_provider_class = provider_class
+    app.json = provider_class(app)
+    return app.json
+
+
+def dumps_bytes(provider: DefaultJSONProvider, obj: Any) -> bytes:
+    """以指定 provider 編碼為 UTF-8 bytes（未提供 dumps_bytes 的 provider 退回 dumps）"""
+    if hasattr(provider, "dumps_bytes"):
+        return provider.dumps_bytes(obj)
+    return provider.dumps(obj).encode("utf-8")
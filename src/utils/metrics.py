@@ -0,0 +1,362 @@
+"""
+Prometheus 格式的運作指標
+以 /metrics 提供 text exposition format（0.0.4），不需額外套件
+
+- 請求：依 blueprint / 路由規則 / method 的延遲直方圖、請求數（含狀態碼）、錯誤數（5xx 或未處理例外）、
+  處理中的請求數，以及每個路由的 SQL 查詢次數與耗時（來自 services.db 的請求統計）
+- 資料庫：各連線池的使用中 / 閒置連線數與上限
+- 快取：各 VersionedCache 命名空間的命中 / 未命中次數、命中率與項目數
+
+多個 worker（例如 gunicorn）時設定 METRICS_DIR：每個 worker 定期把自己的數值寫入
+METRICS_DIR/metrics-<pid>.json，/metrics 由收到請求的 worker 彙整所有檔案。
+計數器與直方圖包含已結束的 worker（避免重啟時數值倒退），即時數值（處理中請求、連線池）只計入存活的 worker。
+部署時請清空 METRICS_DIR，避免沿用上次啟動的數值。
+
+/metrics 需帶 Authorization: Bearer <METRICS_TOKEN>（Prometheus 的 authorization / bearer_token 設定）；
+未設定 METRICS_TOKEN 時僅除錯模式可存取。
+"""
+
+import atexit
+import hmac
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask, Response, abort, g, request
+
+from services.cache import cache_stats
+from services.db import current_query_stats, pool_stats
+from utils.debug import ERROR_PRINT, is_debug_enabled
+
+# 延遲直方圖的上界（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 計數器：名稱 -> (說明, 標籤)
+COUNTERS = {
+    "http_requests_total": ("HTTP 請求數", ("blueprint", "route", "method", "status")),
+    "http_request_errors_total": ("失敗的請求數（5xx 或未處理例外）", ("blueprint", "route", "method")),
+    "http_request_db_queries_total": ("請求中執行的 SQL 查詢數", ("blueprint", "route")),
+    "http_request_db_seconds_total": ("請求中 SQL 查詢的總耗時（秒）", ("blueprint", "route")),
+    "cache_requests_total": ("快取讀取次數", ("namespace", "result")),
+}
+
+HISTOGRAM = "http_request_duration_seconds"
+HISTOGRAM_HELP = "HTTP 請求處理時間（秒）"
+HISTOGRAM_LABELS = ("blueprint", "route", "method")
+
+# 即時數值：名稱 -> (說明, 標籤, 跨 worker 的彙整方式)
+# sum：加總存活 worker；max：取最大值（共用的快取後端每個 worker 看到的是同一份）
+GAUGES = {
+    "http_requests_in_flight": ("處理中的請求數", (), "sum"),
+    "db_pool_connections": ("資料庫連線數", ("pool", "state"), "sum"),
+    "db_pool_capacity": ("連線池可建立的連線上限（常駐 + 尖峰）", ("pool",), "sum"),
+    "cache_entries": ("各命名空間的快取項目數", ("namespace", "backend"), "max"),
+    "cache_hit_ratio": ("快取命中率（所有 worker 合計）", ("namespace",), "max"),
+}
+
+Labels = Tuple[str, ...]
+
+
+class MetricsRegistry:
+    """單一程序的指標數值"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[str, Dict[Labels, float]] = {name: {} for name in COUNTERS}
+        # 標籤 -> [各區間次數..., +Inf 次數, 總和]
+        self.histogram: Dict[Labels, List[float]] = {}
+        self.in_flight = 0
+
+    def inc(self, name: str, labels: Labels, value: float = 1.0) -> None:
+        with self._lock:
+            series = self.counters[name]
+            series[labels] = series.get(labels, 0.0) + value
+
+    def observe(self, labels: Labels, seconds: float) -> None:
+        with self._lock:
+            values = self.histogram.get(labels)
+            if values is None:
+                values = self.histogram[labels] = [0.0] * (len(LATENCY_BUCKETS) + 2)
+            index = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+            values[index] += 1
+            values[-1] += seconds
+
+    def add_in_flight(self, delta: int) -> None:
+        with self._lock:
+            self.in_flight += delta
+
+    def snapshot(self) -> Dict[str, Any]:
+        """目前數值（可寫成 JSON），含收集當下的連線池與快取狀態"""
+        with self._lock:
+            counters = {name: [[list(k), v] for k, v in series.items()] for name, series in self.counters.items()}
+            histogram = [[list(k), list(v)] for k, v in self.histogram.items()]
+            in_flight = self.in_flight
+
+        gauges: Dict[str, List] = {name: [] for name in GAUGES}
+        gauges["http_requests_in_flight"].append([[], in_flight])
+        for label, stats in pool_stats().items():
+            gauges["db_pool_connections"].append([[label, "in_use"], stats["in_use"]])
+            gauges["db_pool_connections"].append([[label, "idle"], stats["idle"]])
+            gauges["db_pool_capacity"].append([[label], stats["size"] + stats["max_overflow"]])
+
+        cache_requests = counters["cache_requests_total"]
+        for namespace, stats in cache_stats().items():
+            cache_requests.append([[namespace, "hit"], stats["hits"]])
+            cache_requests.append([[namespace, "miss"], stats["misses"]])
+            gauges["cache_entries"].append([[namespace, stats["backend"]], stats["entries"]])
+
+        return {"pid": os.getpid(), "counters": counters, "histogram": histogram, "gauges": gauges}
+
+
+registry = MetricsRegistry()
+
+_metrics_dir: Optional[str] = None
+_flush_interval = 5.0
+_metrics_token = ""
+_flush_lock = threading.Lock()
+_flusher_pid: Optional[int] = None
+
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(_metrics_dir, f"metrics-{pid}.json")
+
+
+def flush() -> None:
+    """把本程序的數值寫入 METRICS_DIR"""
+    if not _metrics_dir:
+        return
+    path = _snapshot_path(os.getpid())
+    temp = f"{path}.tmp"
+    try:
+        with _flush_lock:
+            with open(temp, "w", encoding="utf-8") as f:
+                json.dump(registry.snapshot(), f, ensure_ascii=False)
+            os.replace(temp, path)
+    except OSError as e:
+        ERROR_PRINT(f"[ERROR] 無法寫入指標檔 {_metrics_dir}: {e}")
+
+
+def _flush_periodically() -> None:
+    while True:
+        time.sleep(_flush_interval)
+        flush()
+
+
+def _ensure_flusher() -> None:
+    """
+    每個程序啟動一個背景執行緒定期寫入
+
+    於第一個請求時啟動：gunicorn --preload 先建立應用程式再 fork，fork 前啟動的執行緒不會帶到 worker
+    """
+    global _flusher_pid
+    pid = os.getpid()
+    if _flusher_pid == pid:
+        return
+    with _flush_lock:
+        if _flusher_pid == pid:
+            return
+        _flusher_pid = pid
+    threading.Thread(target=_flush_periodically, name="metrics-flush", daemon=True).start()
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _load_snapshots() -> List[Dict[str, Any]]:
+    """讀取所有 worker 的數值；未設定 METRICS_DIR 時只有本程序"""
+    if not _metrics_dir:
+        return [registry.snapshot()]
+
+    flush()
+    snapshots = []
+    for name in os.listdir(_metrics_dir):
+        if not (name.startswith("metrics-") and name.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(_metrics_dir, name), encoding="utf-8") as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            # 寫入中或已損壞的檔案下次再讀
+            continue
+    return snapshots
+
+
+def _merge(snapshots: Iterable[Dict[str, Any]]):
+    counters: Dict[str, Dict[Labels, float]] = {name: {} for name in COUNTERS}
+    histogram: Dict[Labels, List[float]] = {}
+    gauges: Dict[str, Dict[Labels, float]] = {name: {} for name in GAUGES}
+
+    for snapshot in snapshots:
+        for name, series in snapshot.get("counters", {}).items():
+            target = counters.setdefault(name, {})
+            for labels, value in series:
+                key = tuple(labels)
+                target[key] = target.get(key, 0.0) + value
+        for labels, values in snapshot.get("histogram", []):
+            key = tuple(labels)
+            current = histogram.get(key)
+            histogram[key] = values if current is None else [a + b for a, b in zip(current, values)]
+        if not _pid_alive(snapshot.get("pid", 0)):
+            continue
+        for name, series in snapshot.get("gauges", {}).items():
+            if name not in GAUGES:
+                continue
+            mode = GAUGES[name][2]
+            target = gauges[name]
+            for labels, value in series:
+                key = tuple(labels)
+                if key not in target:
+                    target[key] = value
+                elif mode == "max":
+                    target[key] = max(target[key], value)
+                else:
+                    target[key] += value
+
+    # 命中率由合計後的次數計算
+    hits: Dict[str, float] = {}
+    totals: Dict[str, float] = {}
+    for (namespace, result), value in counters["cache_requests_total"].items():
+        totals[namespace] = totals.get(namespace, 0.0) + value
+        if result == "hit":
+            hits[namespace] = hits.get(namespace, 0.0) + value
+    for namespace, total in totals.items():
+        gauges["cache_hit_ratio"][(namespace,)] = round(hits.get(namespace, 0.0) / total, 4) if total else 0.0
+
+    return counters, histogram, gauges
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Iterable[Any], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render() -> str:
+    """所有 worker 彙整後的 text exposition format"""
+    counters, histogram, gauges = _merge(_load_snapshots())
+    lines: List[str] = []
+
+    lines.append(f"# HELP {HISTOGRAM} {HISTOGRAM_HELP}")
+    lines.append(f"# TYPE {HISTOGRAM} histogram")
+    for labels, values in sorted(histogram.items()):
+        cumulative = 0.0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), values[:-1]):
+            cumulative += count
+            le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+            lines.append(f"{HISTOGRAM}_bucket{_format_labels(HISTOGRAM_LABELS, labels, le)} {_format_value(cumulative)}")
+        lines.append(f"{HISTOGRAM}_sum{_format_labels(HISTOGRAM_LABELS, labels)} {_format_value(values[-1])}")
+        lines.append(f"{HISTOGRAM}_count{_format_labels(HISTOGRAM_LABELS, labels)} {_format_value(cumulative)}")
+
+    for name, (help_text, label_names) in COUNTERS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in sorted(counters.get(name, {}).items()):
+            lines.append(f"{name}{_format_labels(label_names, labels)} {_format_value(value)}")
+
+    for name, (help_text, label_names, _mode) in GAUGES.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in sorted(gauges[name].items()):
+            lines.append(f"{name}{_format_labels(label_names, labels)} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _authorized() -> bool:
+    # 只接受標頭，並以固定時間比較
+    if not _metrics_token:
+        return is_debug_enabled()
+    value = request.headers.get("Authorization", "")
+    return hmac.compare_digest(value.encode("utf-8"), f"Bearer {_metrics_token}".encode("utf-8"))
+
+
+def metrics():
+    """/metrics"""
+    if not _authorized():
+        abort(404)
+    return Response(render(), mimetype=None, content_type=CONTENT_TYPE)
+
+
+def _request_labels() -> Tuple[str, str]:
+    route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+    return request.blueprint or "app", route
+
+
+def init_metrics(app: Flask) -> None:
+    """
+    註冊請求統計與 /metrics
+
+    設定：
+        METRICS_ENABLED: 是否啟用（預設關閉）
+        METRICS_TOKEN: /metrics 需要的 Bearer token（留空時僅除錯模式可用）
+        METRICS_DIR: 多個 worker 共用的資料夾（留空表示只統計收到 /metrics 請求的 worker）
+        METRICS_FLUSH_INTERVAL: worker 寫入 METRICS_DIR 的間隔（秒）
+    """
+    global _metrics_dir, _flush_interval, _metrics_token
+    if not app.config.get("METRICS_ENABLED", False):
+        return
+
+    _metrics_token = app.config.get("METRICS_TOKEN") or ""
+
+    _metrics_dir = app.config.get("METRICS_DIR") or None
+    _flush_interval = max(float(app.config.get("METRICS_FLUSH_INTERVAL", 5)), 1.0)
+    if _metrics_dir:
+        os.makedirs(_metrics_dir, exist_ok=True)
+        atexit.register(flush)
+
+    @app.before_request
+    def _start_request_metrics():
+        if request.endpoint == "metrics":
+            return
+        g._metrics_started = time.perf_counter()
+        registry.add_in_flight(1)
+        if _metrics_dir:
+            _ensure_flusher()
+
+    @app.after_request
+    def _record_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _finish_request_metrics(exc):
+        started = g.pop("_metrics_started", None)
+        if started is None:
+            return
+        registry.add_in_flight(-1)
+
+        blueprint, route = _request_labels()
+        status = 500 if exc is not None else g.pop("_metrics_status", 500)
+        registry.observe((blueprint, route, request.method), time.perf_counter() - started)
+        registry.inc("http_requests_total", (blueprint, route, request.method, str(status)))
+        if status >= 500:
+            registry.inc("http_request_errors_total", (blueprint, route, request.method))
+
+        stats = current_query_stats()
+        if stats is not None and stats.count:
+            registry.inc("http_request_db_queries_total", (blueprint, route), stats.count)
+            registry.inc("http_request_db_seconds_total", (blueprint, route), stats.seconds)
+
+    app.add_url_rule("/metrics", "metrics", metrics)
@@ -0,0 +1,57 @@
+"""
+分頁工具模組
+提供 keyset（游標）分頁使用的游標編碼
+
+游標內容為排序鍵的值（例如 (timestamp, logID)），
+以 JSON + URL-safe base64 編碼，前端只需原樣帶回 cursor 參數
+
+使用方式：
+    from utils.pagination import encode_cursor, decode_cursor
+
+    cursor = encode_cursor(("2024-01-01T12:00:00", 42))
+    timestamp, log_id = decode_cursor(cursor, 2)
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Optional, Sequence, Tuple
+
+
+class InvalidCursor(ValueError):
+    """游標格式錯誤"""
+
+
+def _to_json_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """將排序鍵編碼為游標字串"""
+    payload = json.dumps([_to_json_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], size: int) -> Optional[Tuple[Any, ...]]:
+    """
+    解碼游標字串
+
+    Args:
+        cursor: 游標字串；None 或空字串表示第一頁
+        size: 排序鍵個數
+
+    Raises:
+        InvalidCursor: 游標格式錯誤
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as exc:
+        raise InvalidCursor("無效的分頁游標") from exc
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("無效的分頁游標")
+    return tuple(values)
@@ -0,0 +1,248 @@
+"""
+取樣式效能分析
+對部分請求定時擷取處理執行緒的呼叫堆疊，依路由彙整為 flame graph 的 collapsed 格式
+（每行「外層;...;內層 次數」，可直接交給 flamegraph.pl 或 speedscope）
+
+- 依 PROFILER_SAMPLE_RATE 隨機抽樣請求，或以 X-Profile 標頭指定（需符合 PROFILER_TOKEN；
+  未設定 token 時只在除錯模式接受標頭）
+- 背景執行緒每 PROFILER_INTERVAL 秒讀取 sys._current_frames()，只擷取正在被分析的執行緒，
+  不使用 sys.setprofile，不影響其他請求
+- 結果可由 /debug/profile 取得（同樣需帶 X-Profile 標頭），或定期寫入 PROFILER_OUTPUT_DIR/<pid>-<路由>.folded
+- 未啟用時不註冊任何 hook，沒有額外成本
+"""
+
+import atexit
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from flask import Flask, Response, abort, g, jsonify, request
+
+from utils.debug import ERROR_PRINT, is_debug_enabled
+
+PROFILE_HEADER = "X-Profile"
+
+# 每個堆疊最多保留的層數（由內層算起）
+MAX_STACK_DEPTH = 128
+# 寫入 PROFILER_OUTPUT_DIR 的間隔（秒）
+WRITE_INTERVAL = 30.0
+
+_src_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_src_root):
+        filename = filename[len(_src_root):]
+    else:
+        # 第三方套件只保留 site-packages 之後的路徑
+        index = filename.rfind("site-packages" + os.sep)
+        if index >= 0:
+            filename = filename[index + len("site-packages" + os.sep):]
+    # 以函式定義的行號標示，同一函式的樣本合併在一起；; 為 collapsed 格式的分隔字元
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _collapse(frame) -> str:
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """以背景執行緒定時擷取指定執行緒的呼叫堆疊"""
+
+    def __init__(self, interval: float = 0.005, output_dir: Optional[str] = None):
+        self.interval = interval
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._active: Dict[int, str] = {}  # thread id -> 路由
+        self._stacks: Dict[str, Counter] = {}
+        self._requests: Counter = Counter()
+        self._seconds: Counter = Counter()
+        self._dirty = False
+        self._thread_pid: Optional[int] = None
+
+    def _ensure_thread(self) -> None:
+        # 每個程序各自啟動（fork 前建立的執行緒不會帶到 worker），需持有鎖
+        if self._thread_pid == os.getpid():
+            return
+        self._thread_pid = os.getpid()
+        threading.Thread(target=self._run, name="profiler", daemon=True).start()
+
+    def begin(self, route: str) -> None:
+        """開始分析目前執行緒"""
+        with self._lock:
+            self._ensure_thread()
+            self._active[threading.get_ident()] = route
+            self._wakeup.notify()
+
+    def end(self, seconds: float) -> None:
+        """結束分析目前執行緒"""
+        with self._lock:
+            route = self._active.pop(threading.get_ident(), None)
+            if route is not None:
+                self._requests[route] += 1
+                self._seconds[route] += seconds
+
+    def _run(self) -> None:
+        next_write = time.monotonic() + WRITE_INTERVAL
+        while True:
+            with self._lock:
+                # 沒有分析中的請求時休眠；有未寫入的結果時等到下次寫入時間
+                while not self._active:
+                    timeout = None
+                    if self.output_dir and self._dirty:
+                        timeout = next_write - time.monotonic()
+                        if timeout <= 0:
+                            break
+                    self._wakeup.wait(timeout)
+                active = dict(self._active)
+
+            if active:
+                frames = sys._current_frames()
+                samples = [(route, _collapse(frames[tid])) for tid, route in active.items() if tid in frames]
+                with self._lock:
+                    for route, stack in samples:
+                        self._stacks.setdefault(route, Counter())[stack] += 1
+                    self._dirty = True
+
+            if self.output_dir and time.monotonic() >= next_write:
+                self.write()
+                next_write = time.monotonic() + WRITE_INTERVAL
+            if active:
+                time.sleep(self.interval)
+
+    def collapsed(self, route: Optional[str] = None) -> str:
+        """collapsed 格式的堆疊；route 為 None 時包含所有路由（以路由作為最外層）"""
+        with self._lock:
+            items = [(r, Counter(c)) for r, c in self._stacks.items() if route is None or r == route]
+        lines = []
+        for r, stacks in sorted(items):
+            prefix = "" if route is not None else f"{r.replace(';', ':')};"
+            lines.extend(f"{prefix}{stack} {count}" for stack, count in stacks.most_common())
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """各路由被分析的請求數、樣本數與平均處理時間"""
+        with self._lock:
+            return {
+                route: {
+                    "requests": self._requests[route],
+                    "samples": sum(self._stacks.get(route, Counter()).values()),
+                    "mean_ms": round(self._seconds[route] / self._requests[route] * 1000, 3)
+                    if self._requests[route] else 0.0,
+                }
+                for route in set(self._requests) | set(self._stacks)
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self._requests.clear()
+            self._seconds.clear()
+            self._dirty = False
+
+    def write(self) -> None:
+        """把各路由的堆疊寫入 output_dir（每個程序各自一組檔案）"""
+        if not self.output_dir:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            routes = list(self._stacks)
+            self._dirty = False
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            for route in routes:
+                slug = re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_") or "root"
+                path = os.path.join(self.output_dir, f"{os.getpid()}-{slug}.folded")
+                with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                    f.write(self.collapsed(route))
+                os.replace(f"{path}.tmp", path)
+        except OSError as e:
+            ERROR_PRINT(f"[ERROR] 無法寫入效能分析結果 {self.output_dir}: {e}")
+
+
+profiler: Optional[SamplingProfiler] = None
+
+
+def _authorized(token: str) -> bool:
+    # 只接受標頭（查詢參數會留在存取紀錄中），並以固定時間比較
+    value = request.headers.get(PROFILE_HEADER, "")
+    if token:
+        return hmac.compare_digest(value.encode("utf-8"), token.encode("utf-8"))
+    return is_debug_enabled() and bool(value)
+
+
+def debug_profile():
+    """
+    /debug/profile
+
+    參數：
+        route: 只取指定路由規則（例如 /api/stores）的 collapsed 堆疊
+        format: json 時返回各路由的統計
+        reset: 1 時清除目前的結果
+    """
+    if request.args.get("format") == "json":
+        return jsonify({"success": True, "routes": profiler.summary()})
+    body = profiler.collapsed(request.args.get("route"))
+    if request.args.get("reset") == "1":
+        profiler.reset()
+    return Response(body, content_type="text/plain; charset=utf-8")
+
+
+def init_profiler(app: Flask) -> None:
+    """
+    註冊取樣分析
+
+    設定：
+        PROFILER_ENABLED: 是否啟用（預設關閉）
+        PROFILER_SAMPLE_RATE: 隨機分析的請求比例（0 ~ 1）
+        PROFILER_INTERVAL: 擷取堆疊的間隔（秒）
+        PROFILER_TOKEN: X-Profile 標頭與 /debug/profile 需要的 token（留空時僅除錯模式可用）
+        PROFILER_OUTPUT_DIR: 定期寫入 collapsed 檔案的資料夾（留空不寫入）
+    """
+    global profiler
+    if not app.config.get("PROFILER_ENABLED", False):
+        return
+
+    sample_rate = min(max(float(app.config.get("PROFILER_SAMPLE_RATE", 0.01)), 0.0), 1.0)
+    token = app.config.get("PROFILER_TOKEN", "")
+    profiler = SamplingProfiler(
+        interval=max(float(app.config.get("PROFILER_INTERVAL", 0.005)), 0.001),
+        output_dir=app.config.get("PROFILER_OUTPUT_DIR") or None,
+    )
+    if profiler.output_dir:
+        atexit.register(profiler.write)
+
+    @app.before_request
+    def _begin_profile():
+        if request.url_rule is None or request.endpoint == "debug_profile":
+            return
+        flagged = PROFILE_HEADER in request.headers and _authorized(token)
+        if flagged or (sample_rate and random.random() < sample_rate):
+            g._profile_started = time.perf_counter()
+            profiler.begin(request.url_rule.rule)
+
+    @app.teardown_request
+    def _end_profile(exc):
+        started = g.pop("_profile_started", None)
+        if started is not None:
+            profiler.end(time.perf_counter() - started)
+
+    def _guarded_debug_profile():
+        if not _authorized(token):
+            abort(404)
+        return debug_profile()
+
+    app.add_url_rule("/debug/profile", "debug_profile", _guarded_debug_profile)
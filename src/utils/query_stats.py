@@ -0,0 +1,106 @@
+"""
+請求層級的 SQL 統計
+每個請求記錄 services.db 執行的查詢次數與耗時，超過門檻的查詢寫入慢查詢紀錄
+
+除錯模式（DEBUG_MODE=1）下另外：
+- 回應加上 X-DB-Query-Count、X-DB-Query-Time 與 Server-Timing 標頭（瀏覽器開發者工具可直接看到）
+- 查詢次數超過 QUERY_COUNT_WARN 時輸出警告（通常是 N+1 查詢）
+- /debug/queries 列出最近請求的查詢明細與依正規化 SQL 彙整的統計
+"""
+
+from collections import deque
+from threading import Lock
+from typing import Any, Deque, Dict, List
+
+from flask import Flask, jsonify, request
+
+from services.db import begin_query_stats, configure_query_log, current_query_stats, normalize_sql
+from utils.debug import WARN_PRINT, is_debug_enabled
+
+# /debug/queries 保留的最近請求數
+RECENT_REQUESTS = 100
+# 每個請求在 /debug/queries 列出的 SQL 數（依總耗時排序）
+QUERIES_PER_REQUEST = 20
+
+_recent: Deque[Dict[str, Any]] = deque(maxlen=RECENT_REQUESTS)
+_recent_lock = Lock()
+
+
+def _group_by_sql(queries) -> List[Dict[str, Any]]:
+    """依正規化 SQL 彙整次數與總耗時（N+1 查詢會顯示為同一條 SQL 的大量次數）"""
+    totals: Dict[str, Dict[str, Any]] = {}
+    for sql, count, ms in queries:
+        entry = totals.setdefault(sql, {"sql": sql, "count": 0, "total_ms": 0.0})
+        entry["count"] += count
+        entry["total_ms"] += ms
+    for entry in totals.values():
+        entry["total_ms"] = round(entry["total_ms"], 3)
+    return sorted(totals.values(), key=lambda e: e["total_ms"], reverse=True)
+
+
+def _request_summary(stats, status: int) -> Dict[str, Any]:
+    queries = [(normalize_sql(query), 1, seconds * 1000) for query, seconds in stats.queries or []]
+    return {
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "status": status,
+        "query_count": stats.count,
+        "query_ms": round(stats.seconds * 1000, 3),
+        "by_sql": _group_by_sql(queries)[:QUERIES_PER_REQUEST],
+    }
+
+
+def debug_queries():
+    """最近請求的查詢明細（僅除錯模式註冊）"""
+    with _recent_lock:
+        recent = list(_recent)
+    return jsonify({
+        "success": True,
+        "requests": recent[::-1],
+        "by_sql": _group_by_sql(
+            (entry["sql"], entry["count"], entry["total_ms"]) for summary in recent for entry in summary["by_sql"]
+        ),
+    })
+
+
+def init_query_stats(app: Flask) -> None:
+    """
+    設定慢查詢紀錄並註冊請求統計
+
+    設定：
+        SLOW_QUERY_MS: 慢查詢門檻（毫秒，0 表示停用）
+        SLOW_QUERY_LOG: 慢查詢紀錄檔（留空輸出到 stderr）
+        QUERY_COUNT_WARN: 除錯模式下單一請求查詢次數超過此值時警告（0 表示不警告）
+    """
+    configure_query_log(app.config.get("SLOW_QUERY_MS", 200), app.config.get("SLOW_QUERY_LOG") or None)
+    debug = is_debug_enabled()
+    count_warn = app.config.get("QUERY_COUNT_WARN", 20)
+
+    @app.before_request
+    def _begin_query_stats():
+        begin_query_stats(keep_queries=debug)
+
+    if not debug:
+        return
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = current_query_stats()
+        if stats is None:
+            return response
+
+        query_ms = stats.seconds * 1000
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Query-Time"] = f"{query_ms:.3f}"
+        response.headers.add("Server-Timing", f'db;dur={query_ms:.3f};desc="{stats.count} queries"')
+
+        if count_warn and stats.count > count_warn:
+            WARN_PRINT(f"[WARN] {request.method} {request.path} 執行了 {stats.count} 次查詢（{query_ms:.1f}ms）")
+
+        if stats.count and request.endpoint != "debug_queries":
+            summary = _request_summary(stats, response.status_code)
+            with _recent_lock:
+                _recent.append(summary)
+        return response
+
+    app.add_url_rule("/debug/queries", "debug_queries", debug_queries)
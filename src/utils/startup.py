@@ -0,0 +1,129 @@
+"""
+啟動流程
+記錄 create_app() 各步驟與各模組的耗時，並在 STARTUP_MODE=lazy 時把只有處理請求才需要的工作
+（靜態檔案雜湊、圖片 manifest、預先壓縮檔掃描等）延後到第一個請求執行，縮短新 worker 的啟動時間
+
+使用方式：
+    from utils.startup import run_or_defer
+
+    run_or_defer(app, "assets", lambda: ...)   # eager 時立即執行，lazy 時於第一個請求前執行
+
+延後的工作只能載入資料；路由（add_url_rule）必須在啟動時註冊，第一個請求之後 Flask 不允許再新增。
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from flask import Flask, current_app, jsonify
+
+from utils.debug import ERROR_PRINT, INFO_PRINT, is_debug_enabled
+
+STARTUP_EAGER = "eager"
+STARTUP_LAZY = "lazy"
+
+EXTENSION_KEY = "startup"
+
+
+class StartupTimer:
+    """依序記錄各步驟的耗時；延後的工作執行後也會加入"""
+
+    def __init__(self, mode: str = STARTUP_EAGER):
+        self.mode = mode
+        self.timings: List[Tuple[str, float]] = []
+        self.deferred: List[Tuple[str, Callable[[], None]]] = []
+        self.deferred_done = False
+        self._lock = threading.Lock()
+
+    @property
+    def lazy(self) -> bool:
+        return self.mode == STARTUP_LAZY
+
+    @contextmanager
+    def measure(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings.append((name, time.perf_counter() - started))
+
+    def run_deferred(self) -> None:
+        """執行延後的工作（只執行一次；同時到達的請求會等待第一個請求完成）"""
+        if self.deferred_done:
+            return
+        with self._lock:
+            if self.deferred_done:
+                return
+            for name, func in self.deferred:
+                try:
+                    with self.measure(f"deferred:{name}"):
+                        func()
+                except Exception as e:
+                    ERROR_PRINT(f"[ERROR] 延後初始化 {name} 失敗: {e}")
+            self.deferred = []
+            self.deferred_done = True
+        INFO_PRINT(self.report("[OK] 延後初始化完成", prefix="deferred:"))
+
+    def summary(self) -> Dict[str, object]:
+        return {
+            "mode": self.mode,
+            "deferred_done": self.deferred_done,
+            "pending": [name for name, _func in self.deferred],
+            "steps": [{"name": name, "ms": round(seconds * 1000, 3)} for name, seconds in self.timings],
+        }
+
+    def report(self, title: str, prefix: Optional[str] = None) -> str:
+        """各步驟耗時（由大到小）；prefix 只列出名稱以此開頭的步驟"""
+        items = [(name, seconds) for name, seconds in self.timings if prefix is None or name.startswith(prefix)]
+        total = sum(seconds for _name, seconds in items)
+        lines = [f"{title}（{total * 1000:.1f}ms）"]
+        width = max((len(name) for name, _seconds in items), default=0)
+        for name, seconds in sorted(items, key=lambda item: item[1], reverse=True):
+            lines.append(f"  {name:<{width}}  {seconds * 1000:8.1f}ms")
+        return "\n".join(lines)
+
+
+def get_timer(app: Flask) -> StartupTimer:
+    timer = app.extensions.get(EXTENSION_KEY)
+    if timer is None:
+        timer = app.extensions[EXTENSION_KEY] = StartupTimer()
+    return timer
+
+
+def run_or_defer(app: Flask, name: str, func: Callable[[], None]) -> None:
+    """eager 模式立即執行並記錄耗時；lazy 模式排入第一個請求前執行"""
+    timer = get_timer(app)
+    if timer.lazy and not timer.deferred_done:
+        timer.deferred.append((name, func))
+        return
+    with timer.measure(name):
+        func()
+
+
+def debug_startup():
+    """啟動耗時明細（僅除錯模式註冊）"""
+    return jsonify({"success": True, **get_timer(current_app).summary()})
+
+
+def init_startup(app: Flask) -> StartupTimer:
+    """
+    建立啟動計時並註冊執行延後工作的 hook（需在其他 init_* 之前呼叫）
+
+    設定：
+        STARTUP_MODE: eager（啟動時完成所有初始化）或 lazy（以 run_or_defer 登記的資料載入延後到第一個請求；
+                      路由與 Blueprint 仍在啟動時註冊）
+    """
+    mode = str(app.config.get("STARTUP_MODE", STARTUP_EAGER)).lower()
+    timer = StartupTimer(STARTUP_LAZY if mode == STARTUP_LAZY else STARTUP_EAGER)
+    app.extensions[EXTENSION_KEY] = timer
+
+    if timer.lazy:
+        # 最先註冊：static 與其他 hook 依賴延後載入的資料
+        @app.before_request
+        def _run_deferred_init():
+            timer.run_deferred()
+
+    if is_debug_enabled():
+        app.add_url_rule("/debug/startup", "debug_startup", debug_startup)
+    return timer
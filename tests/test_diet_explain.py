@@ -0,0 +1,41 @@
+"""
+飲食記錄查詢索引回歸測試
+對 scripts/explain_diet_queries.py 列出的每個查詢執行相同的 EXPLAIN 檢查；
+未安裝 mariadb 驅動或無法連線資料庫時略過
+
+執行方式：
+    python3 -m pytest tests/test_diet_explain.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+sys.path.insert(0, str(project_root / "src" / "scripts"))
+
+import explain_diet_queries  # noqa: E402
+from services.db import DatabaseError, driver_available, fetch_one  # noqa: E402
+
+QUERY_NAMES = [name for name, _query, _params in explain_diet_queries._diet_queries(1)]
+
+
+@pytest.fixture(scope="module")
+def app_context():
+    if not driver_available():
+        pytest.skip("尚未安裝 mariadb Python 驅動")
+    app = explain_diet_queries.create_app()
+    with app.app_context():
+        try:
+            fetch_one("SELECT 1")
+        except DatabaseError as e:
+            pytest.skip(f"無法連線資料庫: {e}")
+        yield app
+
+
+@pytest.mark.parametrize("name", QUERY_NAMES)
+def test_diet_query_uses_user_time_index(app_context, name):
+    query, params = next((q, p) for n, q, p in explain_diet_queries._diet_queries(1) if n == name)
+    assert explain_diet_queries._check(name, query, params), f"{name} 未使用 {explain_diet_queries.EXPECTED_INDEX} 範圍掃描"